@@ -0,0 +1,176 @@
+# backend/admission.py
+"""
+Admission control: per-route-class concurrency limits with load shedding.
+
+Requests are sorted into classes (export, upload, auth, crud). Each class has
+its own concurrency limit and a bounded FIFO queue. A request that finds the
+queue full, or waits longer than the queue timeout, gets an immediate 503
+(429 for auth) with a Retry-After header instead of piling onto the worker
+threads. Plain reads are not classified and never wait, so they stay fast
+while heavy endpoints are throttled.
+
+Limits are per process. Each one can be overridden with an environment
+variable, for example INVENTORY_ADMISSION_EXPORT="2,4,5" meaning 2 concurrent,
+4 queued, 5 seconds queue timeout.
+"""
+import asyncio
+import json
+import math
+import os
+from collections import deque
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+# name -> (concurrency limit, max queued, queue timeout seconds, reject status)
+DEFAULT_CLASSES = {
+    "export": (2, 4, 5.0, 503),
+    "upload": (2, 4, 10.0, 503),
+    "auth": (8, 32, 2.0, 429),
+    "crud": (16, 64, 5.0, 503),
+}
+
+# (class, methods or None for any, path prefix, path suffix). First match wins.
+# A class of None leaves a POST that only reads unclassified, like a GET.
+ROUTE_RULES = [
+    ("auth", None, "/auth/", ""),
+    (None, frozenset({"POST"}), "/equipments/by-code", ""),
+    # A whole-table write under BEGIN IMMEDIATE: heavy work, not a crud slot.
+    ("export", frozenset({"POST"}), "/stock/reconcile", ""),
+    ("export", frozenset({"GET"}), "", "/export-csv"),
+    ("export", frozenset({"GET", "POST"}), "/labels/", ""),
+    ("upload", frozenset({"POST"}), "", "/bulk-upload"),
+]
+
+
+def classify(method, path):
+    for name, methods, prefix, suffix in ROUTE_RULES:
+        if methods is not None and method not in methods:
+            continue
+        if path.startswith(prefix) and path.endswith(suffix):
+            return name
+    if method in WRITE_METHODS:
+        return "crud"
+    return None
+
+
+class ConcurrencyLimiter:
+    """Asyncio semaphore with a bounded FIFO queue and a wait timeout."""
+
+    def __init__(self, name, limit, max_queue, queue_timeout, reject_status=503):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.reject_status = reject_status
+        self.retry_after = max(1, math.ceil(queue_timeout))
+        self.active = 0
+        self.waiters = deque()
+        self.admitted = 0
+        self.rejected = 0
+
+    async def acquire(self):
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if len(self.waiters) >= self.max_queue:
+            self.rejected += 1
+            return False
+
+        fut = asyncio.get_running_loop().create_future()
+        self.waiters.append(fut)
+        try:
+            await asyncio.wait_for(fut, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+        except asyncio.CancelledError:
+            # Client went away; if the slot was handed to us already, pass it on.
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+        finally:
+            if not fut.done() or fut.cancelled():
+                try:
+                    self.waiters.remove(fut)
+                except ValueError:
+                    pass
+        self.admitted += 1
+        return True
+
+    def release(self):
+        # Hand the slot straight to the oldest live waiter.
+        while self.waiters:
+            fut = self.waiters.popleft()
+            if not fut.done():
+                fut.set_result(True)
+                return
+        self.active -= 1
+
+
+def load_limiters():
+    limiters = {}
+    for name, (limit, queue, timeout, reject_status) in DEFAULT_CLASSES.items():
+        override = os.getenv(f"INVENTORY_ADMISSION_{name.upper()}")
+        if override:
+            limit, queue, timeout = override.split(",")
+            limit, queue, timeout = int(limit), int(queue), float(timeout)
+        limiters[name] = ConcurrencyLimiter(name, limit, queue, timeout, reject_status)
+    return limiters
+
+
+limiters = load_limiters()
+
+
+class AdmissionMiddleware:
+    """Pure ASGI admission controller. Mount inside CORS so rejections keep CORS headers."""
+
+    def __init__(self, app, limiters=limiters):
+        self.app = app
+        self.limiters = limiters
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = classify(scope["method"], scope["path"])
+        limiter = self.limiters.get(route_class) if route_class else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            await self._reject(limiter, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    @staticmethod
+    async def _reject(limiter, send):
+        body = json.dumps({"detail": f"Server busy ({limiter.name}), please retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": limiter.reject_status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(limiter.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def render_metrics():
+    """Prometheus lines for metrics.registry.collectors."""
+    lines = [
+        "# HELP admission_active Requests holding a slot per route class.",
+        "# TYPE admission_active gauge",
+    ]
+    lines += [f'admission_active{{class="{n}"}} {l.active}' for n, l in limiters.items()]
+    lines += ["# HELP admission_queued Requests waiting for a slot.", "# TYPE admission_queued gauge"]
+    lines += [f'admission_queued{{class="{n}"}} {len(l.waiters)}' for n, l in limiters.items()]
+    lines += ["# HELP admission_rejected_total Requests shed.", "# TYPE admission_rejected_total counter"]
+    lines += [f'admission_rejected_total{{class="{n}"}} {l.rejected}' for n, l in limiters.items()]
+    return lines
@@ -0,0 +1,407 @@
+# backend/alerts.py
+"""
+Low-stock and overdue alerts, evaluated incrementally.
+
+Two kinds of alert:
+  * low_stock - an item's available_qty is below its reorder_threshold
+  * overdue   - an issued item's return_date has passed
+
+Nothing here scans a table after startup. A flush
+that touches Equipment or IssueRecord parks the touched rows on the
+session, and only those rows are re-evaluated once the session commits.
+Open issue records with a due date also go into a heap ordered by due
+date. A once-a-minute tick pops the entries that have fallen due, so the
+cost of a tick is the number of newly overdue items, not the table size.
+Heap entries for records that were returned or re-dated since are
+recognised as stale and dropped when popped.
+
+The state is loaded once per database (core and each department, see
+tenancy.py): a low-stock query, plus the open issues read through
+ix_issue_records_open_due. INVENTORY_ALERTS_SYNC reloads it when another
+process writes to the database, as INVENTORY_CODE_INDEX_SYNC does for
+the code index.
+
+Changes are pushed to subscribers of GET /alerts/stream (routes/alerts.py)
+as "raised" and "cleared" events.
+"""
+import asyncio
+import heapq
+import os
+import threading
+from datetime import date, datetime
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+import models
+
+TICK_SECONDS = float(os.getenv("INVENTORY_ALERTS_TICK", "60"))
+SYNC_INTERVAL_SECONDS = float(os.getenv("INVENTORY_ALERTS_SYNC", "0"))  # 0 disables
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+LOW_STOCK = "low_stock"
+OVERDUE = "overdue"
+
+_PENDING_KEY = "alerts_pending"
+
+stats = {"raised": 0, "cleared": 0, "evaluated": 0}
+
+
+def _today():
+    return date.today().isoformat()
+
+
+def _is_open(status):
+    return (status or "").lower() == "issued"
+
+
+def _low_stock_alert(equipment_id, row, since=None):
+    return {
+        "id": f"{LOW_STOCK}:{equipment_id}",
+        "kind": LOW_STOCK,
+        "equipment_id": equipment_id,
+        "issue_id": None,
+        "message": f"{row['name']} ({row['code']}): {row['available_qty']} available, "
+                   f"reorder threshold {row['reorder_threshold']}",
+        "available_qty": row["available_qty"],
+        "reorder_threshold": row["reorder_threshold"],
+        "due_date": None,
+        "since": since or datetime.utcnow(),
+    }
+
+
+def _overdue_alert(issue_id, row, since=None):
+    return {
+        "id": f"{OVERDUE}:{issue_id}",
+        "kind": OVERDUE,
+        "equipment_id": row["equipment_id"],
+        "issue_id": issue_id,
+        "message": f"Issue #{issue_id} to {row['issued_to']} was due back on {row['return_date']}",
+        "available_qty": None,
+        "reorder_threshold": None,
+        "due_date": row["return_date"],
+        "since": since or datetime.utcnow(),
+    }
+
+
+class AlertState:
+    """Active alerts and the overdue queue of one database."""
+
+    def __init__(self, tenant=None):
+        self.tenant = tenant
+        self.active = {}   # alert id -> alert
+        self._open = {}    # issue id -> row, for open issues with a due date
+        self._due = []     # heap of (return_date, issue id); may hold stale entries
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._watch = None
+        self._data_version = None
+
+    def _engine(self):
+        import tenancy
+
+        return tenancy.get_engine(self.tenant)
+
+    def _read_data_version(self):
+        if self._watch is None:
+            from database import DataVersionWatch
+
+            self._watch = DataVersionWatch(self._engine())
+        return self._watch.read()
+
+    # --- loading -------------------------------------------------------
+
+    def _load_locked(self):
+        equipment = models.Equipment.__table__
+        issues = models.IssueRecord.__table__
+        version = self._read_data_version() if SYNC_INTERVAL_SECONDS > 0 else None
+        with self._engine().connect() as conn:
+            low = conn.execute(
+                select(equipment.c.id, equipment.c.name, equipment.c.code,
+                       equipment.c.available_qty, equipment.c.reorder_threshold)
+                .where(equipment.c.reorder_threshold.is_not(None))
+                .where(equipment.c.available_qty < equipment.c.reorder_threshold)
+            ).mappings().all()
+            open_issues = conn.execute(
+                select(issues.c.id, issues.c.equipment_id, issues.c.issued_to, issues.c.return_date)
+                .where(func.lower(issues.c.status) == "issued")
+                .where(issues.c.return_date.is_not(None))
+            ).mappings().all()
+
+        previous = self.active
+        self.active = {}
+        for row in low:
+            alert_id = f"{LOW_STOCK}:{row['id']}"
+            self.active[alert_id] = _low_stock_alert(row["id"], row, (previous.get(alert_id) or {}).get("since"))
+        self._open = {row["id"]: dict(row) for row in open_issues}
+        self._due = [(row["return_date"], row["id"]) for row in open_issues]
+        heapq.heapify(self._due)
+        self._pop_due_locked(previous)
+        self._data_version = version
+        self.ready.set()
+
+        events = [("raised", a) for i, a in self.active.items() if i not in previous]
+        events += [("cleared", a) for i, a in previous.items() if i not in self.active]
+        return events
+
+    def ensure_loaded(self):
+        with self._lock:
+            if self.ready.is_set():
+                return
+            events = self._load_locked()
+        _publish(self.tenant, events)
+
+    def sync(self):
+        """Reload if another connection has committed to this database since the last load."""
+        with self._lock:
+            if self._read_data_version() == self._data_version:
+                return
+            events = self._load_locked()
+        _publish(self.tenant, events)
+
+    def reload(self):
+        with self._lock:
+            events = self._load_locked()
+        _publish(self.tenant, events)
+
+    # --- incremental evaluation -----------------------------------------
+
+    def _raise(self, events, alert):
+        if alert["id"] not in self.active:
+            events.append(("raised", alert))
+        self.active[alert["id"]] = alert
+
+    def _clear(self, events, alert_id):
+        alert = self.active.pop(alert_id, None)
+        if alert is not None:
+            events.append(("cleared", alert))
+
+    def _evaluate_equipment(self, events, equipment_id, row):
+        alert_id = f"{LOW_STOCK}:{equipment_id}"
+        threshold = row and row["reorder_threshold"]
+        if threshold is not None and row["available_qty"] is not None and row["available_qty"] < threshold:
+            current = self.active.get(alert_id)
+            self._raise(events, _low_stock_alert(equipment_id, row, current and current["since"]))
+        else:
+            self._clear(events, alert_id)
+
+    def _evaluate_issue(self, events, issue_id, row, today):
+        alert_id = f"{OVERDUE}:{issue_id}"
+        if row is None or not _is_open(row["status"]) or not row["return_date"]:
+            self._open.pop(issue_id, None)
+            self._clear(events, alert_id)
+            return
+        previous = self._open.get(issue_id)
+        self._open[issue_id] = row
+        if row["return_date"] < today:
+            current = self.active.get(alert_id)
+            self._raise(events, _overdue_alert(issue_id, row, current and current["since"]))
+            return
+        self._clear(events, alert_id)
+        if previous is None or previous["return_date"] != row["return_date"]:
+            heapq.heappush(self._due, (row["return_date"], issue_id))
+
+    def apply(self, changes):
+        today = _today()
+        events = []
+        with self._lock:
+            for kind, entity_id, row in changes:
+                if kind == "equipment":
+                    self._evaluate_equipment(events, entity_id, row)
+                else:
+                    self._evaluate_issue(events, entity_id, row, today)
+        stats["evaluated"] += len(changes)
+        _publish(self.tenant, events)
+
+    def _pop_due_locked(self, previous=None):
+        today = _today()
+        events = []
+        while self._due and self._due[0][0] < today:
+            due, issue_id = heapq.heappop(self._due)
+            row = self._open.get(issue_id)
+            if row is None or row["return_date"] != due:
+                continue  # returned or re-dated since it was queued
+            alert_id = f"{OVERDUE}:{issue_id}"
+            since = (self.active.get(alert_id) or (previous or {}).get(alert_id) or {}).get("since")
+            self._raise(events, _overdue_alert(issue_id, row, since))
+        return events
+
+    def tick(self):
+        with self._lock:
+            events = self._pop_due_locked()
+        _publish(self.tenant, events)
+
+    def alerts(self):
+        return sorted(self.active.values(), key=lambda a: (a["since"], a["id"]))
+
+
+_states = {}
+_states_lock = threading.Lock()
+
+
+def get_state(tenant=None):
+    """The alert state for a department, loaded on first use."""
+    state = _states.get(tenant)
+    if state is None:
+        # Registered before it loads, so commits made during the load are not lost.
+        with _states_lock:
+            state = _states.get(tenant)
+            if state is None:
+                state = _states[tenant] = AlertState(tenant)
+    if not state.ready.is_set():
+        state.ensure_loaded()
+    return state
+
+
+def load_all():
+    import tenancy
+
+    for tenant in tenancy.all_tenants():
+        get_state(tenant)
+
+
+def active_alerts(tenant=None):
+    return get_state(tenant).alerts()
+
+
+def tick():
+    """Entry point for the overdue PeriodicTask."""
+    for state in list(_states.values()):
+        if state.ready.is_set():
+            state.tick()
+
+
+def reload(tenant=None):
+    """Re-read a loaded state after a write that bypassed the session hooks (see reconcile.py)."""
+    state = _states.get(tenant)
+    if state is not None and state.ready.is_set():
+        state.reload()
+
+
+def sync():
+    """Entry point for the cross-process sync PeriodicTask."""
+    for state in list(_states.values()):
+        if state.ready.is_set():
+            state.sync()
+
+
+# ==========================================
+#  PUSH FEED
+# ==========================================
+
+_subscribers = {}  # asyncio.Queue -> (event loop, tenant)
+_subscribers_lock = threading.Lock()
+
+
+def subscribe(tenant=None):
+    """Queue that receives {"type": "raised"|"cleared", "alert": {...}} for a department. Call from the event loop."""
+    queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    with _subscribers_lock:
+        _subscribers[queue] = (asyncio.get_running_loop(), tenant)
+    return queue
+
+
+def unsubscribe(queue):
+    with _subscribers_lock:
+        _subscribers.pop(queue, None)
+
+
+def _offer(queue, message):
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        pass  # a stalled client; it can re-read GET /alerts when it catches up
+
+
+def _publish(tenant, events):
+    if not events:
+        return
+    for kind, _ in events:
+        stats[kind] += 1
+    with _subscribers_lock:
+        targets = [(queue, loop) for queue, (loop, t) in _subscribers.items() if t == tenant]
+    for queue, loop in targets:
+        for kind, alert in events:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, {"type": kind, "alert": alert})
+            except RuntimeError:
+                unsubscribe(queue)  # its event loop is closed
+                break
+
+
+# ==========================================
+#  KEEPING THE STATE CURRENT
+# ==========================================
+
+def _equipment_row(obj):
+    return {
+        "name": obj.name, "code": obj.code,
+        "available_qty": obj.available_qty, "reorder_threshold": obj.reorder_threshold,
+    }
+
+
+def _issue_row(obj):
+    # Dates are stored as ISO strings, but a freshly assigned value may still be a date.
+    return_date = obj.return_date
+    if isinstance(return_date, date):
+        return_date = return_date.isoformat()
+    return {
+        "equipment_id": obj.equipment_id, "issued_to": obj.issued_to,
+        "return_date": return_date, "status": obj.status,
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    changes = []
+    for obj in session.new | session.dirty:
+        if isinstance(obj, models.Equipment):
+            changes.append(("equipment", obj.id, _equipment_row(obj)))
+        elif isinstance(obj, models.IssueRecord):
+            changes.append(("issue", obj.id, _issue_row(obj)))
+    for obj in session.deleted:
+        if isinstance(obj, models.Equipment):
+            changes.append(("equipment", obj.id, None))
+        elif isinstance(obj, models.IssueRecord):
+            changes.append(("issue", obj.id, None))
+    if changes:
+        session.info.setdefault(_PENDING_KEY, []).extend(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    changes = session.info.pop(_PENDING_KEY, None)
+    if not changes:
+        return
+    state = _states.get(session.info.get("tenant"))
+    # A state that is not loaded yet will read these rows when it is.
+    if state is not None:
+        state.apply(changes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changes(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def render_metrics():
+    """Prometheus lines for metrics.registry.collectors."""
+    counts = {LOW_STOCK: 0, OVERDUE: 0}
+    for state in list(_states.values()):
+        for alert in list(state.active.values()):
+            counts[alert["kind"]] += 1
+    lines = [
+        "# HELP alerts_active Alerts currently raised.",
+        "# TYPE alerts_active gauge",
+    ]
+    lines += [f'alerts_active{{kind="{kind}"}} {count}' for kind, count in counts.items()]
+    lines += [
+        "# HELP alerts_events_total Alerts raised and cleared.",
+        "# TYPE alerts_events_total counter",
+        f'alerts_events_total{{type="raised"}} {stats["raised"]}',
+        f'alerts_events_total{{type="cleared"}} {stats["cleared"]}',
+        "# HELP alerts_rows_evaluated_total Changed rows evaluated for alerts.",
+        "# TYPE alerts_rows_evaluated_total counter",
+        f"alerts_rows_evaluated_total {stats['evaluated']}",
+    ]
+    return lines
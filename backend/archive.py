@@ -0,0 +1,154 @@
+# backend/archive.py
+"""
+Hot/cold archiving of closed issue and maintenance records.
+
+Returned issue records and completed maintenance records whose closing date
+(return_date / return_from_repair_date, falling back to the opening date)
+is more than ARCHIVE_AFTER_DAYS old are moved to issue_records_archive and
+maintenance_archive in the same database. The day-to-day lists and their
+indexes then only hold open and recent records; pass include_archived=true
+to GET /issues or GET /maintenance for the full history.
+
+Records move in batches of BATCH_SIZE. Each batch is one INSERT ... SELECT
+plus DELETE in its own transaction, so a batch is never half moved and
+writers only wait for one batch at a time. Ids are kept. The hot tables
+are AUTOINCREMENT (migrations.py rebuilds older databases once), so SQLite
+never hands out an archived id again, even after the newest row is deleted.
+
+Runs from a PeriodicTask in main.py for the core database and every
+department. By hand:
+
+    python archive.py run [--days 365] [--dry-run]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, func, literal, select
+
+import models
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("INVENTORY_ARCHIVE_AFTER_DAYS", "365"))  # 0 disables
+INTERVAL_SECONDS = float(os.getenv("INVENTORY_ARCHIVE_INTERVAL", "21600"))
+BATCH_SIZE = int(os.getenv("INVENTORY_ARCHIVE_BATCH", "1000"))
+
+# (hot model, archive model, closed status, closing date column, opening date column)
+POLICIES = [
+    (models.IssueRecord, models.IssueRecordArchive, "returned", "return_date", "issue_date"),
+    (models.Maintenance, models.MaintenanceArchive, "completed", "return_from_repair_date", "fault_date"),
+]
+
+# Rows moved by this process, for /metrics.
+archived_total = {archive.__tablename__: 0 for _, archive, *_ in POLICIES}
+
+
+def cutoff_date(days=None):
+    days = ARCHIVE_AFTER_DAYS if days is None else days
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+def _closed_before(hot, status, closed_column, opened_column, cutoff):
+    """WHERE clause for closed rows of `hot` older than `cutoff` (dates are ISO strings)."""
+    closed_on = func.coalesce(hot.c[closed_column], hot.c[opened_column])
+    return (func.lower(hot.c.status) == status) & (closed_on < cutoff)
+
+
+def archive_table(engine, policy, cutoff, batch_size=BATCH_SIZE, dry_run=False):
+    """Move one table's closed rows; returns how many were (or, with dry_run, would be) moved."""
+    hot_model, archive_model, status, closed_column, opened_column = policy
+    hot = hot_model.__table__
+    archive = archive_model.__table__
+    where = _closed_before(hot, status, closed_column, opened_column, cutoff)
+
+    if dry_run:
+        with engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(hot).where(where)).scalar()
+
+    columns = [c.name for c in hot.columns]
+    moved = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            # Resume after the previous batch instead of rescanning from the start.
+            ids = [row[0] for row in conn.execute(
+                select(hot.c.id).where(where & (hot.c.id > last_id)).order_by(hot.c.id).limit(batch_size)
+            )]
+            if not ids:
+                break
+            # A range rather than IN (...) keeps the statement under SQLite's variable limit.
+            batch = where & hot.c.id.between(ids[0], ids[-1])
+            now = datetime.utcnow()
+            conn.execute(archive.insert().from_select(
+                columns + ["archived_at"],
+                select(*[hot.c[name] for name in columns], literal(now, archive.c.archived_at.type)).where(batch),
+            ))
+            conn.execute(delete(hot).where(batch))
+        last_id = ids[-1]
+        moved += len(ids)
+        archived_total[archive.name] += len(ids)
+        if len(ids) < batch_size:
+            break
+    return moved
+
+
+def archive_database(engine, days=None, dry_run=False):
+    """Archive every table of one database. Returns {archive table: rows}."""
+    cutoff = cutoff_date(days)
+    return {
+        policy[1].__tablename__: archive_table(engine, policy, cutoff, dry_run=dry_run)
+        for policy in POLICIES
+    }
+
+
+def run_scheduled(days=None, dry_run=False):
+    """Entry point for the background PeriodicTask: archive the core database and every department."""
+    import tenancy
+
+    results = {}
+    for tenant in tenancy.all_tenants():
+        started = time.perf_counter()
+        counts = archive_database(tenancy.get_engine(tenant), days, dry_run)
+        results[tenancy.display_name(tenant)] = counts
+        if any(counts.values()):
+            verb = "Would archive" if dry_run else "Archived"
+            print(f"{verb} {counts} in {tenancy.display_name(tenant)} "
+                  f"({time.perf_counter() - started:.1f}s)")
+    return results
+
+
+def render_metrics():
+    """Prometheus lines for metrics.registry.collectors."""
+    lines = [
+        "# HELP archived_rows_total Closed records moved to archive tables by this process.",
+        "# TYPE archived_rows_total counter",
+    ]
+    lines += [f'archived_rows_total{{table="{name}"}} {count}' for name, count in archived_total.items()]
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move closed issue and maintenance records to archive tables.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="archive now, in the core database and every department")
+    run.add_argument("--days", type=int, default=None,
+                     help=f"archive records closed more than this many days ago (default {ARCHIVE_AFTER_DAYS})")
+    run.add_argument("--dry-run", action="store_true", help="only count what would be archived")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        days = ARCHIVE_AFTER_DAYS if args.days is None else args.days
+        if days <= 0:
+            print("Archiving is disabled (days must be positive)")
+            return 1
+        from database import get_engine
+
+        models.Base.metadata.create_all(bind=get_engine())
+        for name, counts in run_scheduled(days, args.dry_run).items():
+            print(f"{name}: {counts}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
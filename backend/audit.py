@@ -0,0 +1,170 @@
+# backend/audit.py
+"""
+Append-only audit trail for inventory mutations.
+
+crud.py calls record() inside the same session that makes the change. The
+entry is parked on the session and only moves to the in-memory ring buffer
+when that session commits; a rollback discards it. So the trail never shows
+a change that did not happen.
+
+A background PeriodicTask flushes the buffer to audit_log in one executemany
+per batch, which keeps the write path to an append to a deque. If the buffer
+fills faster than it drains, the thread that fills it flushes inline. That
+is backpressure: entries are never dropped.
+"""
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import date, datetime
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+import models
+
+logger = logging.getLogger(__name__)
+
+BUFFER_CAPACITY = int(os.getenv("INVENTORY_AUDIT_BUFFER", "10000"))
+FLUSH_INTERVAL_SECONDS = float(os.getenv("INVENTORY_AUDIT_FLUSH_INTERVAL", "1.0"))
+
+# Never copied into the trail.
+REDACTED_FIELDS = frozenset({"hashed_password", "recovery_code", "remember_token", "token_expiry"})
+
+ENTITY_TYPES = {
+    "Equipment": "equipment",
+    "IssueRecord": "issue_record",
+    "Maintenance": "maintenance",
+    "User": "user",
+}
+
+_PENDING_KEY = "audit_pending"
+
+
+def _plain(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def snapshot(obj):
+    """Column values of an ORM instance, minus sensitive fields."""
+    mapper = inspect(obj).mapper
+    return {
+        attr.key: _plain(getattr(obj, attr.key))
+        for attr in mapper.column_attrs
+        if attr.key not in REDACTED_FIELDS
+    }
+
+
+def diff(before, after):
+    """{field: [old, new]} for fields that changed. Either side may be None."""
+    before = before or {}
+    after = after or {}
+    return {
+        key: [before.get(key), after.get(key)]
+        for key in before.keys() | after.keys()
+        if before.get(key) != after.get(key)
+    }
+
+
+class AuditBuffer:
+    """Bounded ring buffer of entries waiting to be written."""
+
+    def __init__(self, capacity=BUFFER_CAPACITY):
+        self.capacity = capacity
+        self._entries = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def extend(self, entries):
+        with self._lock:
+            self._entries.extend(entries)
+            full = len(self._entries) >= self.capacity
+        if full:
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Inline audit flush failed; %d entries kept in memory", len(self))
+
+    def drain(self):
+        with self._lock:
+            entries = list(self._entries)
+            self._entries.clear()
+        return entries
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of entries written."""
+        import tenancy
+
+        with self._flush_lock:
+            entries = self.drain()
+            if not entries:
+                return 0
+            # Entries are (department, row); each goes to its department's database.
+            by_tenant = {}
+            for tenant, row in entries:
+                by_tenant.setdefault(tenant, []).append(row)
+            failed = []
+            for tenant, rows in by_tenant.items():
+                try:
+                    with tenancy.get_engine(tenant).begin() as conn:
+                        conn.execute(models.AuditEntry.__table__.insert(), rows)
+                except Exception:
+                    logger.exception("Audit flush to %s failed", tenancy.display_name(tenant))
+                    failed += [(tenant, row) for row in rows]
+            if failed:
+                # Put them back in front so the next flush retries in order.
+                with self._lock:
+                    self._entries.extendleft(reversed(failed))
+                raise RuntimeError(f"Could not write {len(failed)} audit entries")
+            return len(entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+buffer = AuditBuffer()
+
+
+def record(db: Session, actor, action, obj, before=None):
+    """
+    Queue an audit entry for `obj` on `db`. Call after flush (so new rows
+    have ids) and before commit. `before` is a snapshot() taken before the
+    change; pass None for creates.
+    """
+    after = None if action == "delete" else snapshot(obj)
+    changes = diff(before, after)
+    if action == "update" and not changes:
+        return
+    entity_type = ENTITY_TYPES.get(type(obj).__name__, type(obj).__tablename__)
+    db.info.setdefault(_PENDING_KEY, []).append({
+        "created_at": datetime.utcnow(),
+        "actor": actor,
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": getattr(obj, "id", None),
+        "changes": json.dumps(changes, default=str),
+    })
+
+
+@event.listens_for(Session, "after_commit")
+def _move_to_buffer(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        tenant = session.info.get("tenant")
+        buffer.extend([(tenant, row) for row in pending])
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def flush():
+    try:
+        return buffer.flush()
+    except Exception:
+        logger.exception("Audit flush failed; %d entries kept in memory", len(buffer))
+        return 0
@@ -47,20 +47,26 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def decode_token_claims(token: str):
+    """Verified claims of a JWT, or None if it is invalid or expired."""
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
 def decode_access_token(token: str):
     """
     Decode and verify a JWT token.
     Demonstrates CLO-1: Exception Handling 
     """
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-        return username
-    except JWTError:
+    payload = decode_token_claims(token)
+    if payload is None:
         # Returns None if token is invalid or expired, triggering a 401 in main.py
         return None
+    username: str = payload.get("sub")
+    if username is None:
+        return None
+    return username
 
 # ===========================
 # 🔄 REMEMBER ME LOGIC
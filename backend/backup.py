@@ -0,0 +1,339 @@
+# backend/backup.py
+"""
+Online backups of the inventory database, and restore.
+
+A backup copies the live database with SQLite's backup API, PAGES_PER_STEP
+pages at a time, from inside one read transaction. With the database in WAL
+mode (see database.py) that transaction is a consistent snapshot which
+never blocks writers, and commits made during the copy do not restart it.
+A short pause between steps leaves disk bandwidth for the API.
+
+Each snapshot is integrity-checked before it is kept, then gzip-compressed
+to backups/inventory-YYYYmmdd-HHMMSS.db.gz. Only the newest KEEP snapshots
+are kept. Files are written under a temporary name and renamed at the end,
+so a half-written backup is never mistaken for a good one.
+
+Scheduled snapshots run from a PeriodicTask in main.py. Maintenance is done
+from the command line:
+
+    python backup.py create
+    python backup.py list
+    python backup.py verify backups/inventory-20240101-020000.db.gz
+    python backup.py restore backups/inventory-20240101-020000.db.gz
+
+Restore the database while the server is stopped. Restoring saves the
+current database as a "pre-restore" backup first.
+
+Department databases (tenancy.py) are backed up alongside the core one,
+into backups/departments/<name>/; pass --department to restore one.
+"""
+import argparse
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import time
+import zlib
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+INTERVAL_SECONDS = float(os.getenv("INVENTORY_BACKUP_INTERVAL", "86400"))  # 0 disables
+KEEP = int(os.getenv("INVENTORY_BACKUP_KEEP", "7"))
+PAGES_PER_STEP = int(os.getenv("INVENTORY_BACKUP_PAGES_PER_STEP", "1024"))
+STEP_PAUSE_SECONDS = float(os.getenv("INVENTORY_BACKUP_STEP_PAUSE", "0.005"))
+# How often the scheduler checks whether a snapshot is due. Checking (rather
+# than sleeping a full interval) means a desktop app that is restarted every
+# day still gets its daily backup.
+CHECK_INTERVAL_SECONDS = min(INTERVAL_SECONDS, 3600) if INTERVAL_SECONDS > 0 else 0
+LOCK_STALE_SECONDS = 6 * 3600
+
+PREFIX = "inventory-"
+SUFFIX = ".db.gz"
+
+# Outcome of the last backup in this process, for /metrics.
+last_backup = {"finished_at": None, "duration": None, "size": None, "failures": 0}
+
+
+def get_backup_dir():
+    from database import get_user_data_dir
+
+    path = os.getenv("INVENTORY_BACKUP_DIR") or os.path.join(get_user_data_dir(), "backups")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def targets():
+    """(database path, backup folder) for the core database and each department database."""
+    import tenancy
+    from database import get_db_path
+
+    backup_dir = get_backup_dir()
+    found = [(get_db_path(), backup_dir)]
+    for tenant in tenancy.TENANTS:
+        db_path = tenancy.get_db_path(tenant)
+        if os.path.exists(db_path):
+            folder = os.path.join(backup_dir, "departments", tenant)
+            os.makedirs(folder, exist_ok=True)
+            found.append((db_path, folder))
+    return found
+
+
+def list_backups(backup_dir=None):
+    """Backup files, newest first."""
+    backup_dir = backup_dir or get_backup_dir()
+    names = [n for n in os.listdir(backup_dir) if n.startswith(PREFIX) and n.endswith(SUFFIX)]
+    return [os.path.join(backup_dir, n) for n in sorted(names, reverse=True)]
+
+
+# ==========================================
+#  CREATE
+# ==========================================
+
+def _copy_online(source_path, dest_path):
+    """Page-stepped copy of `source_path` from a single read snapshot."""
+    source = sqlite3.connect(source_path, isolation_level=None, timeout=30)
+    dest = sqlite3.connect(dest_path)
+    try:
+        journal_mode = source.execute("PRAGMA journal_mode").fetchone()[0].lower()
+        if journal_mode == "wal":
+            # Pin a snapshot: later commits go to the WAL, not to pages we copy.
+            source.execute("BEGIN")
+            source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+            source.backup(dest, pages=PAGES_PER_STEP, progress=lambda *_: time.sleep(STEP_PAUSE_SECONDS))
+            source.execute("COMMIT")
+        else:
+            # Outside WAL any commit during a stepped copy restarts it, so
+            # copy in one step; writers wait for its duration.
+            logger.warning("Database is in %s mode; backing up in a single step", journal_mode)
+            source.backup(dest)
+    finally:
+        dest.close()
+        source.close()
+
+
+def check_integrity(db_path):
+    """Return None if the database passes PRAGMA integrity_check, else the problems."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+    return None if rows == ["ok"] else "; ".join(rows[:10])
+
+
+def _compress(src, dest):
+    with open(src, "rb") as f_in, open(dest, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6, mtime=0) as f_out:
+            shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def _decompress(src, dest):
+    with gzip.open(src, "rb") as f_in, open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+
+
+def create_backup(db_path=None, backup_dir=None, label=None, keep=KEEP):
+    """Take a snapshot now and return the path of the .db.gz file."""
+    from database import get_db_path
+
+    db_path = db_path or get_db_path()
+    backup_dir = backup_dir or get_backup_dir()
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    name = f"{PREFIX}{stamp}{'-' + label if label else ''}"
+    raw_path = os.path.join(backup_dir, name + ".db.partial")
+    final_path = os.path.join(backup_dir, name + SUFFIX)
+    gz_partial = final_path + ".partial"
+
+    started = time.perf_counter()
+    try:
+        _copy_online(db_path, raw_path)
+        problems = check_integrity(raw_path)
+        if problems:
+            raise RuntimeError(f"Backup failed integrity check: {problems}")
+        _compress(raw_path, gz_partial)
+        os.replace(gz_partial, final_path)
+    except Exception:
+        last_backup["failures"] += 1
+        raise
+    finally:
+        for leftover in (raw_path, gz_partial):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    last_backup.update(
+        finished_at=time.time(),
+        duration=time.perf_counter() - started,
+        size=os.path.getsize(final_path),
+    )
+    print(f"Backup written to {final_path} in {last_backup['duration']:.1f}s")
+    if keep:
+        prune(backup_dir, keep)
+    return final_path
+
+
+def prune(backup_dir=None, keep=KEEP):
+    """Delete all but the newest `keep` backups. Returns the deleted paths."""
+    removed = []
+    for path in list_backups(backup_dir)[keep:]:
+        os.remove(path)
+        removed.append(path)
+    return removed
+
+
+# ==========================================
+#  SCHEDULE
+# ==========================================
+
+def _acquire_lock(backup_dir):
+    """Lock file so that only one worker process backs up at a time."""
+    lock_path = os.path.join(backup_dir, ".lock")
+    try:
+        if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+            os.remove(lock_path)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return None
+    return lock_path
+
+
+def _due(backup_dir):
+    backups = list_backups(backup_dir)
+    return not backups or time.time() - os.path.getmtime(backups[0]) >= INTERVAL_SECONDS
+
+
+def run_scheduled():
+    """Entry point for the background PeriodicTask: back up each database whose newest snapshot is too old."""
+    due = [(db_path, folder) for db_path, folder in targets() if _due(folder)]
+    if not due:
+        return
+    lock_path = _acquire_lock(get_backup_dir())
+    if lock_path is None:
+        return
+    try:
+        for db_path, folder in due:
+            create_backup(db_path, folder)
+    finally:
+        os.remove(lock_path)
+
+
+# ==========================================
+#  VERIFY / RESTORE
+# ==========================================
+
+def verify_backup(backup_path):
+    """Decompress to a temporary file and integrity-check it. Returns None if good."""
+    tmp_path = backup_path + ".verify"
+    try:
+        _decompress(backup_path, tmp_path)
+        return check_integrity(tmp_path)
+    except (OSError, EOFError, zlib.error, sqlite3.DatabaseError) as e:
+        return str(e)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def restore_backup(backup_path, db_path=None, backup_dir=None):
+    """
+    Replace the live database with the contents of `backup_path`. The current
+    database is saved as a pre-restore backup first. The copy goes through
+    the backup API into the live file, so WAL and journal files stay
+    consistent.
+    """
+    from database import get_db_path
+
+    db_path = db_path or get_db_path()
+    tmp_path = db_path + ".restore"
+    try:
+        _decompress(backup_path, tmp_path)
+        problems = check_integrity(tmp_path)
+        if problems:
+            raise RuntimeError(f"Refusing to restore, backup failed integrity check: {problems}")
+        if os.path.exists(db_path):
+            create_backup(db_path, backup_dir, label="pre-restore", keep=0)
+        source = sqlite3.connect(tmp_path)
+        dest = sqlite3.connect(db_path, timeout=30)
+        try:
+            source.backup(dest)
+        finally:
+            dest.close()
+            source.close()
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    print(f"Restored {db_path} from {backup_path}")
+
+
+def render_metrics():
+    """Prometheus lines for metrics.registry.collectors."""
+    lines = [
+        "# HELP backup_failures_total Backups that failed in this process.",
+        "# TYPE backup_failures_total counter",
+        f"backup_failures_total {last_backup['failures']}",
+    ]
+    if last_backup["finished_at"] is not None:
+        lines += [
+            "# HELP backup_last_success_timestamp_seconds When the last backup finished.",
+            "# TYPE backup_last_success_timestamp_seconds gauge",
+            f"backup_last_success_timestamp_seconds {last_backup['finished_at']:.0f}",
+            "# HELP backup_last_duration_seconds How long the last backup took.",
+            "# TYPE backup_last_duration_seconds gauge",
+            f"backup_last_duration_seconds {last_backup['duration']:.3f}",
+            "# HELP backup_last_size_bytes Compressed size of the last backup.",
+            "# TYPE backup_last_size_bytes gauge",
+            f"backup_last_size_bytes {last_backup['size']}",
+        ]
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Back up or restore the inventory database.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("create", help="take a backup now")
+    sub.add_parser("list", help="list backups, newest first")
+    verify = sub.add_parser("verify", help="integrity-check a backup file")
+    verify.add_argument("file")
+    restore = sub.add_parser("restore", help="replace the database with a backup (stop the server first)")
+    restore.add_argument("file")
+    restore.add_argument("--department", help="restore this department's database instead of the core one")
+    restore.add_argument("--yes", action="store_true", help="do not ask for confirmation")
+    args = parser.parse_args(argv)
+
+    if args.command == "create":
+        for db_path, folder in targets():
+            create_backup(db_path, folder)
+    elif args.command == "list":
+        for _, folder in targets():
+            for path in list_backups(folder):
+                print(f"{os.path.getsize(path):>14,}  {path}")
+    elif args.command == "verify":
+        problems = verify_backup(args.file)
+        print("OK" if problems is None else f"FAILED: {problems}")
+        return 0 if problems is None else 1
+    elif args.command == "restore":
+        if not args.yes and input(f"Replace the database with {args.file}? [y/N] ").lower() != "y":
+            print("Cancelled")
+            return 1
+        db_path = backup_dir = None
+        if args.department:
+            import tenancy
+            if args.department not in tenancy.TENANTS:
+                print(f"'{args.department}' is not listed in INVENTORY_TENANTS")
+                return 1
+            db_path = tenancy.get_db_path(args.department)
+            backup_dir = os.path.join(get_backup_dir(), "departments", args.department)
+            os.makedirs(backup_dir, exist_ok=True)
+        restore_backup(args.file, db_path, backup_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Alert evaluation cost versus table size.
+
+For each size, seeds that many equipment rows and open issue records, then
+times the one-off startup load, a write that touches one row (commit hooks
+included), and an overdue tick. Only the load should grow with the table.
+
+    python benchmarks/bench_alerts.py --sizes 1000 100000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(path, size):
+    conn = sqlite3.connect(path)
+    future = (date.today() + timedelta(days=30)).isoformat()
+    conn.executemany(
+        "INSERT INTO equipment (name, code, total_qty, available_qty, status, reorder_threshold) VALUES (?, ?, 10, 10, 'available', 5)",
+        ((f"Item {i}", f"EQ-{i:07d}") for i in range(size)),
+    )
+    conn.executemany(
+        "INSERT INTO issue_records (equipment_id, issued_to, issued_lab, quantity, issue_date, return_date, status) VALUES (?, 'Bench', 'Lab', 1, '2024-01-01', ?, 'issued')",
+        ((i % size + 1, future) for i in range(size)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def run(size, writes):
+    import alerts
+    import database
+    import models
+    import tenancy  # noqa: F401  (imported up front so the load timing is the load alone)
+
+    models.Base.metadata.create_all(bind=database.get_engine())
+    seed(database.get_db_path(), size)
+
+    started = time.perf_counter()
+    state = alerts.get_state(None)
+    load = time.perf_counter() - started
+
+    db = database.SessionLocal()
+    item = db.get(models.Equipment, 1)
+    latencies = []
+    for n in range(writes):
+        started = time.perf_counter()
+        item.available_qty = 3 if n % 2 == 0 else 8  # raise, then clear
+        db.commit()
+        latencies.append(time.perf_counter() - started)
+    db.close()
+
+    started = time.perf_counter()
+    state.tick()
+    tick = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"rows={size:>8,}  load={load * 1000:8.1f}ms  "
+          f"write+evaluate p50={latencies[len(latencies) // 2] * 1000:6.2f}ms  "
+          f"tick={tick * 1000:6.3f}ms  active={len(state.active)}")
+
+
+def run_in(data_dir, size, writes):
+    os.environ["INVENTORY_DATA_DIR"] = data_dir
+    run(size, writes)
+
+
+def main():
+    import multiprocessing
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--writes", type=int, default=200)
+    args = parser.parse_args()
+    for size in args.sizes:
+        # Alert state is per process, so each size runs in a fresh one.
+        with tempfile.TemporaryDirectory() as data_dir:
+            proc = multiprocessing.Process(target=run_in, args=(data_dir, size, args.writes))
+            proc.start()
+            proc.join()
+
+
+if __name__ == "__main__":
+    main()
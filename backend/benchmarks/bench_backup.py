@@ -0,0 +1,89 @@
+"""
+Write latency while an online backup runs.
+
+Builds a database of roughly --size-mb, then measures single-row commit
+latency from a client thread with no backup running, and again while
+backup.create_backup() copies the file.
+
+    python benchmarks/bench_backup.py --size-mb 1024
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_database(path, size_mb):
+    import sqlite3
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE filler (id INTEGER PRIMARY KEY, payload BLOB)")
+    conn.execute("CREATE TABLE writes (id INTEGER PRIMARY KEY, at REAL)")
+    rows = size_mb * 1024
+    for start in range(0, rows, 10_000):
+        # Random payloads don't compress, so this is gzip's worst case.
+        conn.executemany(
+            "INSERT INTO filler (payload) VALUES (?)",
+            ((os.urandom(1024),) for _ in range(min(10_000, rows - start))),
+        )
+        conn.commit()
+    conn.close()
+
+
+def measure_writes(path, stop):
+    import sqlite3
+
+    conn = sqlite3.connect(path, timeout=30)
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        conn.execute("INSERT INTO writes (at) VALUES (?)", (time.time(),))
+        conn.commit()
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.005)
+    conn.close()
+    return latencies
+
+
+def summarize(label, latencies):
+    latencies = sorted(latencies)
+    pick = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000
+    print(f"{label:<16} writes={len(latencies):>6}  p50={pick(0.5):6.2f}ms  p99={pick(0.99):6.2f}ms  max={latencies[-1] * 1000:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--baseline-seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    import backup
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "inventory.db")
+        print(f"Building {args.size_mb} MB database...")
+        build_database(db_path, args.size_mb)
+
+        for label in ("no backup", "during backup"):
+            stop = threading.Event()
+            result = {}
+            client = threading.Thread(target=lambda: result.update(l=measure_writes(db_path, stop)))
+            client.start()
+            if label == "no backup":
+                time.sleep(args.baseline_seconds)
+            else:
+                started = time.perf_counter()
+                path = backup.create_backup(db_path=db_path, backup_dir=tmp, keep=0)
+                print(f"backup: {time.perf_counter() - started:.1f}s, {os.path.getsize(path) / 2**20:.0f} MB compressed")
+            stop.set()
+            client.join()
+            summarize(label, result["l"])
+
+
+if __name__ == "__main__":
+    main()
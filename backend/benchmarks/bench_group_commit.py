@@ -0,0 +1,84 @@
+"""
+Write throughput with and without the group-commit writer.
+
+N client threads each create equipment rows one at a time, the way scanner
+stations do, against a fresh SQLite file.
+
+    python benchmarks/bench_group_commit.py --threads 16 --writes 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run(threads, writes, use_group_commit, window_ms):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    import crud
+    import models
+    import schemas
+    from group_commit import GroupCommitWriter
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False})
+        models.Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        writer = GroupCommitWriter(Session, window_ms=window_ms) if use_group_commit else None
+        if writer:
+            writer.start()
+
+        counter = iter(range(writes))
+        lock = threading.Lock()
+
+        def client():
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                item = schemas.EquipmentCreate(
+                    name="Scanned", code=f"SCAN-{i}", total_qty=1, available_qty=1, status="available"
+                )
+                if writer:
+                    writer.submit(lambda s: crud.create_equipment(s, item, commit=False)).result()
+                else:
+                    db = Session()
+                    try:
+                        crud.create_equipment(db, item)
+                    finally:
+                        db.close()
+
+        started = time.perf_counter()
+        workers = [threading.Thread(target=client) for _ in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - started
+        batches = writer.batches if writer else writes
+        if writer:
+            writer.stop()
+        engine.dispose()
+    return writes / elapsed, batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    for label, grouped in (("per-request commit", False), ("group commit", True)):
+        rate, commits = run(args.threads, args.writes, grouped, args.window_ms)
+        print(f"{label:>20}: {rate:8.1f} writes/s  ({commits} commits)")
+
+
+if __name__ == "__main__":
+    main()
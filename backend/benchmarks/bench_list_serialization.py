@@ -0,0 +1,75 @@
+"""
+Before/after benchmark for the list endpoint serialization fast path.
+
+"orm" reproduces what FastAPI did for response_model=List[schemas.X]: load
+ORM instances, validate each through the schema (from_attributes), run
+jsonable_encoder and json.dumps. "fast" is what the endpoints do now:
+Core row tuples -> dicts -> FastJSONResponse encoding.
+
+    python benchmarks/bench_list_serialization.py --scale 100k
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import seed  # noqa: E402
+
+
+def orm_path(db, model, schema, adapter, jsonable_encoder):
+    items = db.query(model).all()
+    validated = adapter.validate_python(items, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default="100k")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    import crud
+    import models
+    import schemas
+    from responses import dumps
+
+    path = seed.ensure_seeded(seed.parse_scale(args.scale))
+    Session = sessionmaker(bind=create_engine(f"sqlite:///{path}"))
+
+    cases = [
+        ("equipment", models.Equipment, schemas.Equipment, crud.get_all_equipment_rows),
+        ("issues", models.IssueRecord, schemas.IssueRecord, crud.get_issue_record_rows),
+        ("maintenance", models.Maintenance, schemas.Maintenance, crud.get_maintenance_rows),
+    ]
+    print(f"{'list':>12} {'orm ms':>10} {'fast ms':>10} {'speed-up':>9} {'bytes':>12}")
+    for name, model, schema, fast in cases:
+        adapter = TypeAdapter(List[schema])
+        with Session() as db:
+            before, size = timed(lambda: orm_path(db, model, schema, adapter, jsonable_encoder), args.repeat)
+        with Session() as db:
+            after, _ = timed(lambda: dumps(fast(db)), args.repeat)
+        print(f"{name:>12} {before * 1000:10.1f} {after * 1000:10.1f} {before / after:8.1f}x {size:12,d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Microbenchmark for MetricsMiddleware overhead.
+
+Drives a trivial ASGI app directly (no server, no HTTP parsing), with and
+without the middleware, and reports the added cost per request.
+
+    python benchmarks/bench_metrics_overhead.py --requests 200000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import MetricsMiddleware, MetricsRegistry  # noqa: E402
+
+
+class FakeRoute:
+    path = "/equipments/{equipment_id}"
+
+    @staticmethod
+    def endpoint():
+        pass
+
+
+class FakeApp:
+    routes = [FakeRoute()]
+
+
+async def inner_app(scope, receive, send):
+    scope["endpoint"] = FakeRoute.endpoint
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b'{"ok":true}'})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def drive(app, n):
+    fake_app = FakeApp()
+    started = time.perf_counter()
+    for _ in range(n):
+        scope = {"type": "http", "method": "GET", "path": "/equipments/1", "app": fake_app}
+        await app(scope, receive, send)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200000)
+    args = parser.parse_args()
+
+    wrapped = MetricsMiddleware(inner_app, registry=MetricsRegistry())
+    baseline = asyncio.run(drive(inner_app, args.requests))
+    measured = asyncio.run(drive(wrapped, args.requests))
+
+    per_request_us = (measured - baseline) / args.requests * 1e6
+    print(f"baseline : {baseline / args.requests * 1e6:7.2f} us/request")
+    print(f"metrics  : {measured / args.requests * 1e6:7.2f} us/request")
+    print(f"overhead : {per_request_us:7.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Stock reconciliation (reconcile.py) against a large issue history.
+
+Seeds `--equipment` items and `--issues` issue records (a third of them
+still out) with every available_qty wrong, then times a dry run, the real
+run, and a second run that finds nothing to change.
+
+    python benchmarks/bench_reconcile.py --equipment 100000 --issues 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STATUSES = ["returned", "returned", "issued", "Returned", "Issued"]
+
+
+def seed(path, equipment, issues):
+    rng = random.Random(42)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executemany(
+        "INSERT INTO equipment (id, name, code, total_qty, available_qty, status) VALUES (?, ?, ?, 1000, 1000, 'available')",
+        ((i, f"Item {i}", f"EQ-{i:07d}") for i in range(1, equipment + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO issue_records (equipment_id, issued_to, issued_lab, quantity, issue_date, status) VALUES (?, 'Bench', 'Lab', ?, '2024-01-01', ?)",
+        ((rng.randint(1, equipment), rng.randint(1, 3), rng.choice(STATUSES)) for _ in range(issues)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--equipment", type=int, default=100_000)
+    parser.add_argument("--issues", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ["INVENTORY_DATA_DIR"] = data_dir
+        import database
+        import migrations
+        import models
+        import reconcile
+
+        engine = database.get_engine()
+        models.Base.metadata.create_all(bind=engine)
+        migrations.upgrade(engine)
+        started = time.perf_counter()
+        seed(database.get_db_path(), args.equipment, args.issues)
+        print(f"seeded {args.equipment:,} items / {args.issues:,} issue records in {time.perf_counter() - started:.1f}s")
+
+        for label, dry_run in (("dry run", True), ("reconcile", False), ("again", False)):
+            started = time.perf_counter()
+            result = reconcile.reconcile_database(engine, dry_run=dry_run, actor="bench")
+            print(f"{label:<10} changed={result['changed']:>8,}  {time.perf_counter() - started:6.2f}s")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Memory and read cost of the in-memory equipment snapshot (code_index.py).
+
+For each scale, loads the snapshot from a seeded database and reports:
+
+  memory   traced allocations of the loaded rows and their two dicts, and
+           of one cached full-list body
+  reads    GET /equipments work from SQLite (Core rows + encode) versus a
+           cached body, and the first read after one row is updated in
+           SQLite (catch up from equipment_changes + re-encode), for the full
+           row and for a ?fields=id,name,code projection
+
+    python benchmarks/bench_snapshot.py --scales 10k 100k
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import seed  # noqa: E402
+
+NARROW = ("id", "name", "code")
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def run(scale, repeat):
+    import code_index
+    import crud
+    import database
+    import migrations
+    import models
+    import tenancy  # noqa: F401  (imported up front so it is not traced as snapshot memory)
+    from responses import dumps
+
+    models.Base.metadata.create_all(bind=database.get_engine())
+    migrations.upgrade(database.get_engine())
+    with database.get_engine().connect() as conn:
+        count = conn.exec_driver_sql("SELECT count(*) FROM equipment").scalar()
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    index = code_index.get_index(None)
+    rows_mb = (tracemalloc.get_traced_memory()[0] - base) / 2**20
+    index.list_body()
+    body_mb = (tracemalloc.get_traced_memory()[0] - base) / 2**20 - rows_mb
+    tracemalloc.stop()
+    per_100k = 100_000 / count
+
+    reloads = code_index.stats["reloads"]
+    print(f"rows={count:>9,}  snapshot {rows_mb:7.1f} MB  + cached body {body_mb:6.1f} MB   "
+          f"(per 100k rows: {rows_mb * per_100k:.1f} + {body_mb * per_100k:.1f} MB)")
+
+    def from_sqlite(columns):
+        db = database.SessionLocal()
+        try:
+            return dumps(crud.get_all_equipment_rows(db, columns))
+        finally:
+            db.close()
+
+    def after_write(columns):
+        def rebuild():
+            # Untimed work is included, but one UPDATE is noise next to the re-encode.
+            with database.get_engine().begin() as conn:
+                conn.exec_driver_sql("UPDATE equipment SET available_qty = available_qty + 1 WHERE id = 1")
+            code_index.list_body(columns)
+        return rebuild
+
+    for label, columns in (("full", code_index.COLUMNS), ("narrow", NARROW)):
+        index.list_body(columns)
+        sqlite_ms = timed(lambda: from_sqlite(columns), repeat)
+        cached_ms = timed(lambda: code_index.list_body(columns), repeat)
+        rebuild_ms = timed(after_write(columns), repeat)
+        print(f"  {label:<6}  sqlite {sqlite_ms:8.2f} ms   cached {cached_ms:8.4f} ms   "
+              f"after one write {rebuild_ms:8.2f} ms")
+    print(f"  full reloads during the writes: {code_index.stats['reloads'] - reloads}")
+
+
+def run_in(data_dir, scale, repeat):
+    os.environ["INVENTORY_DATA_DIR"] = data_dir
+    run(scale, repeat)
+
+
+def main():
+    import multiprocessing
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", nargs="+", default=["10k", "100k"])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    for scale in args.scales:
+        # The snapshot is per process, so each scale runs in a fresh one.
+        with tempfile.TemporaryDirectory() as data_dir:
+            seed.seeded_copy(seed.parse_scale(scale), data_dir)
+            proc = multiprocessing.Process(target=run_in, args=(data_dir, scale, args.repeat))
+            proc.start()
+            proc.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Cold-start benchmark for the backend.
+
+Each sample runs in a fresh interpreter and reports three timings:
+  import   - `import main`
+  app      - building the app object (main.app)
+  startup  - running the lifespan (engine, tables, admin check)
+
+    python benchmarks/bench_startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import asyncio, json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+app = main.app
+t2 = time.perf_counter()
+
+async def startup():
+    async with app.router.lifespan_context(app):
+        pass
+
+asyncio.run(startup())
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "app": t2 - t1, "startup": t3 - t2}))
+"""
+
+
+def sample(data_dir):
+    env = dict(os.environ, INVENTORY_DATA_DIR=data_dir)
+    env.pop("INVENTORY_DB_READY", None)
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    samples = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        sample(data_dir)  # first run creates the database; not a steady-state sample
+        for _ in range(args.runs):
+            samples.append(sample(data_dir))
+
+    for phase in ("import", "app", "startup"):
+        values = [s[phase] * 1000 for s in samples]
+        print(f"{phase:>8}: median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
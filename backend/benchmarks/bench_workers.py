@@ -0,0 +1,112 @@
+"""
+Throughput benchmark for run_server.py across worker counts.
+
+Starts the server in production mode for each worker count against a
+throw-away data directory, hammers GET /equipments from a pool of client
+threads using keep-alive connections and prints requests/second with p50/p99
+latency.
+
+    python benchmarks/bench_workers.py --workers 1 2 4 --duration 10
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def client_loop(port, path, stop_at, latencies, errors):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    while time.perf_counter() < stop_at:
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                errors.append(resp.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+
+
+def run_once(workers, port, clients, duration, path, data_dir):
+    env = dict(os.environ, INVENTORY_DATA_DIR=data_dir, PYTHONUNBUFFERED="1")
+    env.pop("INVENTORY_DB_READY", None)
+    server = subprocess.Popen(
+        [sys.executable, "run_server.py", "--mode", "production",
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_for_port(port):
+            raise RuntimeError(f"server with {workers} workers did not start")
+        time.sleep(1.0)  # let every worker finish importing the app
+
+        latencies, errors = [], []
+        stop_at = time.perf_counter() + duration
+        threads = [
+            threading.Thread(target=client_loop, args=(port, path, stop_at, latencies, errors))
+            for _ in range(clients)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies.sort()
+    count = len(latencies)
+    return {
+        "workers": workers,
+        "requests": count,
+        "errors": len(errors),
+        "rps": count / duration,
+        "p50_ms": statistics.median(latencies) * 1000 if count else 0.0,
+        "p99_ms": latencies[int(count * 0.99) - 1] * 1000 if count >= 100 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/equipments")
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as data_dir:
+            r = run_once(workers, args.port, args.clients, args.duration, args.path, data_dir)
+        print(f"{r['workers']:>8} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.1f} "
+              f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
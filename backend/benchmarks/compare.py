@@ -0,0 +1,53 @@
+"""
+Compare two benchmark result files written by harness.py.
+
+    python benchmarks/compare.py results/100k-abc123.json results/100k-def456.json --threshold 10
+
+Exits with status 1 when any scenario's p50 or p99 got slower, or its
+throughput dropped, by more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+
+
+def pct_change(old, new):
+    if old == 0:
+        return 0.0
+    return (new - old) / old * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        old = json.load(f)
+    with open(args.candidate) as f:
+        new = json.load(f)
+
+    print(f"baseline  {old['revision']} (scale {old['scale']})")
+    print(f"candidate {new['revision']} (scale {new['scale']})")
+    print(f"{'scenario':>18} {'p50 ms':>18} {'p99 ms':>18} {'req/s':>18}")
+
+    regressions = []
+    for name in sorted(set(old["results"]) & set(new["results"])):
+        a, b = old["results"][name], new["results"][name]
+        p50 = pct_change(a["p50_ms"], b["p50_ms"])
+        p99 = pct_change(a["p99_ms"], b["p99_ms"])
+        rps = pct_change(a["throughput_rps"], b["throughput_rps"])
+        print(f"{name:>18} {b['p50_ms']:9.2f} ({p50:+6.1f}%) {b['p99_ms']:9.2f} ({p99:+6.1f}%) "
+              f"{b['throughput_rps']:9.1f} ({rps:+6.1f}%)")
+        if p50 > args.threshold or p99 > args.threshold or -rps > args.threshold:
+            regressions.append(name)
+
+    if regressions:
+        print(f"regressed beyond {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
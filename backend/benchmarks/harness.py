@@ -0,0 +1,278 @@
+"""
+Reproducible API benchmark suite.
+
+Seeds a throw-away SQLite database at the requested scale (see seed.py),
+starts the real FastAPI app in-process and drives it through httpx's ASGI
+transport, so the numbers cover routing, validation, the ORM and
+serialization without any network or server noise.
+
+For each scenario it records p50/p99/mean latency and throughput, and writes
+a JSON file per scale to benchmarks/results/ named after the current commit.
+Use compare.py to diff two result files.
+
+    python benchmarks/harness.py --scale 1k 100k
+    python benchmarks/harness.py --scale 1m --scenario list_equipment export_csv
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+ADMIN_USER = "admin"
+ADMIN_PASSWORD = "Admin@123"
+
+# Scenarios that move the whole table run fewer iterations.
+HEAVY = {"list_equipment", "list_equipment_narrow", "list_issues", "list_maintenance", "export_csv", "bulk_upload"}
+
+
+class Context:
+    def __init__(self, scale, headers):
+        self.scale = scale
+        self.headers = headers
+        self.counter = 0
+
+    def next_code(self, prefix):
+        self.counter += 1
+        return f"{prefix}-{os.getpid()}-{self.counter}"
+
+
+def _equipment_payload(ctx):
+    return {
+        "name": "Bench item", "code": ctx.next_code("BENCH"), "category": "Tool",
+        "lab": "Main Lab", "total_qty": 10, "available_qty": 10, "status": "available",
+    }
+
+
+async def list_equipment(client, ctx):
+    return await client.get("/equipments")
+
+
+async def list_equipment_narrow(client, ctx):
+    return await client.get("/equipments?fields=id,name,code,available_qty")
+
+
+async def list_issues(client, ctx):
+    return await client.get("/issues", headers=ctx.headers)
+
+
+async def list_maintenance(client, ctx):
+    return await client.get("/maintenance")
+
+
+async def dashboard_bootstrap(client, ctx):
+    return await client.get("/dashboard/bootstrap", headers=ctx.headers)
+
+
+async def create_equipment(client, ctx):
+    return await client.post("/equipments", json=_equipment_payload(ctx), headers=ctx.headers)
+
+
+async def update_equipment(client, ctx):
+    ctx.counter += 1
+    equipment_id = (ctx.counter * 7919) % ctx.scale + 1
+    payload = _equipment_payload(ctx)
+    payload["code"] = f"EQ-{equipment_id:07d}"
+    return await client.put(f"/equipments/{equipment_id}", json=payload, headers=ctx.headers)
+
+
+async def lookup_code(client, ctx):
+    ctx.counter += 1
+    return await client.get(f"/equipments/by-code/EQ-{(ctx.counter * 7919) % ctx.scale + 1:07d}")
+
+
+async def lookup_codes_batch(client, ctx, size=50):
+    ctx.counter += 1
+    codes = [f"EQ-{(ctx.counter * 7919 + i) % ctx.scale + 1:07d}" for i in range(size)]
+    return await client.post("/equipments/by-code", json={"codes": codes})
+
+
+async def borrowers_outstanding(client, ctx):
+    return await client.get("/borrowers?outstanding=true&limit=50", headers=ctx.headers)
+
+
+async def borrower_clearance(client, ctx):
+    # seed.py spreads issue records over scale / 10 students.
+    ctx.counter += 1
+    borrower_id = (ctx.counter * 7919) % max(ctx.scale // 10, 10) + 1
+    return await client.get(f"/borrowers/{borrower_id}", headers=ctx.headers)
+
+
+async def login(client, ctx):
+    return await client.post("/auth/login", json={"username": ADMIN_USER, "password": ADMIN_PASSWORD})
+
+
+async def export_csv(client, ctx):
+    return await client.get("/equipment/export-csv", headers=ctx.headers)
+
+
+async def bulk_upload(client, ctx, rows=1000):
+    buf = io.StringIO()
+    buf.write("name,code,category,lab,total_qty,status\n")
+    for _ in range(rows):
+        buf.write(f"Bulk item,{ctx.next_code('BULK')},Tool,Main Lab,5,available\n")
+    files = {"file": ("bench.csv", buf.getvalue().encode(), "text/csv")}
+    return await client.post("/equipment/bulk-upload", files=files, headers=ctx.headers)
+
+
+SCENARIOS = {
+    "list_equipment": list_equipment,
+    "list_equipment_narrow": list_equipment_narrow,
+    "list_issues": list_issues,
+    "list_maintenance": list_maintenance,
+    "dashboard_bootstrap": dashboard_bootstrap,
+    "create_equipment": create_equipment,
+    "update_equipment": update_equipment,
+    "lookup_code": lookup_code,
+    "lookup_codes_batch": lookup_codes_batch,
+    "borrowers_outstanding": borrowers_outstanding,
+    "borrower_clearance": borrower_clearance,
+    "login": login,
+    "export_csv": export_csv,
+    "bulk_upload": bulk_upload,
+}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(client, ctx, fn, requests, concurrency, max_seconds):
+    latencies = []
+    errors = 0
+    remaining = requests
+    deadline = time.perf_counter() + max_seconds
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0 and time.perf_counter() < deadline:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await fn(client, ctx)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    await fn(client, ctx)  # warm-up, not measured
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "throughput_rps": len(latencies) / wall if wall > 0 else 0.0,
+    }
+
+
+async def run_suite(scale, scenarios, requests, concurrency, max_seconds):
+    import httpx
+    import main
+
+    app = main.app
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            token = (await client.post(
+                "/auth/login", json={"username": ADMIN_USER, "password": ADMIN_PASSWORD}
+            )).json()["access_token"]
+            ctx = Context(scale, {"Authorization": f"Bearer {token}"})
+            for name in scenarios:
+                n = max(3, requests // 10) if name in HEAVY else requests
+                results[name] = await run_scenario(
+                    client, ctx, SCENARIOS[name], n, concurrency, max_seconds
+                )
+                r = results[name]
+                print(f"{name:>18}: p50 {r['p50_ms']:9.2f} ms  p99 {r['p99_ms']:9.2f} ms  "
+                      f"{r['throughput_rps']:9.1f} req/s  ({r['requests']} req, {r['errors']} errors)",
+                      file=sys.stderr)
+    return results
+
+
+def git_revision():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_single_scale(args):
+    """Runs in its own process: main.py binds to one database per process."""
+    sys.path.insert(0, BACKEND_DIR)
+    sys.path.insert(0, BENCH_DIR)
+    import seed
+
+    scale = seed.parse_scale(args.scale[0])
+    with tempfile.TemporaryDirectory() as data_dir:
+        seed.seeded_copy(scale, data_dir)
+        os.environ["INVENTORY_DATA_DIR"] = data_dir
+        os.environ.pop("INVENTORY_DB_READY", None)
+        results = asyncio.run(run_suite(
+            scale, args.scenario, args.requests, args.concurrency, args.max_seconds
+        ))
+
+    revision = git_revision()
+    report = {
+        "revision": revision,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = args.output or os.path.join(RESULTS_DIR, f"{args.scale[0]}-{revision}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", nargs="+", default=["1k"], help="1k, 10k, 100k, 1m or a row count")
+    parser.add_argument("--scenario", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="iterations for light scenarios")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-seconds", type=float, default=60.0, help="time cap per scenario")
+    parser.add_argument("--output", help="result file (single scale only)")
+    args = parser.parse_args()
+
+    if len(args.scale) == 1:
+        run_single_scale(args)
+        return
+
+    for scale in args.scale:
+        cmd = [sys.executable, os.path.abspath(__file__), "--scale", scale,
+               "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+               "--max-seconds", str(args.max_seconds), "--scenario", *args.scenario]
+        subprocess.run(cmd, check=True)
+
+
+if __name__ == "__main__":
+    main()
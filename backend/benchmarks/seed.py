@@ -0,0 +1,145 @@
+"""
+Synthetic data for the benchmark suite.
+
+Builds a SQLite database with `scale` equipment rows, the same number of
+issue records and a quarter as many maintenance records. Seeded files are
+cached under benchmarks/.cache so repeated runs only pay for a copy.
+
+    python benchmarks/seed.py --scale 100k
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+CACHE_DIR = os.path.join(BACKEND_DIR, "benchmarks", ".cache")
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+CATEGORIES = ["Resistor", "Capacitor", "IC", "Tool", "Sensor", "Microcontroller", "Cable"]
+LABS = ["Main Lab", "Electronics Lab", "Embedded Lab", "Power Lab", "Comms Lab"]
+EQUIPMENT_STATUSES = ["available", "available", "available", "issued", "faulty"]
+BATCH = 10_000
+
+
+def parse_scale(value):
+    value = value.lower()
+    if value in SCALES:
+        return SCALES[value]
+    return int(value)
+
+
+def _equipment_rows(count, rng):
+    for i in range(1, count + 1):
+        total = rng.randint(1, 200)
+        yield {
+            "id": i,
+            "name": f"{rng.choice(CATEGORIES)} {i}",
+            "code": f"EQ-{i:07d}",
+            "category": rng.choice(CATEGORIES),
+            "lab": rng.choice(LABS),
+            "total_qty": total,
+            "available_qty": rng.randint(0, total),
+            "status": rng.choice(EQUIPMENT_STATUSES),
+        }
+
+
+def _issue_rows(count, equipment_count, rng):
+    for i in range(1, count + 1):
+        returned = rng.random() < 0.7
+        yield {
+            "id": i,
+            "equipment_id": rng.randint(1, equipment_count),
+            "issued_to": f"Student {rng.randint(1, max(equipment_count // 10, 10))}",
+            "issued_lab": rng.choice(LABS),
+            "quantity": rng.randint(1, 5),
+            "issue_date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "return_date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "status": "returned" if returned else "issued",
+        }
+
+
+def _maintenance_rows(count, equipment_count, rng):
+    for i in range(1, count + 1):
+        completed = rng.random() < 0.6
+        yield {
+            "id": i,
+            "equipment_id": rng.randint(1, equipment_count),
+            "fault_description": "Synthetic fault",
+            "fault_date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "sent_for_repair_date": None,
+            "return_from_repair_date": "2024-12-31" if completed else None,
+            "status": "completed" if completed else "pending",
+            "remarks": None,
+            "cost": round(rng.uniform(0, 500), 2),
+        }
+
+
+def _insert(conn, table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            conn.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        conn.execute(table.insert(), batch)
+
+
+def seed_database(path, scale, seed=42):
+    """Create a fresh database at `path` holding `scale` rows per main table."""
+    from sqlalchemy import create_engine
+    import models
+
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        _insert(conn, models.Equipment.__table__, _equipment_rows(scale, rng))
+        _insert(conn, models.IssueRecord.__table__, _issue_rows(scale, scale, rng))
+        _insert(conn, models.Maintenance.__table__, _maintenance_rows(max(scale // 4, 1), scale, rng))
+    engine.dispose()
+
+
+def ensure_seeded(scale):
+    """Path of the cached database for `scale`, seeding it on first use."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cached = os.path.join(CACHE_DIR, f"seed-{scale}.db")
+    if not os.path.exists(cached):
+        started = time.perf_counter()
+        seed_database(cached + ".tmp", scale)
+        os.replace(cached + ".tmp", cached)
+        print(f"seeded {scale} rows in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return cached
+
+
+def seeded_copy(scale, dest_dir):
+    """Copy the cached seeded database into dest_dir as inventory.db."""
+    dest = os.path.join(dest_dir, "inventory.db")
+    shutil.copyfile(ensure_seeded(scale), dest)
+    return dest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default="1k")
+    parser.add_argument("--output", help="write the database here instead of the cache")
+    args = parser.parse_args()
+
+    scale = parse_scale(args.scale)
+    if args.output:
+        seed_database(args.output, scale)
+    else:
+        print(ensure_seeded(scale))
+
+
+if __name__ == "__main__":
+    main()
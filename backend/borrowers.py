@@ -0,0 +1,147 @@
+# backend/borrowers.py
+"""
+Borrower ledger: who holds what.
+
+IssueRecord.issued_to is free text. Every distinct name, compared as
+lower(trim(name)), gets one row in `borrowers`, and issue records point to it
+through the indexed issue_records.borrower_id. "What does this student hold?"
+is then an index range scan instead of a download of every issue record.
+
+`borrower_outstanding` is a materialized summary with one row per borrower
+who still holds something: open records, total quantity and the earliest due
+date. An issue record is open while its status is "issued" in any case, as in
+the dashboard counts and alerts.
+
+Both are kept current by session hooks, inside the transaction that changes
+the issue records, so they commit or roll back with it:
+
+  before_flush  links new records, and records whose issued_to changed, to
+                their borrower (created on first use)
+  after_flush   recomputes the summary rows of every borrower those records
+                belonged to before or after the flush
+
+Rows written without a session (bulk SQL, tenancy.py move-lab) are linked by
+backfill(), which migrations.upgrade() runs at startup for every database.
+Archived records keep their borrower_id but are never open, so the summary
+only reads issue_records.
+"""
+from datetime import datetime
+
+from sqlalchemy import delete, event, func, inspect, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+import models
+
+REFRESH_BATCH = 500
+
+
+def _key(name):
+    """SQL expression for the matching key of a name (SQL, so every path agrees)."""
+    return func.lower(func.trim(name))
+
+
+def _summary_select():
+    issues = models.IssueRecord.__table__
+    return (
+        select(
+            issues.c.borrower_id,
+            func.count(),
+            func.coalesce(func.sum(issues.c.quantity), 0),
+            func.min(issues.c.return_date),
+        )
+        .where(issues.c.borrower_id.is_not(None))
+        .where(func.lower(issues.c.status) == "issued")
+        .group_by(issues.c.borrower_id)
+    )
+
+
+_SUMMARY_COLUMNS = ["borrower_id", "items", "quantity", "oldest_due"]
+
+
+def refresh(conn, borrower_ids):
+    """Recompute the summary rows of `borrower_ids` on `conn`."""
+    summary = models.BorrowerOutstanding.__table__
+    issues = models.IssueRecord.__table__
+    ids = sorted(borrower_ids)
+    for start in range(0, len(ids), REFRESH_BATCH):
+        batch = ids[start:start + REFRESH_BATCH]
+        conn.execute(delete(summary).where(summary.c.borrower_id.in_(batch)))
+        conn.execute(insert(summary).from_select(
+            _SUMMARY_COLUMNS, _summary_select().where(issues.c.borrower_id.in_(batch))
+        ))
+
+
+def rebuild(conn):
+    """Recompute the whole summary on `conn`."""
+    summary = models.BorrowerOutstanding.__table__
+    conn.execute(delete(summary))
+    conn.execute(insert(summary).from_select(_SUMMARY_COLUMNS, _summary_select()))
+
+
+def backfill(engine):
+    """
+    Link issue records without a borrower_id, creating their borrowers, then
+    rebuild the summary. Set-based; a no-op when every record is linked.
+    Returns the number of records linked.
+    """
+    borrowers = models.Borrower.__table__
+    issues = models.IssueRecord.__table__
+    with engine.begin() as conn:
+        if conn.execute(select(issues.c.id).where(issues.c.borrower_id.is_(None)).limit(1)).first() is None:
+            return 0
+        key = _key(issues.c.issued_to)
+        conn.execute(insert(borrowers).prefix_with("OR IGNORE").from_select(
+            ["name", "name_key", "created_at"],
+            select(func.min(func.trim(issues.c.issued_to)), key, literal(datetime.utcnow(), borrowers.c.created_at.type))
+            .where(issues.c.borrower_id.is_(None))
+            .group_by(key),
+        ))
+        linked = conn.execute(
+            update(issues)
+            .where(issues.c.borrower_id.is_(None))
+            .where(borrowers.c.name_key == key)
+            .values(borrower_id=borrowers.c.id)
+        ).rowcount
+        rebuild(conn)
+    return linked
+
+
+def _borrower_id(conn, name):
+    """Id of the borrower for `name`, created if new."""
+    borrowers = models.Borrower.__table__
+    conn.execute(insert(borrowers).prefix_with("OR IGNORE").values(
+        name=name.strip(), name_key=_key(literal(name)), created_at=datetime.utcnow(),
+    ))
+    return conn.execute(select(borrowers.c.id).where(borrowers.c.name_key == _key(literal(name)))).scalar_one()
+
+
+# ==========================================
+#  KEEPING THE LEDGER CURRENT
+# ==========================================
+
+@event.listens_for(Session, "before_flush")
+def _link_borrowers(session, flush_context, instances):
+    resolved = {}
+    for obj in session.new | session.dirty:
+        if not isinstance(obj, models.IssueRecord) or obj.issued_to is None:
+            continue
+        if obj in session.dirty and not inspect(obj).attrs.issued_to.history.has_changes():
+            continue
+        if obj.issued_to not in resolved:
+            resolved[obj.issued_to] = _borrower_id(session.connection(), obj.issued_to)
+        obj.borrower_id  # load the current value, so after_flush sees it in the history
+        obj.borrower_id = resolved[obj.issued_to]
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_summary(session, flush_context):
+    affected = set()
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, models.IssueRecord):
+            state = inspect(obj)
+            affected.update(state.attrs.borrower_id.history.deleted)
+            # From the instance dict: a deleted row cannot be loaded any more.
+            affected.add(state.dict.get("borrower_id"))
+    affected.discard(None)
+    if affected:
+        refresh(session.connection(), affected)
@@ -0,0 +1,299 @@
+# backend/bulk_import.py
+"""
+Streaming bulk import of equipment from CSV or Excel (.xlsx) files.
+
+Rows are read one at a time: CSV through the csv module, and .xlsx through
+openpyxl in read-only mode, which parses the sheet XML as it goes instead of
+loading the workbook. Memory therefore depends on the batch size, not on the
+size of the file.
+
+The import makes two passes over the uploaded file:
+  1. validate every row and collect readable error messages (capped), and
+  2. if the file is clean, upsert by `code` in batches of BATCH_SIZE rows,
+     one commit per batch.
+
+The upsert matches crud.create_equipment: a code that already exists has
+its quantities increased and its status replaced. A new code creates a row.
+"""
+import codecs
+import csv
+import json
+import os
+
+from sqlalchemy.orm import Session
+
+import audit
+import models
+
+BATCH_SIZE = int(os.getenv("INVENTORY_IMPORT_BATCH_SIZE", "500"))
+MAX_ERROR_MESSAGES = 50
+
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx")
+
+FIELDS = ("name", "code", "category", "lab", "total_qty", "available_qty", "status", "reorder_threshold")
+REQUIRED_FIELDS = ("name", "code")
+
+# Lower-cased header text -> field. Headers that match a field name directly
+# need no entry here.
+HEADER_ALIASES = {
+    "item": "name",
+    "item name": "name",
+    "component": "name",
+    "equipment": "name",
+    "inventory code": "code",
+    "item code": "code",
+    "qty": "total_qty",
+    "quantity": "total_qty",
+    "total": "total_qty",
+    "total quantity": "total_qty",
+    "available": "available_qty",
+    "available quantity": "available_qty",
+    "type": "category",
+    "location": "lab",
+    "reorder level": "reorder_threshold",
+    "reorder threshold": "reorder_threshold",
+    "min stock": "reorder_threshold",
+}
+
+DEFAULTS = {"category": "General", "lab": "Main Lab", "status": "Available"}
+
+
+class BulkImportError(ValueError):
+    """The file as a whole cannot be imported (wrong type, unreadable, bad headers)."""
+
+
+# ==========================================
+#  READERS
+# ==========================================
+
+def _iter_csv(fileobj):
+    # utf-8-sig drops the BOM Excel adds when it saves "CSV UTF-8".
+    reader = codecs.getreader("utf-8-sig")(fileobj, errors="replace")
+    yield from csv.reader(reader)
+
+
+def _iter_xlsx(fileobj, sheet=None):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise BulkImportError("Excel import needs the openpyxl package; upload a CSV instead")
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception:
+        raise BulkImportError("Could not read Excel file")
+    try:
+        if sheet:
+            if sheet not in workbook.sheetnames:
+                raise BulkImportError(f"Sheet '{sheet}' not found")
+            worksheet = workbook[sheet]
+        else:
+            worksheet = workbook.worksheets[0]
+        for row in worksheet.iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename, sheet=None):
+    """Yield each row of the upload as a tuple/list of raw cell values."""
+    fileobj.seek(0)
+    if filename.lower().endswith(".xlsx"):
+        return _iter_xlsx(fileobj, sheet)
+    return _iter_csv(fileobj)
+
+
+# ==========================================
+#  MAPPING AND VALIDATION
+# ==========================================
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def map_header(header, mapping=None):
+    """
+    Return a list with the field for each column (None = ignored). `mapping`
+    is an optional {header text: field} supplied by the client and takes
+    precedence over the built-in aliases.
+    """
+    overrides = {str(k).strip().lower(): v for k, v in (mapping or {}).items()}
+    for field in overrides.values():
+        if field not in FIELDS:
+            raise BulkImportError(f"Unknown field '{field}' in column mapping")
+
+    columns, seen = [], set()
+    for cell in header:
+        text = "" if cell is None else str(cell).strip().lower()
+        field = overrides.get(text) or (text if text in FIELDS else HEADER_ALIASES.get(text))
+        if field in seen:
+            field = None  # first column wins
+        columns.append(field)
+        if field:
+            seen.add(field)
+
+    missing = [f for f in REQUIRED_FIELDS if f not in seen]
+    if missing:
+        raise BulkImportError(f"Missing required column(s): {', '.join(missing)}")
+    return columns
+
+
+def _to_int(value, field):
+    if isinstance(value, bool):
+        raise ValueError(f"{field} must be a whole number")
+    if isinstance(value, (int, float)):
+        number = value
+    else:
+        try:
+            number = float(str(value).strip())
+        except ValueError:
+            raise ValueError(f"{field} must be a whole number")
+    if number != number or number in (float("inf"), float("-inf")) or number != int(number):
+        raise ValueError(f"{field} must be a whole number")
+    if number < 0:
+        raise ValueError(f"{field} cannot be negative")
+    return int(number)
+
+
+def parse_row(columns, values):
+    """
+    Turn raw cell values into an equipment dict. Returns None for blank rows
+    and raises ValueError with a readable reason for invalid ones.
+    """
+    raw = {}
+    for field, value in zip(columns, values):
+        if field and not _blank(value):
+            raw[field] = value
+    if not raw:
+        return None
+
+    item = {}
+    for field in ("name", "code", "category", "lab", "status"):
+        if field in raw:
+            value = raw[field]
+            # Excel stores numeric-looking codes as numbers: 1001.0 -> "1001"
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            item[field] = str(value).strip()
+        elif field in REQUIRED_FIELDS:
+            raise ValueError(f"{field} is required")
+        else:
+            item[field] = DEFAULTS[field]
+
+    item["total_qty"] = _to_int(raw.get("total_qty", 0), "total_qty")
+    if "available_qty" in raw:
+        item["available_qty"] = _to_int(raw["available_qty"], "available_qty")
+        if item["available_qty"] > item["total_qty"]:
+            raise ValueError("available_qty cannot exceed total_qty")
+    else:
+        item["available_qty"] = item["total_qty"]
+    if "reorder_threshold" in raw:
+        item["reorder_threshold"] = _to_int(raw["reorder_threshold"], "reorder_threshold")
+    return item
+
+
+def iter_items(rows, mapping=None):
+    """
+    Yield (row_number, item, error) for every non-blank data row. Row numbers
+    are 1-based and count the header, so they match what the spreadsheet shows.
+    """
+    columns = None
+    for number, values in enumerate(rows, start=1):
+        if columns is None:
+            if all(_blank(v) for v in values):
+                continue
+            columns = map_header(values, mapping)
+            continue
+        try:
+            item = parse_row(columns, values)
+        except ValueError as e:
+            yield number, None, str(e)
+            continue
+        if item is not None:
+            yield number, item, None
+    if columns is None:
+        raise BulkImportError("File is empty")
+
+
+def validate(rows, mapping=None):
+    """First pass: (valid row count, error messages, total error count)."""
+    valid, messages, error_count = 0, [], 0
+    for number, item, error in iter_items(rows, mapping):
+        if error is None:
+            valid += 1
+            continue
+        error_count += 1
+        if len(messages) < MAX_ERROR_MESSAGES:
+            messages.append(f"Row {number}: {error}")
+    if error_count > len(messages):
+        messages.append(f"...and {error_count - len(messages)} more")
+    return valid, messages, error_count
+
+
+# ==========================================
+#  UPSERT
+# ==========================================
+
+def _apply_batch(db: Session, batch, actor):
+    codes = {item["code"] for item in batch}
+    existing = {
+        e.code: e for e in db.query(models.Equipment).filter(models.Equipment.code.in_(codes))
+    }
+    changes = []  # (obj, action, before)
+    changed_codes = set()
+    created = updated = 0
+    for item in batch:
+        db_item = existing.get(item["code"])
+        if db_item is None:
+            db_item = models.Equipment(**item)
+            db.add(db_item)
+            existing[item["code"]] = db_item
+            changes.append((db_item, "create", None))
+            changed_codes.add(item["code"])
+            created += 1
+            continue
+        if item["code"] not in changed_codes:
+            changes.append((db_item, "update", audit.snapshot(db_item)))
+            changed_codes.add(item["code"])
+        db_item.total_qty += item["total_qty"]
+        db_item.available_qty += item["available_qty"]
+        db_item.status = item["status"]
+        if "reorder_threshold" in item:
+            db_item.reorder_threshold = item["reorder_threshold"]
+        updated += 1
+
+    db.flush()
+    for db_item, action, before in changes:
+        audit.record(db, actor, action, db_item, before)
+    db.commit()
+    # Keep the identity map from growing with the file.
+    db.expunge_all()
+    return created, updated
+
+
+def import_rows(db: Session, rows, mapping=None, actor=None, batch_size=BATCH_SIZE):
+    """Second pass: upsert every valid row by code. Returns (created, updated)."""
+    created = updated = 0
+    batch = []
+    for _, item, error in iter_items(rows, mapping):
+        if error is not None:
+            continue
+        batch.append(item)
+        if len(batch) >= batch_size:
+            c, u = _apply_batch(db, batch, actor)
+            created, updated, batch = created + c, updated + u, []
+    if batch:
+        c, u = _apply_batch(db, batch, actor)
+        created, updated = created + c, updated + u
+    return created, updated
+
+
+def parse_mapping(text):
+    if not text:
+        return None
+    try:
+        mapping = json.loads(text)
+    except ValueError:
+        raise BulkImportError("Column mapping must be a JSON object")
+    if not isinstance(mapping, dict):
+        raise BulkImportError("Column mapping must be a JSON object")
+    return mapping
@@ -0,0 +1,335 @@
+# backend/code_index.py
+"""
+In-memory snapshot of the equipment table: the code index behind the scan
+endpoints, and the read model behind GET /equipments.
+
+Each database (the core one and every department, see tenancy.py) gets one
+snapshot, loaded in a single Core query on first use. Rows are small
+__slots__ objects keyed by id, with a second dict keyed by code, and the
+low-cardinality strings (category, lab, status) are interned so 100k rows
+share a handful of copies; benchmarks/bench_snapshot.py reports the memory.
+A scan is one dict access plus encoding one row: scanner bursts never touch
+the equipment table.
+
+Serving GET /equipments from the snapshot is opt-in
+(INVENTORY_EQUIPMENT_SNAPSHOT=1). List bodies are then cached whole, one per
+?fields= projection, with the fields put in COLUMNS order so each projection
+has one key, and at most MAX_BODIES of them, oldest dropped first. A change
+drops the cached bodies; the next list read encodes from the rows once and
+caches the result again.
+
+The snapshot follows the equipment_changes log, which triggers on the
+equipment table fill for every write from any connection or process (see
+migrations.py). Every read first compares SQLite's data_version with the
+one it last saw, one PRAGMA on a private connection. If it moved, the
+snapshot reads the log entries past its position and re-reads just those
+rows, whoever wrote them: this process, another worker, a reconcile or
+move-lab run. It only reloads everything when the log no longer reaches back
+to its position, after more than migrations.EQUIPMENT_CHANGES_KEPT rows
+changed or a restore. So a read never trails a commit, and a write costs a
+read of the rows it touched, not a reload.
+
+INVENTORY_CODE_INDEX_SYNC > 0 also catches up every that many seconds in
+the background, so reads rarely find work to do; run_server.py turns it on
+for multi-worker servers.
+"""
+import os
+import sys
+import threading
+
+from sqlalchemy import func, select
+
+import models
+from responses import dumps
+
+SYNC_INTERVAL_SECONDS = float(os.getenv("INVENTORY_CODE_INDEX_SYNC", "0"))  # 0 disables
+SERVE_LISTS = os.getenv("INVENTORY_EQUIPMENT_SNAPSHOT", "0") == "1"
+MAX_BATCH = 500
+MAX_BODIES = int(os.getenv("INVENTORY_EQUIPMENT_LIST_BODIES", "8"))  # cached list projections per database
+
+# Same fields, same order as crud.EQUIPMENT_COLUMNS / schemas.Equipment.
+COLUMNS = ("id", "name", "code", "category", "lab", "total_qty", "available_qty", "status", "reorder_threshold")
+
+stats = {"lookups": 0, "misses": 0, "reloads": 0, "catch_ups": 0, "list_hits": 0, "list_builds": 0}
+
+
+def normalize_code(code):
+    return (code or "").strip()
+
+
+def _intern(value):
+    return sys.intern(value) if value is not None else None
+
+
+class EquipmentRow:
+    """One equipment row. Never modified: a write replaces the whole object."""
+
+    __slots__ = COLUMNS
+
+    def __init__(self, id, name, code, category, lab, total_qty, available_qty, status, reorder_threshold):
+        self.id = id
+        self.name = name
+        self.code = code
+        self.category = _intern(category)
+        self.lab = _intern(lab)
+        self.total_qty = total_qty
+        self.available_qty = available_qty
+        self.status = _intern(status)
+        self.reorder_threshold = reorder_threshold
+
+    def as_dict(self, columns=COLUMNS):
+        return {name: getattr(self, name) for name in columns}
+
+    def same_as(self, other):
+        return other is not None and all(getattr(self, name) == getattr(other, name) for name in COLUMNS)
+
+
+class CodeIndex:
+    """Equipment rows of one database, by id and by code, plus cached list bodies."""
+
+    def __init__(self, tenant=None):
+        self.tenant = tenant
+        self._by_id = {}
+        self._by_code = {}
+        self._bodies = {}          # columns -> encoded list, dropped on every write
+        self._version = 0
+        self._seq = 0              # last equipment_changes entry reflected in the rows
+        self._in_order = True      # _by_id iterates in id order
+        self.ready = threading.Event()
+        # Held while loading or catching up, so readers see one consistent state.
+        self._lock = threading.Lock()
+        self._watch = None
+        self._data_version = None
+
+    def _engine(self):
+        import tenancy
+
+        return tenancy.get_engine(self.tenant)
+
+    def _read_data_version(self):
+        if self._watch is None:
+            from database import DataVersionWatch
+
+            self._watch = DataVersionWatch(self._engine())
+        return self._watch.read()
+
+    def _load_locked(self):
+        table = models.Equipment.__table__
+        log = models.EquipmentChange.__table__
+        stmt = select(*[table.c[name] for name in COLUMNS]).order_by(table.c.id)
+        version = self._read_data_version()
+        with self._engine().connect() as conn:
+            # One read transaction, so the log position matches the rows.
+            conn.exec_driver_sql("BEGIN")
+            seq = conn.execute(select(func.coalesce(func.max(log.c.seq), 0))).scalar()
+            rows = [EquipmentRow(*row) for row in conn.execute(stmt)]
+            conn.rollback()
+        self._by_id = {row.id: row for row in rows}
+        self._by_code = {row.code: row for row in rows}
+        self._bodies = {}
+        self._version += 1
+        self._seq = seq
+        self._in_order = True
+        self._data_version = version
+        self.ready.set()
+        stats["reloads"] += 1
+
+    def load(self):
+        with self._lock:
+            self._load_locked()
+
+    def ensure_loaded(self):
+        with self._lock:
+            if not self.ready.is_set():
+                self._load_locked()
+
+    def sync(self):
+        """Catch up with every commit made to this database since the last check."""
+        with self._lock:
+            version = self._read_data_version()
+            if version == self._data_version:
+                return
+            if not self._catch_up_locked():
+                self._load_locked()
+            self._data_version = version
+
+    def _catch_up_locked(self):
+        """Re-read the rows named in the log past our position; False when a full reload is needed."""
+        table = models.Equipment.__table__
+        log = models.EquipmentChange.__table__
+        with self._engine().connect() as conn:
+            conn.exec_driver_sql("BEGIN")
+            first, last = conn.execute(select(func.min(log.c.seq), func.max(log.c.seq))).one()
+            last = last or 0
+            if last == self._seq:
+                conn.rollback()
+                return True
+            # Behind the log's oldest entry, or a log that went backwards (a restore).
+            if last < self._seq or (first is not None and first > self._seq + 1):
+                conn.rollback()
+                return False
+            ids = sorted({row[0] for row in conn.execute(select(log.c.equipment_id).where(log.c.seq > self._seq))})
+            found = {}
+            for start in range(0, len(ids), MAX_BATCH):
+                stmt = select(*[table.c[name] for name in COLUMNS]).where(table.c.id.in_(ids[start:start + MAX_BATCH]))
+                for row in conn.execute(stmt):
+                    found[row[0]] = EquipmentRow(*row)
+            conn.rollback()
+        self._apply_locked([(equipment_id, found.get(equipment_id)) for equipment_id in ids])
+        self._seq = last
+        stats["catch_ups"] += 1
+        return True
+
+    def apply(self, changes):
+        """[(id, EquipmentRow or None for a delete), ...]."""
+        with self._lock:
+            self._apply_locked(changes)
+
+    def _apply_locked(self, changes):
+        changed = False
+        for equipment_id, row in changes:
+            previous = self._by_id.get(equipment_id)
+            if row is not None and row.same_as(previous):
+                continue
+            changed = True
+            if previous is not None and self._by_code.get(previous.code) is previous:
+                del self._by_code[previous.code]
+            if row is None:
+                self._by_id.pop(equipment_id, None)
+                continue
+            if previous is None and self._by_id and equipment_id < next(reversed(self._by_id)):
+                self._in_order = False
+            self._by_id[equipment_id] = row
+            self._by_code[row.code] = row
+        if changed:
+            self._bodies = {}
+            self._version += 1
+
+    def get(self, code):
+        row = self._by_code.get(code)
+        return dumps(row.as_dict()) if row is not None else None
+
+    def list_body(self, columns=COLUMNS):
+        """Every row as a JSON array in id order, limited to `columns`."""
+        body = self._bodies.get(columns)
+        if body is not None:
+            stats["list_hits"] += 1
+            return body
+        with self._lock:
+            if not self._in_order:
+                self._by_id = dict(sorted(self._by_id.items()))
+                self._in_order = True
+            version = self._version
+            rows = list(self._by_id.values())
+        # Encoded outside the lock; rows are never modified, only replaced.
+        body = dumps([row.as_dict(columns) for row in rows])
+        # orjson leaves its output in a buffer of up to twice the size; keep an exact copy.
+        body = memoryview(body).tobytes()
+        stats["list_builds"] += 1
+        with self._lock:
+            if self._version == version:
+                while len(self._bodies) >= MAX_BODIES:
+                    del self._bodies[next(iter(self._bodies))]
+                self._bodies[columns] = body
+        return body
+
+    def __len__(self):
+        return len(self._by_id)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(tenant=None):
+    """The index for a department, loaded on first use and current with every commit."""
+    index = _indexes.get(tenant)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(tenant)
+            if index is None:
+                index = _indexes[tenant] = CodeIndex(tenant)
+    if not index.ready.is_set():
+        index.ensure_loaded()
+    else:
+        index.sync()
+    return index
+
+
+def load_all():
+    import tenancy
+
+    for tenant in tenancy.all_tenants():
+        get_index(tenant)
+
+
+def reload(tenant=None):
+    """Re-read a loaded snapshot now, e.g. after a write to many rows (see reconcile.py)."""
+    index = _indexes.get(tenant)
+    if index is not None and index.ready.is_set():
+        index.load()
+
+
+def sync():
+    """Entry point for the background PeriodicTask: catch up ahead of the next read."""
+    for index in list(_indexes.values()):
+        if index.ready.is_set():
+            index.sync()
+
+
+def list_body(columns=COLUMNS, tenant=None):
+    """Encoded GET /equipments response for a department."""
+    index = get_index(tenant)
+    # One cache key per set of fields, whatever order the request named them in.
+    return index.list_body(tuple(name for name in COLUMNS if name in columns))
+
+
+def lookup(code, tenant=None):
+    """Encoded equipment row for `code`, or None."""
+    body = get_index(tenant).get(normalize_code(code))
+    stats["lookups"] += 1
+    if body is None:
+        stats["misses"] += 1
+    return body
+
+
+def lookup_many(codes, tenant=None):
+    """(encoded rows in request order, codes that were not found)."""
+    index = get_index(tenant)
+    found, missing = [], []
+    for code in codes:
+        body = index.get(normalize_code(code))
+        if body is None:
+            missing.append(code)
+        else:
+            found.append(body)
+    stats["lookups"] += len(codes)
+    stats["misses"] += len(missing)
+    return found, missing
+
+
+def render_metrics():
+    """Prometheus lines for metrics.registry.collectors."""
+    return [
+        "# HELP code_index_entries Equipment codes held in memory.",
+        "# TYPE code_index_entries gauge",
+        f"code_index_entries {sum(len(i) for i in list(_indexes.values()))}",
+        "# HELP code_index_lookups_total Codes looked up in the index.",
+        "# TYPE code_index_lookups_total counter",
+        f"code_index_lookups_total {stats['lookups']}",
+        "# HELP code_index_misses_total Looked-up codes that were not found.",
+        "# TYPE code_index_misses_total counter",
+        f"code_index_misses_total {stats['misses']}",
+        "# HELP code_index_reloads_total Full index loads.",
+        "# TYPE code_index_reloads_total counter",
+        f"code_index_reloads_total {stats['reloads']}",
+        "# HELP code_index_catch_ups_total Changed rows re-read from the equipment_changes log.",
+        "# TYPE code_index_catch_ups_total counter",
+        f"code_index_catch_ups_total {stats['catch_ups']}",
+        "# HELP equipment_list_cache_hits_total Equipment lists served from a cached body.",
+        "# TYPE equipment_list_cache_hits_total counter",
+        f"equipment_list_cache_hits_total {stats['list_hits']}",
+        "# HELP equipment_list_cache_builds_total Equipment list bodies encoded from the snapshot.",
+        "# TYPE equipment_list_cache_builds_total counter",
+        f"equipment_list_cache_builds_total {stats['list_builds']}",
+    ]
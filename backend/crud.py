@@ -1,15 +1,70 @@
 # backend/crud.py
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 import models
 import schemas
+import audit
+import heapq
 import random
 import string
+from operator import itemgetter
 from passlib.context import CryptContext
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Column order used by the row-tuple fast paths below. These mirror the
+# fields of schemas.Equipment / IssueRecord / Maintenance.
+EQUIPMENT_COLUMNS = (
+    "id", "name", "code", "category", "lab", "total_qty", "available_qty", "status", "reorder_threshold",
+)
+ISSUE_COLUMNS = (
+    "id", "equipment_id", "issued_to", "issued_lab", "quantity", "issue_date", "return_date", "status", "borrower_id",
+)
+MAINTENANCE_COLUMNS = (
+    "id", "equipment_id", "fault_description", "fault_date", "sent_for_repair_date",
+    "return_from_repair_date", "status", "remarks", "cost",
+)
+
+def _select_rows(db: Session, model, columns):
+    """
+    Read plain rows with SQLAlchemy Core and return them as dicts, skipping
+    ORM instance construction and the identity map entirely.
+    """
+    table = model.__table__
+    stmt = select(*[table.c[name] for name in columns]).order_by(table.c.id)
+    return [dict(zip(columns, row)) for row in db.execute(stmt)]
+
+def _with_archive(db: Session, model, archive_model, columns, include_archived):
+    """Rows of `model`, merged in id order with its archive table when asked to."""
+    if not include_archived:
+        return _select_rows(db, model, columns)
+    # The merge needs ids; fetch them even if the caller did not ask for them.
+    merge_columns = columns if "id" in columns else ("id", *columns)
+    rows = heapq.merge(
+        _select_rows(db, model, merge_columns),
+        _select_rows(db, archive_model, merge_columns),
+        key=itemgetter("id"),
+    )
+    if merge_columns is columns:
+        return list(rows)
+    return [{name: row[name] for name in columns} for row in rows]
+
+def parse_fields(fields, columns):
+    """
+    Sparse fieldset: "id,name,code" -> ("id", "name", "code"), validated
+    against `columns`. Returns `columns` itself for None or "". Raises
+    ValueError naming any unknown field.
+    """
+    if not fields:
+        return columns
+    requested = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in columns]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(columns)}")
+    return requested or columns
+
 # =============================
 #         Authentication CRUD
 # =============================
@@ -50,6 +105,8 @@ def create_user(db: Session, user_in: schemas.UserCreate):
     )
     
     db.add(db_user)
+    db.flush()
+    audit.record(db, user_in.username, "create", db_user)
     db.commit()
     db.refresh(db_user)
     return db_user, None
@@ -100,6 +157,8 @@ def reset_password(db: Session, email: str, recovery_code: str, new_password: st
     # Update password and clear recovery code
     user.hashed_password = pwd_context.hash(new_password)
     user.recovery_code = None
+    db.flush()
+    audit.record(db, user.username, "password_reset", user, audit.snapshot(user))
     db.commit()
     db.refresh(user)
     return user, None
@@ -107,10 +166,15 @@ def reset_password(db: Session, email: str, recovery_code: str, new_password: st
 # =============================
 #         Equipment CRUD
 # =============================
+# Every mutation takes an optional `actor` (the username making the change)
+# and queues an audit entry in the same session; see audit.py.
 
 def get_all_equipment(db: Session):
     return db.query(models.Equipment).all()
 
+def get_all_equipment_rows(db: Session, columns=EQUIPMENT_COLUMNS):
+    return _select_rows(db, models.Equipment, columns)
+
 def get_equipment(db: Session, equipment_id: int):
     return db.query(models.Equipment).filter(
         models.Equipment.id == equipment_id
@@ -121,7 +185,26 @@ def get_equipment_by_code(db: Session, code: str):
         models.Equipment.code == code
     ).first()
 
-def create_equipment(db: Session, equipment_in: schemas.EquipmentCreate):
+def _save(db: Session, db_item, commit: bool, actor=None, action="update", before=None):
+    """
+    Flush, queue the audit entry, then commit and refresh. With commit=False
+    the caller (group commit) owns the transaction and only a flush happens.
+    """
+    db.flush()
+    audit.record(db, actor, action, db_item, before)
+    if commit:
+        db.commit()
+        db.refresh(db_item)
+    return db_item
+
+def _delete(db: Session, db_item, actor=None):
+    before = audit.snapshot(db_item)
+    db.delete(db_item)
+    db.flush()
+    audit.record(db, actor, "delete", db_item, before)
+    db.commit()
+
+def create_equipment(db: Session, equipment_in: schemas.EquipmentCreate, commit: bool = True, actor: str = None):
     """
     If equipment with same CODE exists:
         -> increase quantity
@@ -131,14 +214,15 @@ def create_equipment(db: Session, equipment_in: schemas.EquipmentCreate):
     existing_item = get_equipment_by_code(db, equipment_in.code)
 
     if existing_item:
+        before = audit.snapshot(existing_item)
         # Update quantity and status
         existing_item.total_qty += equipment_in.total_qty
         existing_item.available_qty += equipment_in.available_qty
         existing_item.status = equipment_in.status
+        if equipment_in.reorder_threshold is not None:
+            existing_item.reorder_threshold = equipment_in.reorder_threshold
 
-        db.commit()
-        db.refresh(existing_item)
-        return existing_item
+        return _save(db, existing_item, commit, actor, "update", before)
 
     # Create new equipment using total_qty and available_qty
     db_item = models.Equipment(
@@ -149,33 +233,30 @@ def create_equipment(db: Session, equipment_in: schemas.EquipmentCreate):
         total_qty=equipment_in.total_qty,
         available_qty=equipment_in.available_qty,
         status=equipment_in.status,
+        reorder_threshold=equipment_in.reorder_threshold,
     )
 
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
+    return _save(db, db_item, commit, actor, "create")
 
-def update_equipment(db: Session, equipment_id: int, equipment_in: schemas.EquipmentUpdate):
+def update_equipment(db: Session, equipment_id: int, equipment_in: schemas.EquipmentUpdate, actor: str = None):
     db_item = get_equipment(db, equipment_id)
     if not db_item:
         return None
 
+    before = audit.snapshot(db_item)
     update_data = equipment_in.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_item, field, value)
 
-    db.commit()
-    db.refresh(db_item)
-    return db_item
+    return _save(db, db_item, True, actor, "update", before)
 
-def delete_equipment(db: Session, equipment_id: int):
+def delete_equipment(db: Session, equipment_id: int, actor: str = None):
     db_item = get_equipment(db, equipment_id)
     if not db_item:
         return False
 
-    db.delete(db_item)
-    db.commit()
+    _delete(db, db_item, actor)
     return True
 
 # =============================
@@ -185,12 +266,15 @@ def delete_equipment(db: Session, equipment_id: int):
 def get_issue_records(db: Session):
     return db.query(models.IssueRecord).all()
 
+def get_issue_record_rows(db: Session, include_archived: bool = False, columns=ISSUE_COLUMNS):
+    return _with_archive(db, models.IssueRecord, models.IssueRecordArchive, columns, include_archived)
+
 def get_issue_record(db: Session, issue_id: int):
     return db.query(models.IssueRecord).filter(
         models.IssueRecord.id == issue_id
     ).first()
 
-def create_issue_record(db: Session, issue_in: schemas.IssueRecordCreate):
+def create_issue_record(db: Session, issue_in: schemas.IssueRecordCreate, commit: bool = True, actor: str = None):
     db_item = models.IssueRecord(
         equipment_id=issue_in.equipment_id,
         issued_to=issue_in.issued_to,
@@ -202,15 +286,14 @@ def create_issue_record(db: Session, issue_in: schemas.IssueRecordCreate):
     )
 
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
+    return _save(db, db_item, commit, actor, "create")
 
-def update_issue_record(db: Session, issue_id: int, issue_in: schemas.IssueRecordCreate):
+def update_issue_record(db: Session, issue_id: int, issue_in: schemas.IssueRecordCreate, actor: str = None):
     db_item = get_issue_record(db, issue_id)
     if not db_item:
         return None
 
+    before = audit.snapshot(db_item)
     db_item.equipment_id = issue_in.equipment_id
     db_item.issued_to = issue_in.issued_to
     db_item.issued_lab = issue_in.issued_lab
@@ -219,17 +302,14 @@ def update_issue_record(db: Session, issue_id: int, issue_in: schemas.IssueRecor
     db_item.return_date = issue_in.return_date
     db_item.status = issue_in.status
 
-    db.commit()
-    db_item.refresh(db_item)
-    return db_item
+    return _save(db, db_item, True, actor, "update", before)
 
-def delete_issue_record(db: Session, issue_id: int):
+def delete_issue_record(db: Session, issue_id: int, actor: str = None):
     db_item = get_issue_record(db, issue_id)
     if not db_item:
         return False
 
-    db.delete(db_item)
-    db.commit()
+    _delete(db, db_item, actor)
     return True
 
 # =============================
@@ -239,12 +319,15 @@ def delete_issue_record(db: Session, issue_id: int):
 def get_maintenance_records(db: Session):
     return db.query(models.Maintenance).all()
 
+def get_maintenance_rows(db: Session, include_archived: bool = False, columns=MAINTENANCE_COLUMNS):
+    return _with_archive(db, models.Maintenance, models.MaintenanceArchive, columns, include_archived)
+
 def get_maintenance_record(db: Session, m_id: int):
     return db.query(models.Maintenance).filter(
         models.Maintenance.id == m_id
     ).first()
 
-def create_maintenance(db: Session, m_in: schemas.MaintenanceCreate):
+def create_maintenance(db: Session, m_in: schemas.MaintenanceCreate, commit: bool = True, actor: str = None):
     db_item = models.Maintenance(
         equipment_id=m_in.equipment_id,
         fault_description=m_in.fault_description,
@@ -257,15 +340,14 @@ def create_maintenance(db: Session, m_in: schemas.MaintenanceCreate):
     )
 
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
+    return _save(db, db_item, commit, actor, "create")
 
-def update_maintenance(db: Session, m_id: int, m_in: schemas.MaintenanceCreate):
+def update_maintenance(db: Session, m_id: int, m_in: schemas.MaintenanceCreate, actor: str = None):
     db_item = get_maintenance_record(db, m_id)
     if not db_item:
         return None
 
+    before = audit.snapshot(db_item)
     db_item.equipment_id = m_in.equipment_id
     db_item.fault_description = m_in.fault_description
     db_item.fault_date = m_in.fault_date
@@ -275,15 +357,12 @@ def update_maintenance(db: Session, m_id: int, m_in: schemas.MaintenanceCreate):
     db_item.remarks = m_in.remarks
     db_item.cost = m_in.cost # Added cost field
 
-    db.commit()
-    db.refresh(db_item)
-    return db_item
+    return _save(db, db_item, True, actor, "update", before)
 
-def delete_maintenance(db: Session, m_id: int):
+def delete_maintenance(db: Session, m_id: int, actor: str = None):
     db_item = get_maintenance_record(db, m_id)
     if not db_item:
         return False
 
-    db.delete(db_item)
-    db.commit()
+    _delete(db, db_item, actor)
     return True
@@ -1,56 +1,173 @@
 import os
 import sys
 import shutil
-from sqlalchemy import create_engine
+import sqlite3
+import threading
+from starlette.requests import Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-# 1. Determine the writable path (AppData)
-# This creates: C:\Users\YourName\AppData\Roaming\TasInventory
-APP_NAME = "TasInventory"
-USER_DATA_DIR = os.path.join(os.getenv('APPDATA'), APP_NAME)
+import sql_profiling
 
-if not os.path.exists(USER_DATA_DIR):
-    os.makedirs(USER_DATA_DIR)
+# Nothing in this module touches the filesystem at import time. The data
+# directory, the template copy and the engine are all created on first use
+# through get_engine(), which keeps `import models` cheap for tests, tools
+# and every uvicorn worker.
 
-# 2. Define the paths
+APP_NAME = "TasInventory"
 DB_FILENAME = "inventory.db"
-WRITABLE_DB_PATH = os.path.join(USER_DATA_DIR, DB_FILENAME)
-
-# 3. Locate the bundled database (The "Template")
-# In dev, it's in the current folder. In prod, it's in the _internal or resource folder.
-if getattr(sys, 'frozen', False):
-    # Running as EXE
-    BASE_DIR = os.path.dirname(sys.executable)
-else:
-    # Running as script
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-
-BUNDLED_DB_PATH = os.path.join(BASE_DIR, DB_FILENAME)
-
-# 4. Copy the DB if it doesn't exist in AppData
-# This preserves your "Admin" account from the build but allows new writes.
-if not os.path.exists(WRITABLE_DB_PATH):
-    if os.path.exists(BUNDLED_DB_PATH):
-        print(f"Copying database template to {WRITABLE_DB_PATH}")
-        shutil.copy2(BUNDLED_DB_PATH, WRITABLE_DB_PATH)
+
+# WAL lets readers (including online backups, see backup.py) run alongside
+# a writer instead of blocking it. Set to "delete" to keep the old rollback
+# journal.
+JOURNAL_MODE = os.getenv("INVENTORY_SQLITE_JOURNAL_MODE", "wal")
+
+_engine = None
+_engine_lock = threading.Lock()
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+Base = declarative_base()
+
+
+def get_user_data_dir():
+    """
+    Writable folder for the database and other runtime files.
+    INVENTORY_DATA_DIR wins; otherwise C:\\Users\\YourName\\AppData\\Roaming\\TasInventory
+    on Windows and ~/.TasInventory elsewhere.
+    """
+    data_dir = os.getenv("INVENTORY_DATA_DIR")
+    if not data_dir:
+        appdata = os.getenv("APPDATA")
+        if appdata:
+            data_dir = os.path.join(appdata, APP_NAME)
+        else:
+            data_dir = os.path.join(os.path.expanduser("~"), "." + APP_NAME)
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
+
+
+def get_bundled_db_path():
+    """The template database shipped next to the EXE (or this file in dev)."""
+    if getattr(sys, 'frozen', False):
+        # Running as EXE
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        # Running as script
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, DB_FILENAME)
+
+
+def get_db_path():
+    return os.path.join(get_user_data_dir(), DB_FILENAME)
+
+
+def _prepare_db_file(db_path):
+    # Copy the DB if it doesn't exist in AppData
+    # This preserves your "Admin" account from the build but allows new writes.
+    if os.path.exists(db_path):
+        return
+    bundled = get_bundled_db_path()
+    if os.path.exists(bundled):
+        print(f"Copying database template to {db_path}")
+        shutil.copy2(bundled, db_path)
     else:
         print("No template database found. A new empty one will be created.")
 
-# 5. Connect to the WRITABLE database
-print(f"Connecting to database at: {WRITABLE_DB_PATH}")
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{WRITABLE_DB_PATH}"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _set_sqlite_pragmas(dbapi_conn, connection_record):
+    cursor = dbapi_conn.cursor()
+    cursor.execute(f"PRAGMA journal_mode={JOURNAL_MODE}")
+    cursor.close()
 
-Base = declarative_base()
 
-def get_db():
+def create_sqlite_engine(db_path):
+    """Engine with the app's pragmas and query profiling, for any database file."""
+    engine = create_engine(
+        f"sqlite:///{db_path}", connect_args={"check_same_thread": False}
+    )
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    sql_profiling.install(engine)
+    return engine
+
+
+class DataVersionWatch:
+    """
+    PRAGMA data_version of one database file, read on a private connection.
+    The value changes whenever another connection, in any process, commits;
+    in-memory caches use it to notice writes they did not see themselves.
+    """
+
+    def __init__(self, engine):
+        self.db_path = engine.url.database
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def read(self):
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+def get_engine():
+    """Create the engine on first use and bind SessionLocal to it."""
+    global _engine
+    if _engine is not None:
+        return _engine
+    with _engine_lock:
+        if _engine is None:
+            db_path = get_db_path()
+            _prepare_db_file(db_path)
+            print(f"Connecting to database at: {db_path}")
+            engine = create_sqlite_engine(db_path)
+            SessionLocal.configure(bind=engine)
+            _engine = engine
+    return _engine
+
+
+def __getattr__(name):
+    # Backwards compatibility for `from database import engine`.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def begin_read_snapshot(db):
+    """
+    Start the session's transaction with an explicit BEGIN, so every query
+    that follows reads the same snapshot of the database. (pysqlite
+    otherwise runs each SELECT outside a transaction.) Call it before the
+    session's first query; closing the session ends the snapshot.
+    """
+    db.connection().exec_driver_sql("BEGIN")
+
+
+def get_core_db():
+    """Session on the core database, which holds users and sessions for every department."""
+    if _engine is None:
+        get_engine()
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_db(request: Request = None):
+    """
+    Session for inventory data. With departments configured (tenancy.py) the
+    request is routed to its department's database; otherwise, and outside a
+    request, this is the core database.
+    """
+    import tenancy
+
+    if _engine is None:
+        get_engine()
+    tenant = tenancy.request_tenant(request) if request is not None else None
+    db = tenancy.session_factory(tenant)()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,195 @@
+# backend/group_commit.py
+"""
+Opt-in group commit for single-record creates (INVENTORY_GROUP_COMMIT=1).
+
+Every POST /equipments, /issues and /maintenance normally pays for its own
+COMMIT, and on SQLite each commit is an fsync. With group commit on, those
+requests hand their write to one writer thread. The writer collects
+everything that arrives within WINDOW_MS (or up to MAX_BATCH writes), runs
+them in one transaction and commits once.
+
+Durability is unchanged: a request's future resolves only after the COMMIT
+of the batch holding its write has returned, so no client is told "201
+Created" for data that is not on disk. The cost is up to WINDOW_MS of extra
+latency per write.
+
+If any write in a batch fails, the batch is rolled back and each write is
+retried in its own transaction. The bad write fails alone and the others
+still commit.
+
+A request waits at most RESULT_TIMEOUT seconds. If its write has not
+started by then, it is cancelled and will never run. The request fails with
+503, and the client can safely retry. If the write has already started, its
+batch may still commit. The request then fails with 504 and "outcome
+unknown", and a client must check before retrying, or the row may be created
+twice.
+
+With departments configured (tenancy.py) each department's database gets
+its own writer thread, started on first use, so departments batch and
+commit independently.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("INVENTORY_GROUP_COMMIT", "0") == "1"
+WINDOW_MS = float(os.getenv("INVENTORY_GROUP_COMMIT_WINDOW_MS", "5"))
+MAX_BATCH = int(os.getenv("INVENTORY_GROUP_COMMIT_MAX_BATCH", "256"))
+RESULT_TIMEOUT = 30.0
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    def __init__(self, session_factory, window_ms=WINDOW_MS, max_batch=MAX_BATCH):
+        self.session_factory = session_factory
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self.batches = 0
+        self.writes = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Commit whatever is queued, then stop the writer thread."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, op) -> Future:
+        """
+        Queue `op(session)` for the next batch. The op must only add/flush;
+        the writer commits. The future resolves with op's return value.
+        """
+        future = Future()
+        self._queue.put((future, op))
+        return future
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit_batch(batch)
+            if stopping:
+                return
+
+    def _commit_batch(self, batch):
+        batch = [(f, op) for f, op in batch if f.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        session = self.session_factory(expire_on_commit=False)
+        try:
+            results = [(future, op(session)) for future, op in batch]
+            session.commit()
+        except Exception:
+            session.rollback()
+            session.close()
+            logger.warning("Group commit of %d writes failed; retrying individually", len(batch))
+            self._commit_individually(batch)
+            return
+        session.close()
+        self.batches += 1
+        self.writes += len(results)
+        for future, result in results:
+            future.set_result(result)
+
+    def _commit_individually(self, batch):
+        for future, op in batch:
+            session = self.session_factory(expire_on_commit=False)
+            try:
+                result = op(session)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            finally:
+                session.close()
+
+
+writer = None           # core database
+_tenant_writers = {}    # department -> GroupCommitWriter
+_lock = threading.Lock()
+
+
+def start():
+    global writer
+    if ENABLED and writer is None:
+        from database import SessionLocal
+        writer = GroupCommitWriter(SessionLocal)
+        writer.start()
+
+
+def stop():
+    global writer
+    with _lock:
+        writers = list(_tenant_writers.values())
+        _tenant_writers.clear()
+    for w in writers:
+        w.stop()
+    if writer is not None:
+        writer.stop()
+        writer = None
+
+
+def get_writer(tenant=None):
+    if tenant is None:
+        return writer
+    w = _tenant_writers.get(tenant)
+    if w is None:
+        import tenancy
+        factory = tenancy.session_factory(tenant)
+        with _lock:
+            w = _tenant_writers.get(tenant)
+            if w is None:
+                w = _tenant_writers[tenant] = GroupCommitWriter(factory)
+                w.start()
+    return w
+
+
+def run(op, tenant=None):
+    """Run through the group-commit writer and wait for the batch to be durable."""
+    future = get_writer(tenant).submit(op)
+    try:
+        return future.result(timeout=RESULT_TIMEOUT)
+    except TimeoutError:
+        if future.cancel():
+            # Still queued: the writer skips cancelled futures, so nothing was written.
+            raise HTTPException(
+                status_code=503, detail="Write not performed, the server is busy. Please retry.",
+                headers={"Retry-After": "1"},
+            )
+        raise HTTPException(
+            status_code=504,
+            detail="Write outcome unknown: it may still be committed. Check before retrying.",
+        )
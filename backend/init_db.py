@@ -1,8 +1,9 @@
 import random
 import string
 from sqlalchemy.orm import Session
-from database import engine, SessionLocal
+from database import get_engine, SessionLocal
 from models import Base, User
+import migrations
 from passlib.context import CryptContext
 
 # ✅ Synchronized hashing context with crud.py
@@ -13,7 +14,8 @@ def init_db():
     
     # ✅ Step 1: Create fresh database file and tables
     # SQLAlchemy will auto-create 'inventory.db' if it doesn't exist in the current directory.
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
+    migrations.upgrade(get_engine())
     
     db = SessionLocal()
     try:
@@ -0,0 +1,400 @@
+# backend/labels.py
+"""
+Print-ready PDF label sheets (barcode or QR code plus name and lab) for
+equipment.
+
+Each label is rendered to a small fragment of PDF drawing operators in its
+own coordinate space, so it can be placed anywhere on any page. Fragments
+are cached in an LRU keyed by (code, content hash). Reprinting labels whose
+name, lab, symbology and layout have not changed skips rendering entirely,
+and the sheet is just assembled from cached fragments.
+
+Cache misses are rendered in a ProcessPoolExecutor, one task per page, a few
+pages ahead of the page being written. The PDF is written incrementally
+(page objects first, the page tree and xref at the end), so the response
+streams page by page and memory stays flat however many labels are asked
+for.
+
+Code 128 is encoded here. QR codes use the optional `segno` package.
+"""
+import hashlib
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = int(os.getenv("INVENTORY_LABEL_CACHE_SIZE", "20000"))
+POOL_WORKERS = int(os.getenv("INVENTORY_LABEL_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Below this many cache misses the pool's start-up and pickling costs more
+# than it saves, so small sheets render in the request thread.
+POOL_THRESHOLD = 200
+PAGES_AHEAD = max(2, POOL_WORKERS * 2)
+
+SYMBOLOGIES = ("code128", "qr")
+
+# All sizes in PDF points (1/72 inch).
+Layout = namedtuple(
+    "Layout",
+    "page_width page_height columns rows label_width label_height left top h_gap v_gap",
+)
+
+LAYOUTS = {
+    # 3 x 8 on A4, 63.5 x 33.9 mm (Avery L7159 and compatibles)
+    "a4-24": Layout(595.28, 841.89, 3, 8, 180.0, 96.1, 20.5, 36.5, 7.1, 0.0),
+    # 3 x 10 on US Letter, 2.625 x 1 in (Avery 5160 and compatibles)
+    "letter-30": Layout(612.0, 792.0, 3, 10, 189.0, 72.0, 13.5, 36.0, 9.0, 0.0),
+}
+DEFAULT_LAYOUT = "a4-24"
+
+PADDING = 6.0
+
+
+# ==========================================
+#  CODE 128
+# ==========================================
+
+# Bar/space widths for symbol values 0-106 (106 is the stop pattern).
+_CODE128_PATTERNS = (
+    "212222", "222122", "222221", "121223", "121322", "131222", "122213", "122312",
+    "132212", "221213", "221312", "231212", "112232", "122132", "122231", "113222",
+    "123122", "123221", "223211", "221132", "221231", "213212", "223112", "312131",
+    "311222", "321122", "321221", "312212", "322112", "322211", "212123", "212321",
+    "232121", "111323", "131123", "131321", "112313", "132113", "132311", "211313",
+    "231113", "231311", "112133", "112331", "132131", "113123", "113321", "133121",
+    "313121", "211331", "231131", "213113", "213311", "213131", "311123", "311321",
+    "331121", "312113", "312311", "332111", "314111", "221411", "431111", "111224",
+    "111422", "121124", "121421", "141122", "141221", "112214", "112412", "122114",
+    "122411", "142112", "142211", "241211", "221114", "413111", "241112", "134111",
+    "111242", "121142", "121241", "114212", "124112", "124211", "411212", "421112",
+    "421211", "212141", "214121", "412121", "111143", "111341", "131141", "114113",
+    "114311", "411113", "411311", "113141", "114131", "311141", "411131", "211412",
+    "211214", "211232", "2331112",
+)
+_START_B, _START_C, _STOP = 104, 105, 106
+
+
+def code128_supported(text):
+    """Code set B covers printable ASCII, which is all we encode."""
+    return bool(text) and all(32 <= ord(ch) <= 126 for ch in text)
+
+
+def code128_values(text):
+    """Symbol values including start, checksum and stop."""
+    if not code128_supported(text):
+        raise ValueError(f"Cannot encode {text!r} as Code 128")
+    # Even-length digit strings pack two digits per symbol in code set C.
+    if len(text) >= 4 and len(text) % 2 == 0 and text.isdigit():
+        values = [_START_C] + [int(text[i:i + 2]) for i in range(0, len(text), 2)]
+    else:
+        values = [_START_B] + [ord(ch) - 32 for ch in text]
+    checksum = (values[0] + sum(i * v for i, v in enumerate(values[1:], start=1))) % 103
+    return values + [checksum, _STOP]
+
+
+def code128_widths(text):
+    """Alternating bar/space module widths, starting with a bar."""
+    return [int(w) for v in code128_values(text) for w in _CODE128_PATTERNS[v]]
+
+
+# ==========================================
+#  QR
+# ==========================================
+
+def qr_available():
+    try:
+        import segno  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def qr_matrix(text):
+    import segno
+    return segno.make(text, error="m", micro=False).matrix
+
+
+# ==========================================
+#  LABEL RENDERING (runs in worker processes)
+# ==========================================
+
+def _num(value):
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def _pdf_text(text, max_chars):
+    if len(text) > max_chars:
+        text = text[:max(max_chars - 1, 1)] + "~"
+    raw = text.encode("latin-1", "replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _text(font, size, x, y, text, width):
+    # Helvetica averages a little over half its size per character.
+    max_chars = int(width / (size * 0.55))
+    return b"BT /%s %s Tf %s %s Td (%s) Tj ET\n" % (
+        font.encode(), _num(size).encode(), _num(x).encode(), _num(y).encode(),
+        _pdf_text(text, max_chars),
+    )
+
+
+def _bars(x, y, module, height, widths):
+    ops, cursor = [], x
+    for i, w in enumerate(widths):
+        if i % 2 == 0:
+            ops.append(b"%s %s %s %s re\n" % (
+                _num(cursor).encode(), _num(y).encode(), _num(module * w).encode(), _num(height).encode(),
+            ))
+        cursor += module * w
+    ops.append(b"f\n")
+    return b"".join(ops)
+
+
+def _qr(x, y, size, matrix):
+    n = len(matrix)
+    module = size / n
+    ops = []
+    for r, row in enumerate(matrix):
+        top = y + size - (r + 1) * module
+        c = 0
+        while c < n:
+            if not row[c]:
+                c += 1
+                continue
+            start = c
+            while c < n and row[c]:
+                c += 1
+            ops.append(b"%s %s %s %s re\n" % (
+                _num(x + start * module).encode(), _num(top).encode(),
+                _num((c - start) * module).encode(), _num(module).encode(),
+            ))
+    ops.append(b"f\n")
+    return b"".join(ops)
+
+
+def render_label(code, name, lab, symbology, width, height):
+    """PDF operators for one label with its lower-left corner at (0, 0)."""
+    inner = width - 2 * PADDING
+    out = []
+    if symbology == "qr":
+        size = height - 2 * PADDING
+        out.append(_qr(PADDING, PADDING, size, qr_matrix(code)))
+        text_x = PADDING * 2 + size
+        text_w = width - text_x - PADDING
+        out.append(_text("F2", 8, text_x, height - PADDING - 8, name, text_w))
+        out.append(_text("F1", 7, text_x, height - PADDING - 19, code, text_w))
+        if lab:
+            out.append(_text("F1", 7, text_x, height - PADDING - 29, lab, text_w))
+        return b"".join(out)
+
+    widths = code128_widths(code)
+    modules = sum(widths) + 20  # 10-module quiet zone each side
+    module = min(inner / modules, 1.5)
+    bar_height = height * 0.45
+    bar_x = PADDING + (inner - module * modules) / 2 + 10 * module
+    bar_y = height - PADDING - bar_height
+    out.append(_bars(bar_x, bar_y, module, bar_height, widths))
+    out.append(_text("F1", 7, PADDING, bar_y - 9, code, inner))
+    out.append(_text("F2", 8, PADDING, bar_y - 19, name, inner))
+    if lab:
+        out.append(_text("F1", 7, PADDING, bar_y - 28, lab, inner))
+    return b"".join(out)
+
+
+def render_labels(specs):
+    """Pool task: render a list of (code, name, lab, symbology, width, height)."""
+    return [render_label(*spec) for spec in specs]
+
+
+# ==========================================
+#  CACHE AND POOL
+# ==========================================
+
+class LabelCache:
+    """Thread-safe LRU of (code, content hash) -> rendered fragment."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return fragment
+
+    def put(self, key, fragment):
+        with self._lock:
+            self._entries[key] = fragment
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+cache = LabelCache()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS)
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def cache_key(code, name, lab, symbology, layout_name):
+    content = "\0".join((name or "", lab or "", symbology, layout_name))
+    return code, hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+
+# ==========================================
+#  PDF ASSEMBLY
+# ==========================================
+
+class _PageJob:
+    __slots__ = ("fragments", "missing", "future")
+
+    def __init__(self, fragments, missing, future):
+        self.fragments = fragments   # list of bytes, None where not cached
+        self.missing = missing       # [(index, key)] for the None slots
+        self.future = future
+
+
+def _page_jobs(pages, symbology, layout_name, layout, use_pool):
+    """Yield each page's fragments, rendering up to PAGES_AHEAD pages in advance."""
+    pool = get_pool() if use_pool else None
+
+    def submit(page):
+        fragments, missing, specs = [], [], []
+        for code, name, lab in page:
+            key = cache_key(code, name, lab, symbology, layout_name)
+            fragment = cache.get(key)
+            if fragment is None:
+                missing.append((len(fragments), key))
+                specs.append((code, name or "", lab or "", symbology, layout.label_width, layout.label_height))
+            fragments.append(fragment)
+        future = pool.submit(render_labels, specs) if pool and specs else None
+        if future is None and specs:
+            rendered = render_labels(specs)
+            for (i, key), fragment in zip(missing, rendered):
+                fragments[i] = fragment
+                cache.put(key, fragment)
+            missing = []
+        return _PageJob(fragments, missing, future)
+
+    pages = iter(pages)
+    pending = deque(submit(page) for page in islice(pages, PAGES_AHEAD))
+    while pending:
+        job = pending.popleft()
+        for page in islice(pages, 1):
+            pending.append(submit(page))
+        if job.future is not None:
+            for (i, key), fragment in zip(job.missing, job.future.result()):
+                job.fragments[i] = fragment
+                cache.put(key, fragment)
+        yield job.fragments
+
+
+def _page_content(fragments, layout):
+    out = []
+    for slot, fragment in enumerate(fragments):
+        col, row = slot % layout.columns, slot // layout.columns
+        x = layout.left + col * (layout.label_width + layout.h_gap)
+        y = layout.page_height - layout.top - (row + 1) * layout.label_height - row * layout.v_gap
+        out.append(b"q 1 0 0 1 %s %s cm\n" % (_num(x).encode(), _num(y).encode()))
+        out.append(fragment)
+        out.append(b"Q\n")
+    return zlib.compress(b"".join(out), 6)
+
+
+def iter_pdf(items, symbology="code128", layout_name=DEFAULT_LAYOUT):
+    """
+    Yield a PDF for `items` [(code, name, lab), ...] in chunks, one page at a
+    time. Object layout: 1 catalog, 2 page tree, 3-4 fonts, then a content
+    stream and a page object per page.
+    """
+    layout = LAYOUTS[layout_name]
+    per_page = layout.columns * layout.rows
+    pages = [items[i:i + per_page] for i in range(0, len(items), per_page)]
+    page_count = len(pages)
+
+    misses = sum(
+        1 for code, name, lab in items
+        if cache_key(code, name, lab, symbology, layout_name) not in cache
+    )
+    use_pool = misses >= POOL_THRESHOLD
+
+    offsets = {}
+    position = 0
+
+    def emit(num, body):
+        nonlocal position
+        offsets[num] = position
+        chunk = b"%d 0 obj\n%s\nendobj\n" % (num, body)
+        position += len(chunk)
+        return chunk
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    position = len(header)
+    yield header + emit(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>") \
+        + emit(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    media_box = b"[0 0 %s %s]" % (_num(layout.page_width).encode(), _num(layout.page_height).encode())
+    for n, fragments in enumerate(_page_jobs(pages, symbology, layout_name, layout, use_pool)):
+        content_num, page_num = 5 + 2 * n, 6 + 2 * n
+        stream = _page_content(fragments, layout)
+        yield emit(content_num, b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream)) \
+            + emit(page_num, b"<< /Type /Page /Parent 2 0 R /MediaBox %s /Contents %d 0 R"
+                             b" /Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>" % (media_box, content_num))
+
+    kids = b" ".join(b"%d 0 R" % (6 + 2 * n) for n in range(page_count))
+    tail = emit(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, page_count)) \
+        + emit(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    size = 5 + 2 * page_count
+    xref = [b"xref\n0 %d\n" % size, b"0000000000 65535 f \n"]
+    xref += [b"%010d 00000 n \n" % offsets[num] for num in range(1, size)]
+    yield tail + b"".join(xref) + b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, position)
+
+
+def render_metrics():
+    """Prometheus lines for metrics.registry.collectors."""
+    return [
+        "# HELP label_cache_entries Rendered labels held in memory.",
+        "# TYPE label_cache_entries gauge",
+        f"label_cache_entries {len(cache)}",
+        "# HELP label_cache_hits_total Labels served from the cache.",
+        "# TYPE label_cache_hits_total counter",
+        f"label_cache_hits_total {cache.hits}",
+        "# HELP label_cache_misses_total Labels that had to be rendered.",
+        "# TYPE label_cache_misses_total counter",
+        f"label_cache_misses_total {cache.misses}",
+    ]
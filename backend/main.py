@@ -1,42 +1,68 @@
 import sys
 import io
 import os
-import pandas as pd
+import logging
+from contextlib import asynccontextmanager
 from typing import List, Optional
 from datetime import date
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Response
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Query, status, UploadFile, File, Form, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
 
-# 1. Force UTF-8 encoding to prevent console crashes on Windows
-if sys.stdout:
-    sys.stdout.reconfigure(encoding='utf-8')
-if sys.stderr:
-    sys.stderr.reconfigure(encoding='utf-8')
-
 # Import local modules
 import models
 import schemas
 import crud
-from database import engine, get_db, SessionLocal
+from database import get_engine, get_db, SessionLocal
+from tasks import PeriodicTask
+import user_sessions
+import group_commit
+import audit
+import bulk_import
+import labels
+import backup
+import archive
+import migrations
+import code_index
+import alerts
+import borrowers  # noqa: F401  (registers the ledger's session hooks)
+import reconcile
+import tenancy
+import warmup
 from routes import auth as auth_router
+from routes import system as system_router
+from routes import audit as audit_router
+from routes import labels as labels_router
+from routes import reports as reports_router
+from routes import alerts as alerts_router
+from routes import dashboard as dashboard_router
+from routes import stock as stock_router
+from routes import borrowers as borrowers_router
+import sql_profiling
+from responses import FastJSONResponse, dumps
+from compression import CompressionMiddleware
+import admission
+from metrics import MetricsMiddleware, registry as metrics_registry
 from routes.auth import get_current_user
 
-# ==========================================
-#  DATABASE AUTO-INITIALIZATION
-# ==========================================
-models.Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title="Department Lab Inventory API",
-    version="2.5.0"
-)
+# Importing this module has no side effects: the app object is built lazily by
+# create_app(), and the database and admin account are set up in its lifespan.
+# Heavy libraries (pandas) are imported inside the endpoints that need them.
+
+# run_server.py prepares the database in the parent process before spawning
+# workers and sets INVENTORY_DB_READY, so workers skip this step.
+DB_READY_ENV = "INVENTORY_DB_READY"
 
 # ==========================================
-#  STARTUP EVENT: CREATE ADMIN
+#  STARTUP: CREATE TABLES AND ADMIN
 # ==========================================
-@app.on_event("startup")
+def init_database():
+    """Create missing tables and columns once per installation."""
+    models.Base.metadata.create_all(bind=get_engine())
+    migrations.upgrade(get_engine())
+
 def startup_populate():
     """Ensures a new installation has a default admin account."""
     db = SessionLocal()
@@ -58,6 +84,52 @@ def startup_populate():
     finally:
         db.close()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup.reset()
+    with warmup.stage("database"):
+        get_engine()
+        if os.getenv(DB_READY_ENV) != "1":
+            init_database()
+            startup_populate()
+    # Caches and hot queries warm up in the background; the server binds without waiting.
+    warmup.start([
+        ("code_index", code_index.load_all),
+        ("alerts", alerts.load_all),
+        ("queries", dashboard_router.warm_queries),
+        ("passwords", crud.pwd_context.handler("bcrypt").get_backend),
+    ])
+
+    background = [
+        PeriodicTask("session-sweeper", user_sessions.SWEEP_INTERVAL_SECONDS, user_sessions.run_sweeper),
+        PeriodicTask("audit-flusher", audit.FLUSH_INTERVAL_SECONDS, audit.flush),
+    ]
+    background.append(PeriodicTask("alerts-overdue", alerts.TICK_SECONDS, alerts.tick))
+    if alerts.SYNC_INTERVAL_SECONDS > 0:
+        background.append(PeriodicTask("alerts-sync", alerts.SYNC_INTERVAL_SECONDS, alerts.sync))
+    if code_index.SYNC_INTERVAL_SECONDS > 0:
+        background.append(PeriodicTask("code-index-sync", code_index.SYNC_INTERVAL_SECONDS, code_index.sync))
+    if archive.ARCHIVE_AFTER_DAYS > 0:
+        background.append(
+            PeriodicTask("archiver", archive.INTERVAL_SECONDS, archive.run_scheduled, initial_delay=120)
+        )
+    if backup.INTERVAL_SECONDS > 0:
+        background.append(
+            PeriodicTask("db-backup", backup.CHECK_INTERVAL_SECONDS, backup.run_scheduled, initial_delay=60)
+        )
+    for task in background:
+        task.start()
+    group_commit.start()
+    try:
+        yield
+    finally:
+        await warmup.stop()
+        for task in background:
+            await task.stop()
+        group_commit.stop()
+        audit.flush()
+        labels.shutdown_pool()
+
 # ==========================================
 #  CORS CONFIGURATION (UPDATED FIX)
 # ==========================================
@@ -71,44 +143,76 @@ origins = [
     "https://www.lab-inventory-system-nu.vercel.app"    # With www just in case
 ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins, 
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.include_router(auth_router.router)
+router = APIRouter()
 
 # ==========================================
 #  EQUIPMENT ENDPOINTS
 # ==========================================
+# The list endpoints read plain rows and return a FastJSONResponse directly.
+# response_model stays for the OpenAPI schema, but FastAPI does not
+# re-validate a returned Response, which is where most of the CPU went on
+# large tables.
+#
+# ?fields=id,name,code narrows the SELECT column list itself, so a table
+# view that shows four columns reads and encodes four columns.
 
-@app.get("/equipments", response_model=List[schemas.Equipment])
-def read_equipments(db: Session = Depends(get_db)):
-    return crud.get_all_equipment(db)
+FIELDS_QUERY = Query(None, description="Comma-separated fields to return, e.g. id,name,code. Default: all.")
 
-@app.post("/equipments", response_model=schemas.Equipment, status_code=201)
+def _columns(fields, columns):
+    try:
+        return crud.parse_fields(fields, columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/equipments", response_model=List[schemas.Equipment])
+def read_equipments(fields: Optional[str] = FIELDS_QUERY, tenant: Optional[str] = Depends(tenancy.request_tenant), db: Session = Depends(get_db)):
+    columns = _columns(fields, crud.EQUIPMENT_COLUMNS)
+    if code_index.SERVE_LISTS:
+        # Cached body from the in-memory snapshot; the session is never used.
+        return Response(content=code_index.list_body(columns, tenant), media_type="application/json")
+    return FastJSONResponse(crud.get_all_equipment_rows(db, columns))
+
+@router.post("/equipments", response_model=schemas.Equipment, status_code=201)
 def create_equipment(equipment_in: schemas.EquipmentCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    return crud.create_equipment(db, equipment_in)
+    if group_commit.writer:
+        return group_commit.run(lambda s: crud.create_equipment(s, equipment_in, commit=False, actor=current_user.username), db.info.get("tenant"))
+    return crud.create_equipment(db, equipment_in, actor=current_user.username)
 
-@app.put("/equipments/{equipment_id}", response_model=schemas.Equipment)
+# Scan lookups are answered from code_index without opening a session. They
+# are declared before the /equipments/{equipment_id} routes.
+
+@router.get("/equipments/by-code/{code:path}", response_model=schemas.Equipment)
+def read_equipment_by_code(code: str, tenant: Optional[str] = Depends(tenancy.request_tenant)):
+    body = code_index.lookup(code, tenant)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+    return Response(content=body, media_type="application/json")
+
+@router.post("/equipments/by-code", response_model=schemas.CodeLookupResult)
+def read_equipments_by_code(lookup: schemas.CodeLookup, tenant: Optional[str] = Depends(tenancy.request_tenant)):
+    if len(lookup.codes) > code_index.MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {code_index.MAX_BATCH} codes per request")
+    found, missing = code_index.lookup_many(lookup.codes, tenant)
+    body = b'{"items":[' + b",".join(found) + b'],"missing":' + dumps(missing) + b"}"
+    return Response(content=body, media_type="application/json")
+
+@router.put("/equipments/{equipment_id}", response_model=schemas.Equipment)
 def update_equipment(equipment_id: int, equipment_in: schemas.EquipmentCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    db_item = db.query(models.Equipment).filter(models.Equipment.id == equipment_id).first()
+    # PUT replaces every field, so all of them count as explicitly set;
+    # except reorder_threshold, which clients that predate it leave out.
+    fields = equipment_in.dict()
+    if "reorder_threshold" not in equipment_in.model_fields_set:
+        del fields["reorder_threshold"]
+    db_item = crud.update_equipment(
+        db, equipment_id, schemas.EquipmentUpdate(**fields), actor=current_user.username
+    )
     if not db_item:
         raise HTTPException(status_code=404, detail="Equipment not found")
-    
-    for key, value in equipment_in.dict().items():
-        setattr(db_item, key, value)
-    
-    db.commit()
-    db.refresh(db_item)
     return db_item
 
-@app.delete("/equipments/{equipment_id}")
+@router.delete("/equipments/{equipment_id}")
 def delete_equipment(equipment_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    if not crud.delete_equipment(db, equipment_id):
+    if not crud.delete_equipment(db, equipment_id, actor=current_user.username):
         raise HTTPException(status_code=404, detail="Equipment not found")
     return {"detail": "Equipment deleted"}
 
@@ -116,57 +220,67 @@ def delete_equipment(equipment_id: int, db: Session = Depends(get_db), current_u
 #  MAINTENANCE ENDPOINTS
 # ==========================================
 
-@app.get("/maintenance", response_model=List[schemas.Maintenance])
-def read_maintenance(db: Session = Depends(get_db)):
-    return crud.get_maintenance_records(db)
+@router.get("/maintenance", response_model=List[schemas.Maintenance])
+def read_maintenance(include_archived: bool = False, fields: Optional[str] = FIELDS_QUERY, db: Session = Depends(get_db)):
+    columns = _columns(fields, crud.MAINTENANCE_COLUMNS)
+    return FastJSONResponse(crud.get_maintenance_rows(db, include_archived, columns))
 
-@app.post("/maintenance", response_model=schemas.Maintenance, status_code=201)
+@router.post("/maintenance", response_model=schemas.Maintenance, status_code=201)
 def create_maintenance(maint_in: schemas.MaintenanceCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
     try:
-        return crud.create_maintenance(db, maint_in)
+        if group_commit.writer:
+            return group_commit.run(lambda s: crud.create_maintenance(s, maint_in, commit=False, actor=current_user.username), db.info.get("tenant"))
+        return crud.create_maintenance(db, maint_in, actor=current_user.username)
+    except HTTPException:
+        raise  # group commit's 503/504 must reach the client as-is
     except Exception as e:
         print(f"CRITICAL MAINTENANCE ERROR: {e}")
         raise HTTPException(status_code=400, detail=f"Database Error: {str(e)}")
 
-@app.put("/maintenance/{maintenance_id}", response_model=schemas.Maintenance)
+@router.put("/maintenance/{maintenance_id}", response_model=schemas.Maintenance)
 def update_maintenance(maintenance_id: int, maint_in: schemas.MaintenanceCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    db_item = db.query(models.Maintenance).filter(models.Maintenance.id == maintenance_id).first()
+    db_item = crud.update_maintenance(db, maintenance_id, maint_in, actor=current_user.username)
     if not db_item:
         raise HTTPException(status_code=404, detail="Maintenance record not found")
-    
-    # Update fields manually
-    for key, value in maint_in.dict().items():
-        setattr(db_item, key, value)
-    
-    db.commit()
-    db.refresh(db_item)
     return db_item
 
-@app.delete("/maintenance/{maintenance_id}")
+@router.delete("/maintenance/{maintenance_id}")
 def delete_maintenance(maintenance_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    db_item = db.query(models.Maintenance).filter(models.Maintenance.id == maintenance_id).first()
-    if not db_item:
+    if not crud.delete_maintenance(db, maintenance_id, actor=current_user.username):
         raise HTTPException(status_code=404, detail="Maintenance record not found")
-    
-    db.delete(db_item)
-    db.commit()
     return {"detail": "Maintenance record deleted"}
 
 # ==========================================
 #  ISSUE RECORDS ENDPOINTS
 # ==========================================
-@app.get("/issues", response_model=List[schemas.IssueRecord])
-def read_issues(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    return crud.get_issue_records(db)
+@router.get("/issues", response_model=List[schemas.IssueRecord])
+def read_issues(include_archived: bool = False, fields: Optional[str] = FIELDS_QUERY, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    columns = _columns(fields, crud.ISSUE_COLUMNS)
+    return FastJSONResponse(crud.get_issue_record_rows(db, include_archived, columns))
 
-@app.post("/issues", response_model=schemas.IssueRecord, status_code=201)
+@router.post("/issues", response_model=schemas.IssueRecord, status_code=201)
 def create_issue(issue_in: schemas.IssueRecordCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    return crud.create_issue_record(db, issue_in)
+    if group_commit.writer:
+        return group_commit.run(lambda s: crud.create_issue_record(s, issue_in, commit=False, actor=current_user.username), db.info.get("tenant"))
+    return crud.create_issue_record(db, issue_in, actor=current_user.username)
+
+@router.put("/issues/{issue_id}", response_model=schemas.IssueRecord)
+def update_issue(issue_id: int, issue_in: schemas.IssueRecordCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    db_item = crud.update_issue_record(db, issue_id, issue_in, actor=current_user.username)
+    if not db_item:
+        raise HTTPException(status_code=404, detail="Issue record not found")
+    return db_item
+
+@router.delete("/issues/{issue_id}")
+def delete_issue(issue_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    if not crud.delete_issue_record(db, issue_id, actor=current_user.username):
+        raise HTTPException(status_code=404, detail="Issue record not found")
+    return {"detail": "Issue record deleted"}
 
 # ==========================================
 #  CSV EXPORT & UPLOAD
 # ==========================================
-@app.get("/equipment/export-csv")
+@router.get("/equipment/export-csv")
 def export_equipment_csv(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
     equipments = db.query(models.Equipment).execution_options(populate_existing=True).all()
     data = [{"ID": i.id, "Name": i.name, "Code": i.code, "Category": i.category, "Lab": i.lab, "Total": i.total_qty, "Available": i.available_qty, "Status": i.status} for i in equipments]
@@ -174,6 +288,7 @@ def export_equipment_csv(db: Session = Depends(get_db), current_user: models.Use
     if not data:
         raise HTTPException(status_code=404, detail="No equipment data found")
 
+    import pandas as pd
     df = pd.DataFrame(data)
     stream = io.StringIO()
     df.to_csv(stream, index=False)
@@ -182,29 +297,42 @@ def export_equipment_csv(db: Session = Depends(get_db), current_user: models.Use
     response.headers["Content-Disposition"] = "attachment; filename=verified_inventory.csv"
     return response
 
-@app.post("/equipment/bulk-upload")
-async def bulk_upload_equipment(file: UploadFile = File(...), db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="File must be a CSV")
-    content = await file.read()
+@router.post("/equipment/bulk-upload")
+def bulk_upload_equipment(
+    file: UploadFile = File(...),
+    mapping: Optional[str] = Form(None),
+    sheet: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Import equipment from a .csv or .xlsx file, upserting by code. `mapping`
+    is an optional JSON object of {column header: field}; `sheet` picks an
+    Excel worksheet (default: the first). Runs in the threadpool and streams
+    rows, see bulk_import.py.
+    """
+    if not file.filename.lower().endswith(bulk_import.SUPPORTED_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="File must be a CSV or Excel (.xlsx) file")
+
     try:
-        df = pd.read_csv(io.BytesIO(content))
-        df.columns = df.columns.str.strip().str.lower()
-    except Exception:
-        raise HTTPException(status_code=400, detail="Could not read CSV file")
-
-    new_items = []
-    for index, row in df.iterrows():
-        name = str(row.get('name', '')).strip()
-        if not name or name == "nan": continue
-        qty = int(row.get('total_qty', 0))
-        new_items.append(models.Equipment(
-            name=name, code=str(row.get('code', '')).strip(), category=str(row.get('category', 'General')),
-            lab=str(row.get('lab', 'Main Lab')), total_qty=qty, available_qty=qty, status=str(row.get('status', 'Available')).strip()
-        ))
-    db.add_all(new_items)
-    db.commit()
-    return {"message": f"Successfully uploaded {len(new_items)} items"}
+        column_mapping = bulk_import.parse_mapping(mapping)
+        valid, messages, _ = bulk_import.validate(
+            bulk_import.iter_rows(file.file, file.filename, sheet), column_mapping
+        )
+        if messages:
+            raise HTTPException(status_code=422, detail={"messages": messages})
+        created, updated = bulk_import.import_rows(
+            db, bulk_import.iter_rows(file.file, file.filename, sheet), column_mapping,
+            actor=current_user.username,
+        )
+    except bulk_import.BulkImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "message": f"Successfully uploaded {valid} items",
+        "created": created,
+        "updated": updated,
+    }
 
 # ==========================================
 #  SERVE STATIC FRONTEND
@@ -222,13 +350,64 @@ def get_frontend_path():
     elif os.path.exists(path_local): return path_local
     return None
 
-static_dir = get_frontend_path()
-if static_dir:
-    print(f" Frontend files detected at: {static_dir}")
-    app.mount("/", StaticFiles(directory=static_dir, html=True), name="static")
-else:
-    print(f" ERROR: Cannot find 'dist' folder. Dashboard UI will not load.")
+def create_app() -> FastAPI:
+    """Build the application. Nothing touches the database until startup."""
+    app = FastAPI(
+        title="Department Lab Inventory API",
+        version="2.5.0",
+        lifespan=lifespan,
+    )
+
+    # Inside CORS, so load-shedding responses still carry CORS headers.
+    app.add_middleware(admission.AdmissionMiddleware)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(CompressionMiddleware)
+    app.add_middleware(sql_profiling.QueryProfilingMiddleware)
+    # Outermost, so it also times CORS handling and sees every response.
+    app.add_middleware(MetricsMiddleware)
+    for collector in (sql_profiling.render_metrics, admission.render_metrics, labels.render_metrics,
+                      backup.render_metrics, code_index.render_metrics, archive.render_metrics,
+                      alerts.render_metrics, warmup.render_metrics, reconcile.render_metrics):
+        if collector not in metrics_registry.collectors:
+            metrics_registry.collectors.append(collector)
+
+    app.include_router(system_router.router)
+    app.include_router(auth_router.router)
+    app.include_router(audit_router.router)
+    app.include_router(labels_router.router)
+    app.include_router(reports_router.router)
+    app.include_router(alerts_router.router)
+    app.include_router(dashboard_router.router)
+    app.include_router(stock_router.router)
+    app.include_router(borrowers_router.router)
+    app.include_router(router)
+
+    static_dir = get_frontend_path()
+    if static_dir:
+        from static_files import PrecompressedStaticFiles
+        logger.info("Frontend files detected at: %s", static_dir)
+        app.mount("/", PrecompressedStaticFiles(directory=static_dir, html=True), name="static")
+    else:
+        logger.warning("Cannot find 'dist' folder. Dashboard UI will not load.")
+
+    return app
+
+
+def __getattr__(name):
+    # `uvicorn main:app` and `from main import app` build the app on first
+    # access, so importing main (e.g. from tests or tools) stays side-effect free.
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    from run_server import main as serve
+    serve()
@@ -0,0 +1,152 @@
+# backend/metrics.py
+"""
+Request metrics as a pure ASGI middleware, rendered in the Prometheus text
+exposition format at /metrics.
+
+Everything is updated from the event loop thread only, so the counters need
+no locks. Routes are labelled by their path template ("/equipments/{equipment_id}")
+rather than the raw URL, which keeps label cardinality bounded.
+"""
+from bisect import bisect_left
+from time import perf_counter
+
+# Seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bytes
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.latency = {}    # (method, route) -> Histogram
+        self.sizes = {}      # (method, route) -> Histogram
+        self.statuses = {}   # (method, route, status) -> count
+        self.in_flight = 0
+        # Extra text blocks appended to the output by other subsystems.
+        self.collectors = []
+
+    def observe(self, method, route, status, duration, size):
+        key = (method, route)
+        hist = self.latency.get(key)
+        if hist is None:
+            hist = self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.sizes[key] = Histogram(SIZE_BUCKETS)
+        hist.observe(duration)
+        self.sizes[key].observe(size)
+        skey = (method, route, status)
+        self.statuses[skey] = self.statuses.get(skey, 0) + 1
+
+    def render(self):
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Completed requests by route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(self.statuses.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+
+        _render_histograms(lines, "http_request_duration_seconds",
+                           "Request latency by route.", self.latency)
+        _render_histograms(lines, "http_response_size_bytes",
+                           "Response body size by route.", self.sizes)
+
+        for collector in self.collectors:
+            lines.extend(collector())
+        lines.append("")
+        return "\n".join(lines)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _render_histograms(lines, name, help_text, histograms):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for (method, route), hist in sorted(histograms.items()):
+        labels = f'method="{method}",route="{_escape(route)}"'
+        cumulative = 0
+        for bound, count in zip(hist.bounds, hist.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+        lines.append(f"{name}_sum{{{labels}}} {hist.sum}")
+        lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, size and status per route."""
+
+    def __init__(self, app, registry=registry, exclude_paths=("/metrics",)):
+        self.app = app
+        self.registry = registry
+        self.exclude_paths = frozenset(exclude_paths)
+        self._route_names = {}
+        self._route_count = -1
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        registry = self.registry
+        registry.in_flight += 1
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.in_flight -= 1
+            registry.observe(scope["method"], self.route_name(scope), status,
+                             perf_counter() - started, size)
+
+    def route_name(self, scope):
+        """Path template of the matched route, resolved after routing ran."""
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        app = scope.get("app")
+        routes = getattr(app, "routes", ())
+        if len(routes) != self._route_count:
+            self._route_names = {}
+            for r in routes:
+                target = getattr(r, "endpoint", None) or getattr(r, "app", None)
+                if target is not None:
+                    self._route_names[target] = r.path or "/"
+            self._route_count = len(routes)
+        return self._route_names.get(endpoint, UNMATCHED_ROUTE)
@@ -0,0 +1,130 @@
+# backend/migrations.py
+"""
+Additive schema changes for existing databases.
+
+create_all() creates missing tables but never alters existing ones, so a
+column added to a model after a database was created is listed here and
+added with ALTER TABLE at startup. SQLite adds a column with a constant
+default without rewriting the table, so this is instant even on large
+databases.
+
+Indexes declared on the models are created the same way when missing, and
+borrowers.backfill() links issue records written before (or without) the
+borrower ledger.
+
+Tables listed in AUTOINCREMENT are the exception to "never rewritten".
+archive.py moves their rows out while keeping the ids, so new rows must
+never reuse an id, even after the newest row is deleted. Only AUTOINCREMENT
+guarantees that, and SQLite cannot add it to an existing table. A table
+created without it is rebuilt once, in the same transaction: create, copy,
+drop, rename. Its sequence is then set past the highest id in both the
+table and its archive.
+
+TRIGGERS are created when missing. They log every written equipment row to
+equipment_changes for code_index.py, and keep only the newest
+EQUIPMENT_CHANGES_KEPT entries.
+"""
+import re
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateTable
+
+# (table, column, column definition). Append only; never reorder or remove.
+COLUMNS = [
+    ("users", "department", "VARCHAR"),
+    ("equipment", "reorder_threshold", "INTEGER"),
+    ("issue_records", "borrower_id", "INTEGER"),
+    ("issue_records_archive", "borrower_id", "INTEGER"),
+]
+
+# (table, its archive table) whose ids must never be reused; see archive.py.
+AUTOINCREMENT = [
+    ("issue_records", "issue_records_archive"),
+    ("maintenance", "maintenance_archive"),
+]
+
+EQUIPMENT_CHANGES_KEPT = 10000
+
+TRIGGERS = {
+    "equipment_changes_insert":
+        "AFTER INSERT ON equipment BEGIN "
+        "INSERT INTO equipment_changes (equipment_id) VALUES (NEW.id); END",
+    "equipment_changes_update":
+        "AFTER UPDATE ON equipment BEGIN "
+        "INSERT INTO equipment_changes (equipment_id) VALUES (NEW.id); "
+        "INSERT INTO equipment_changes (equipment_id) SELECT OLD.id WHERE OLD.id IS NOT NEW.id; END",
+    "equipment_changes_delete":
+        "AFTER DELETE ON equipment BEGIN "
+        "INSERT INTO equipment_changes (equipment_id) VALUES (OLD.id); END",
+    "equipment_changes_prune":
+        "AFTER INSERT ON equipment_changes BEGIN "
+        f"DELETE FROM equipment_changes WHERE seq <= NEW.seq - {EQUIPMENT_CHANGES_KEPT}; END",
+}
+
+
+def _rebuild_with_autoincrement(conn, table, archive):
+    """Recreate `table` with AUTOINCREMENT (without its indexes; upgrade() adds those back)."""
+    rebuilt = f"{table.name}__rebuild"
+    ddl = str(CreateTable(table).compile(dialect=conn.dialect))
+    conn.execute(text(re.sub(rf"CREATE TABLE {table.name} ", f"CREATE TABLE {rebuilt} ", ddl, count=1)))
+    columns = ", ".join(c.name for c in table.columns)
+    conn.execute(text(f"INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {table.name}"))
+    conn.execute(text(f"DROP TABLE {table.name}"))
+    conn.execute(text(f"ALTER TABLE {rebuilt} RENAME TO {table.name}"))
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": table.name})
+    conn.execute(text(
+        f"INSERT INTO sqlite_sequence (name, seq) SELECT :name, max("
+        f"(SELECT coalesce(max(id), 0) FROM {table.name}), (SELECT coalesce(max(id), 0) FROM {archive}))"
+    ), {"name": table.name})
+
+
+def upgrade(engine):
+    """Add any missing columns and indexes. Returns the list of "table.column" added."""
+    from database import Base
+
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    existing = {}
+    added = []
+    with engine.begin() as conn:
+        for table, column, definition in COLUMNS:
+            if table not in tables:
+                continue  # create_all() builds new tables with every column
+            if table not in existing:
+                existing[table] = {c["name"] for c in inspector.get_columns(table)}
+            if column in existing[table]:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+            existing[table].add(column)
+            added.append(f"{table}.{column}")
+        for name, archive in AUTOINCREMENT:
+            if name not in tables or archive not in tables:
+                continue
+            sql = conn.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name}
+            ).scalar()
+            if "AUTOINCREMENT" not in sql.upper():
+                _rebuild_with_autoincrement(conn, Base.metadata.tables[name], archive)
+                added.append(f"{name} AUTOINCREMENT")
+        triggers = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))}
+        if {"equipment", "equipment_changes"} <= tables:
+            for name, body in TRIGGERS.items():
+                if name not in triggers:
+                    conn.execute(text(f"CREATE TRIGGER {name} {body}"))
+        # Looked up by name: SQLAlchemy does not reflect expression indexes.
+        indexes = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+        for table in Base.metadata.sorted_tables:
+            if table.name in tables:
+                for index in table.indexes:
+                    if index.name not in indexes:
+                        index.create(conn)
+    for name in added:
+        print(f"Added {name}")
+
+    # Data step for issue_records.borrower_id: link records that predate it.
+    import borrowers
+
+    linked = borrowers.backfill(engine)
+    if linked:
+        print(f"Linked {linked} issue records to borrowers")
+    return added
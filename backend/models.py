@@ -1,5 +1,5 @@
 # backend/models.py
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Float
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Float, Index, Text, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -18,8 +18,9 @@ class User(Base):
     recovery_code = Column(String, nullable=True)  # 4-digit code for password recovery
     created_at = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Integer, default=1)  # 1 for active, 0 for inactive
+    department = Column(String, nullable=True)  # tenancy.py; default routing only, None = default department
     
-    # Remember me functionality
+    # Legacy remember-me columns, superseded by the user_sessions table
     remember_token = Column(String, nullable=True)
     token_expiry = Column(DateTime, nullable=True)
 
@@ -35,14 +36,30 @@ class Equipment(Base):
     total_qty = Column(Integer, default=0)
     available_qty = Column(Integer, default=0)
     status = Column(String, default="available")          # available / issued / faulty
+    reorder_threshold = Column(Integer, nullable=True)    # low-stock alert below this (alerts.py)
 
     # Relations
     issues = relationship("IssueRecord", back_populates="equipment")
     maintenance_records = relationship("Maintenance", back_populates="equipment")
 
 
+class EquipmentChange(Base):
+    """
+    Ids of changed equipment rows, one entry per row written, filled by
+    triggers that migrations.py creates on the equipment table. code_index.py
+    reads it to catch up with writes from any connection or process.
+    """
+    __tablename__ = "equipment_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = Column(Integer, primary_key=True)
+    equipment_id = Column(Integer, nullable=False)
+
+
 class IssueRecord(Base):
     __tablename__ = "issue_records"
+    # Archived rows keep their ids, so ids are never reused (see archive.py).
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     equipment_id = Column(Integer, ForeignKey("equipment.id"))
@@ -52,12 +69,19 @@ class IssueRecord(Base):
     issue_date = Column(String, nullable=False)           # Keep as string (simple)
     return_date = Column(String, nullable=True)
     status = Column(String, default="issued")             # issued / returned
+    borrower_id = Column(Integer, ForeignKey("borrowers.id"), nullable=True, index=True)  # set by borrowers.py
 
     equipment = relationship("Equipment", back_populates="issues")
 
 
+# Open issues by due date, for loading the overdue queue in alerts.py.
+# Status is compared case-insensitively ("Issued" from the UI, "issued" from the API).
+Index("ix_issue_records_open_due", func.lower(IssueRecord.status), IssueRecord.return_date)
+
+
 class Maintenance(Base):
     __tablename__ = "maintenance"
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     equipment_id = Column(Integer, ForeignKey("equipment.id"))
@@ -71,4 +95,85 @@ class Maintenance(Base):
     # ✅ FIX: Added the missing Cost column
     cost = Column(Float, default=0.0)
 
-    equipment = relationship("Equipment", back_populates="maintenance_records")
\ No newline at end of file
+    equipment = relationship("Equipment", back_populates="maintenance_records")
+
+# Closed issue and maintenance records older than archive.ARCHIVE_AFTER_DAYS
+# are moved here by archive.py, keeping the same ids and columns.
+
+class IssueRecordArchive(Base):
+    __tablename__ = "issue_records_archive"
+
+    id = Column(Integer, primary_key=True)
+    equipment_id = Column(Integer, index=True)
+    issued_to = Column(String, nullable=False)
+    issued_lab = Column(String, nullable=False)
+    quantity = Column(Integer, default=1)
+    issue_date = Column(String, nullable=False)
+    return_date = Column(String, nullable=True)
+    status = Column(String, default="returned")
+    borrower_id = Column(Integer, nullable=True, index=True)  # for the borrower ledger
+    archived_at = Column(DateTime, nullable=False)
+
+
+class MaintenanceArchive(Base):
+    __tablename__ = "maintenance_archive"
+
+    id = Column(Integer, primary_key=True)
+    equipment_id = Column(Integer, index=True)
+    fault_description = Column(String, nullable=False)
+    fault_date = Column(String, nullable=False)
+    sent_for_repair_date = Column(String, nullable=True)
+    return_from_repair_date = Column(String, nullable=True)
+    status = Column(String, default="completed")
+    remarks = Column(String, nullable=True)
+    cost = Column(Float, default=0.0)
+    archived_at = Column(DateTime, nullable=False)
+
+# One row per distinct IssueRecord.issued_to, and the open-issue summary per
+# borrower. Both are maintained by borrowers.py.
+
+class Borrower(Base):
+    __tablename__ = "borrowers"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)                 # as first written in an issue record
+    name_key = Column(String, nullable=False, unique=True, index=True)  # lower(trim(name))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class BorrowerOutstanding(Base):
+    __tablename__ = "borrower_outstanding"
+
+    borrower_id = Column(Integer, ForeignKey("borrowers.id"), primary_key=True)
+    items = Column(Integer, nullable=False)               # open issue records
+    quantity = Column(Integer, nullable=False)            # units still out
+    oldest_due = Column(String, nullable=True)            # earliest return_date among them
+
+class UserSession(Base):
+    """A remember-me login on one device. Only a SHA-256 of the token is stored."""
+    __tablename__ = "user_sessions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    user_agent = Column(String, nullable=True)
+
+
+class AuditEntry(Base):
+    """Append-only record of one inventory mutation. Written in batches by audit.py."""
+    __tablename__ = "audit_log"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, nullable=False, index=True)
+    actor = Column(String, nullable=True)                 # username, or None for system jobs
+    action = Column(String, nullable=False)               # create / update / delete
+    entity_type = Column(String, nullable=False)          # equipment / issue_record / maintenance / user
+    entity_id = Column(Integer, nullable=True)
+    changes = Column(Text, nullable=True)                 # JSON {field: [before, after]}
+
+    __table_args__ = (
+        Index("ix_audit_entity", "entity_type", "entity_id", "id"),
+        Index("ix_audit_actor", "actor", "id"),
+    )
@@ -0,0 +1,65 @@
+"""
+Write .br and .gz siblings for the frontend build, for static_files.py.
+
+Run after `vite build` and before packaging:
+
+    python precompress_assets.py dist
+
+Only compressible files of at least MIN_SIZE bytes are processed, and a
+variant is kept only when it is actually smaller than the original.
+Brotli output needs the optional `brotli` package; gzip always works.
+"""
+import argparse
+import gzip
+import os
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_SIZE = 1024
+EXTENSIONS = {".html", ".js", ".mjs", ".css", ".json", ".svg", ".txt", ".map", ".xml", ".ico", ".wasm"}
+
+
+def _write_if_smaller(path, original_size, data):
+    if len(data) >= original_size:
+        if os.path.exists(path):
+            os.remove(path)
+        return False
+    with open(path, "wb") as f:
+        f.write(data)
+    return True
+
+
+def precompress(root):
+    written = 0
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if os.path.splitext(filename)[1].lower() not in EXTENSIONS:
+                continue
+            path = os.path.join(dirpath, filename)
+            with open(path, "rb") as f:
+                data = f.read()
+            if len(data) < MIN_SIZE:
+                continue
+            written += _write_if_smaller(path + ".gz", len(data), gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                written += _write_if_smaller(path + ".br", len(data), brotli.compress(data, quality=11))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", nargs="?", default="dist")
+    args = parser.parse_args()
+    if not os.path.isdir(args.root):
+        sys.exit(f"{args.root} is not a directory")
+    if brotli is None:
+        print("brotli not installed; writing .gz variants only")
+    print(f"wrote {precompress(args.root)} precompressed files under {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+# backend/ratelimit.py
+"""
+Sliding-window attempt limiter for the login and password-recovery routes.
+
+Each key ("ip:1.2.3.4", "user:alice") keeps two fixed-window counters, the
+current and the previous one. The previous window's count is weighted by
+how much of it still overlaps the sliding window. That takes O(1) memory per
+key and gives a close approximation of a true sliding log.
+
+Every attempt first reserves a slot with acquire(), *before* any password
+hashing, so a rejected attempt costs a dictionary lookup instead of a bcrypt
+verify. The check and the increment are one atomic step in the backend, so
+a burst of parallel attempts cannot all pass the check before any of them
+is counted. A rejected attempt takes no slot. A successful one gives its
+slot back with release(), so legitimate users are not locked out by their
+own successes; a failed one keeps it.
+
+Per-IP keys use request.client.host. Behind a reverse proxy that is the
+proxy's address unless uvicorn trusts the proxy's X-Forwarded-For header:
+run_server.py passes --forwarded-allow-ips (INVENTORY_FORWARDED_ALLOW_IPS,
+default 127.0.0.1) through to uvicorn for that.
+
+State lives in a pluggable backend:
+  * MemoryBackend - per process, LRU-bounded (default)
+  * SQLiteBackend - a small SQLite file in the data directory, shared by all
+                    workers on the machine (INVENTORY_RATELIMIT_BACKEND=sqlite)
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def _roll(state, now, window):
+    """Advance (window_start, current, previous) so `now` falls in the current window."""
+    start, current, previous = state
+    periods = int((now - start) // window)
+    if periods >= 1:
+        previous = current if periods == 1 else 0
+        current = 0
+        start += periods * window
+    return start, current, previous
+
+
+def _estimate(state, now, window):
+    start, current, previous = state
+    elapsed = now - start
+    return previous * (1 - elapsed / window) + current
+
+
+def _seconds_until_allowed(state, now, window, limit):
+    start, current, previous = state
+    elapsed = now - start
+    if previous * (1 - elapsed / window) + current < limit:
+        return 0.0
+    # Still inside the current window: the previous window's weight decays.
+    if previous > 0 and limit - current > 0:
+        t = window * (1 - (limit - current) / previous) - elapsed
+        if t < window - elapsed:
+            return max(t, 0.0)
+    # Otherwise wait for the next window, where `current` becomes the decaying part.
+    t_next = window * (1 - limit / current) if current > limit else 0.0
+    return (window - elapsed) + max(t_next, 0.0)
+
+
+def _uncount(state):
+    """Remove one attempt, from the previous window if the current one has none left."""
+    start, current, previous = state
+    if current:
+        return start, current - 1, previous
+    return start, current, max(previous - 1, 0)
+
+
+class MemoryBackend:
+    """Per-process state with LRU eviction once `maxsize` keys are tracked."""
+
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now, window):
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return None
+            self._states.move_to_end(key)
+            return _roll(state, now, window)
+
+    def acquire(self, key, now, window, limit):
+        """Count an attempt if the key has one left; returns seconds to wait otherwise (0 when counted)."""
+        with self._lock:
+            state = _roll(self._states.get(key) or (now, 0, 0), now, window)
+            wait = _seconds_until_allowed(state, now, window, limit)
+            if not wait:
+                start, current, previous = state
+                state = (start, current + 1, previous)
+            self._states[key] = state
+            self._states.move_to_end(key)
+            while len(self._states) > self.maxsize:
+                self._states.popitem(last=False)
+            return wait
+
+    def release(self, key, now, window):
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None:
+                self._states[key] = _uncount(_roll(state, now, window))
+
+    def delete(self, key):
+        with self._lock:
+            self._states.pop(key, None)
+
+
+class SQLiteBackend:
+    """
+    State shared between worker processes through a local SQLite file.
+    A stand-in for an external store; rows older than two windows are pruned
+    on write and the table is capped at `maxsize` rows.
+    """
+
+    def __init__(self, path, maxsize=100_000):
+        self.path = path
+        self.maxsize = maxsize
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                " key TEXT PRIMARY KEY, window_start REAL, current INTEGER, previous INTEGER)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limits_start ON rate_limits (window_start)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, now, window):
+        row = self._connect().execute(
+            "SELECT window_start, current, previous FROM rate_limits WHERE key = ?", (key,)
+        ).fetchone()
+        return _roll(row, now, window) if row else None
+
+    def acquire(self, key, now, window, limit):
+        """As MemoryBackend.acquire; BEGIN IMMEDIATE makes the check and increment atomic across workers."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT window_start, current, previous FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+            state = _roll(row or (now, 0, 0), now, window)
+            wait = _seconds_until_allowed(state, now, window, limit)
+            if not wait:
+                start, current, previous = state
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (key, window_start, current, previous) VALUES (?, ?, ?, ?)",
+                    (key, start, current + 1, previous),
+                )
+                conn.execute("DELETE FROM rate_limits WHERE window_start < ?", (now - 2 * window,))
+                conn.execute(
+                    "DELETE FROM rate_limits WHERE key IN (SELECT key FROM rate_limits"
+                    " ORDER BY window_start DESC LIMIT -1 OFFSET ?)", (self.maxsize,)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def release(self, key, now, window):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT window_start, current, previous FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE rate_limits SET window_start = ?, current = ?, previous = ? WHERE key = ?",
+                    (*_uncount(_roll(row, now, window)), key),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key):
+        self._connect().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+
+class SlidingWindowLimiter:
+    def __init__(self, name, limit, window_seconds, backend):
+        self.name = name
+        self.limit = limit
+        self.window = window_seconds
+        self.backend = backend
+
+    def acquire(self, keys, now=None):
+        """
+        Count an attempt against every key. Returns 0 when it may proceed,
+        otherwise the seconds until it would be allowed; then nothing is
+        counted against any key.
+        """
+        now = time.time() if now is None else now
+        taken = []
+        for key in keys:
+            wait = self.backend.acquire(f"{self.name}:{key}", now, self.window, self.limit)
+            if wait:
+                self.release(taken, now)
+                return math.ceil(wait)
+            taken.append(key)
+        return 0
+
+    def release(self, keys, now=None):
+        """Give back attempts counted by acquire(), for attempts that succeeded."""
+        now = time.time() if now is None else now
+        for key in keys:
+            self.backend.release(f"{self.name}:{key}", now, self.window)
+
+    def reset(self, key):
+        self.backend.delete(f"{self.name}:{key}")
+
+
+def _make_backend():
+    maxsize = int(os.getenv("INVENTORY_RATELIMIT_MAX_KEYS", "100000"))
+    if os.getenv("INVENTORY_RATELIMIT_BACKEND", "memory") == "sqlite":
+        from database import get_user_data_dir
+        return SQLiteBackend(os.path.join(get_user_data_dir(), "ratelimit.db"), maxsize=maxsize)
+    return MemoryBackend(maxsize=maxsize)
+
+
+_backend = None
+_limiters = {}
+_lock = threading.Lock()
+
+# name -> (env var, default "attempts/window seconds")
+LIMITS = {
+    "login-user": ("INVENTORY_LOGIN_USER_LIMIT", "10/900"),
+    "login-ip": ("INVENTORY_LOGIN_IP_LIMIT", "50/900"),
+    "recovery-email": ("INVENTORY_RECOVERY_EMAIL_LIMIT", "5/900"),
+    "recovery-ip": ("INVENTORY_RECOVERY_IP_LIMIT", "20/900"),
+}
+
+
+def get_limiter(name):
+    """Limiters are created on first use so importing this module opens no files."""
+    global _backend
+    limiter = _limiters.get(name)
+    if limiter is not None:
+        return limiter
+    with _lock:
+        if _backend is None:
+            _backend = _make_backend()
+        if name not in _limiters:
+            env, default = LIMITS[name]
+            attempts, window = os.getenv(env, default).split("/")
+            _limiters[name] = SlidingWindowLimiter(name, int(attempts), float(window), _backend)
+    return _limiters[name]
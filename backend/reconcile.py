@@ -0,0 +1,168 @@
+# backend/reconcile.py
+"""
+Set-based stock reconciliation.
+
+crud.py's issue functions do not move Equipment.available_qty, so the stock
+figures drift. This recomputes them for a whole database in one statement:
+
+    UPDATE equipment SET available_qty = expected.expected_qty
+    FROM (SELECT e.id, max(e.total_qty - coalesce(o.qty, 0), 0) AS expected_qty, ...
+          FROM equipment e LEFT JOIN (SELECT equipment_id, sum(quantity) AS qty
+                                      FROM issue_records
+                                      WHERE lower(status) = 'issued'
+                                      GROUP BY equipment_id) o ON o.equipment_id = e.id) expected
+    WHERE equipment.id = expected.id AND equipment.available_qty IS NOT expected.expected_qty
+
+An issue record is outstanding while its status is "issued" in any case,
+the same rule the dashboard counts and alerts use. Archived records are all
+returned, so the archive tables are not read. Items issued beyond their
+total are set to 0; the report shows the outstanding quantity.
+
+The report of changed rows and the UPDATE run in one BEGIN IMMEDIATE
+transaction, together with one audit entry per changed row, so the report
+is exactly what was written. UPDATE ... FROM needs SQLite 3.33 or newer.
+
+From the API (POST /stock/reconcile) the equipment snapshot and alert state
+are reloaded afterwards. From the command line, a running desktop server
+only sees the new figures after a restart (multi-worker servers pick them
+up through INVENTORY_CODE_INDEX_SYNC / INVENTORY_ALERTS_SYNC):
+
+    python reconcile.py run [--dry-run] [--show 20]
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+
+import models
+
+# Rows changed by this process, for /metrics.
+reconciled_total = 0
+
+REPORT_COLUMNS = ("id", "code", "name", "total_qty", "available_qty", "expected_qty", "outstanding_qty")
+
+
+def _expected():
+    """Subquery: (id, expected_qty, outstanding_qty) for every equipment row with a total."""
+    issues = models.IssueRecord.__table__
+    # Aliased so the UPDATE below does not correlate it with its own target.
+    e = models.Equipment.__table__.alias("e")
+    outstanding = (
+        select(issues.c.equipment_id, func.sum(issues.c.quantity).label("qty"))
+        .where(func.lower(issues.c.status) == "issued")
+        .group_by(issues.c.equipment_id)
+        .subquery("outstanding")
+    )
+    out_qty = func.coalesce(outstanding.c.qty, 0)
+    return (
+        select(
+            e.c.id,
+            func.max(e.c.total_qty - out_qty, 0).label("expected_qty"),
+            out_qty.label("outstanding_qty"),
+        )
+        .select_from(e.outerjoin(outstanding, outstanding.c.equipment_id == e.c.id))
+        .where(e.c.total_qty.is_not(None))
+        .subquery("expected")
+    )
+
+
+def reconcile_database(engine, dry_run=False, actor=None):
+    """
+    Recompute available_qty in one database. Returns {"changed": n,
+    "items": [row, ...], "seconds": s}; each row has REPORT_COLUMNS, with
+    available_qty as it was before.
+    """
+    global reconciled_total
+    equipment = models.Equipment.__table__
+    expected = _expected()
+    differs = (equipment.c.id == expected.c.id) & equipment.c.available_qty.is_distinct_from(expected.c.expected_qty)
+    report = (
+        select(equipment.c.id, equipment.c.code, equipment.c.name, equipment.c.total_qty,
+               equipment.c.available_qty, expected.c.expected_qty, expected.c.outstanding_qty)
+        .where(differs)
+        .order_by(equipment.c.id)
+    )
+
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        # Take the write lock first, so nothing commits between the report and the UPDATE.
+        conn.exec_driver_sql("BEGIN" if dry_run else "BEGIN IMMEDIATE")
+        items = [dict(zip(REPORT_COLUMNS, row)) for row in conn.execute(report)]
+        if items and not dry_run:
+            conn.execute(update(equipment).where(differs).values(available_qty=expected.c.expected_qty))
+            now = datetime.utcnow()
+            conn.execute(models.AuditEntry.__table__.insert(), [
+                {
+                    "created_at": now,
+                    "actor": actor,
+                    "action": "update",
+                    "entity_type": "equipment",
+                    "entity_id": item["id"],
+                    "changes": json.dumps({"available_qty": [item["available_qty"], item["expected_qty"]]}),
+                }
+                for item in items
+            ])
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    if not dry_run:
+        reconciled_total += len(items)
+    return {"changed": len(items), "items": items, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def reconcile_tenant(tenant=None, dry_run=False, actor=None):
+    """reconcile_database for a department, then refresh this process's caches of it."""
+    import alerts
+    import audit
+    import code_index
+    import tenancy
+
+    # Entries still buffered from earlier writes go in first, so the trail stays in order.
+    audit.flush()
+    result = reconcile_database(tenancy.get_engine(tenant), dry_run, actor)
+    if result["changed"] and not dry_run:
+        code_index.reload(tenant)
+        alerts.reload(tenant)
+    return result
+
+
+def render_metrics():
+    """Prometheus lines for metrics.registry.collectors."""
+    return [
+        "# HELP stock_reconciled_rows_total Equipment rows whose available_qty was corrected by this process.",
+        "# TYPE stock_reconciled_rows_total counter",
+        f"stock_reconciled_rows_total {reconciled_total}",
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute available_qty from outstanding issue records.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="reconcile the core database and every department")
+    run.add_argument("--dry-run", action="store_true", help="only report what would change")
+    run.add_argument("--show", type=int, default=20, help="changed rows to print per database")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        import tenancy
+        from database import get_engine
+
+        models.Base.metadata.create_all(bind=get_engine())
+        verb = "Would correct" if args.dry_run else "Corrected"
+        for tenant in tenancy.all_tenants():
+            result = reconcile_database(tenancy.get_engine(tenant), args.dry_run, actor="reconcile")
+            print(f"{tenancy.display_name(tenant)}: {verb} {result['changed']} row(s) in {result['seconds']:.2f}s")
+            for item in result["items"][:args.show]:
+                print(f"  {item['code']:<20} {item['name'] or '':<30} available {item['available_qty']} -> "
+                      f"{item['expected_qty']} (total {item['total_qty']}, out {item['outstanding_qty']})")
+            if len(result["items"]) > args.show:
+                print(f"  ... and {len(result['items']) - args.show} more")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
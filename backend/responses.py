@@ -0,0 +1,28 @@
+# backend/responses.py
+"""
+JSON response class for the hot list endpoints.
+
+Those endpoints hand over plain dicts/lists that are already in their final
+shape, so the response skips FastAPI's jsonable_encoder pass and encodes in
+one call. orjson is used when installed; the stdlib fallback keeps the app
+working without it.
+"""
+import json
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,67 @@
+# backend/routes/alerts.py
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+import alerts
+import tenancy
+from models import User
+from responses import dumps
+from routes.auth import get_current_user, get_stream_user
+from schemas import AlertList
+
+router = APIRouter(prefix="/alerts", tags=["alerts"])
+
+HEARTBEAT_SECONDS = 15
+
+
+@router.get("", response_model=AlertList)
+def list_alerts(
+    tenant: Optional[str] = Depends(tenancy.request_tenant),
+    current_user: User = Depends(get_current_user),
+):
+    """Active low-stock and overdue alerts, oldest first. Served from memory."""
+    return {"alerts": alerts.active_alerts(tenant)}
+
+
+def _sse(event, data):
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+@router.get("/stream")
+async def stream_alerts(
+    tenant: Optional[str] = Depends(tenancy.request_tenant),
+    current_user: User = Depends(get_stream_user),
+):
+    """
+    Server-sent events: a "snapshot" event with every active alert, then a
+    "raised" or "cleared" event per change. A comment line is sent every
+    HEARTBEAT_SECONDS so proxies keep the connection open.
+    """
+
+    async def events():
+        queue = None
+        try:
+            # Subscribed before the snapshot is read, so no change falls between them.
+            queue = alerts.subscribe(tenant)
+            current = await run_in_threadpool(alerts.active_alerts, tenant)
+            yield _sse("snapshot", {"alerts": current})
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield _sse(message["type"], message["alert"])
+        finally:
+            if queue is not None:
+                alerts.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
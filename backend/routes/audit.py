@@ -0,0 +1,67 @@
+# backend/routes/audit.py
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+import audit
+from database import get_db
+from models import AuditEntry, User
+from routes.auth import get_current_user
+from schemas import AuditPage
+
+router = APIRouter(prefix="/audit", tags=["audit"])
+
+
+@router.get("", response_model=AuditPage)
+def list_audit_entries(
+    entity_type: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    actor: Optional[str] = None,
+    action: Optional[str] = None,
+    before_id: Optional[int] = Query(None, description="Keyset cursor: return entries older than this id"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Newest-first audit entries. Paging is keyset-based on id, so every page
+    is an index range scan (ix_audit_entity / ix_audit_actor) however deep
+    you go.
+    """
+    # Write out anything still buffered in this process, so a change is
+    # visible here as soon as its request returns.
+    audit.flush()
+
+    query = db.query(AuditEntry)
+    if entity_type:
+        query = query.filter(AuditEntry.entity_type == entity_type)
+    if entity_id is not None:
+        query = query.filter(AuditEntry.entity_id == entity_id)
+    if actor:
+        query = query.filter(AuditEntry.actor == actor)
+    if action:
+        query = query.filter(AuditEntry.action == action)
+    if before_id is not None:
+        query = query.filter(AuditEntry.id < before_id)
+
+    rows = query.order_by(AuditEntry.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return AuditPage(
+        items=[
+            {
+                "id": r.id,
+                "created_at": r.created_at,
+                "actor": r.actor,
+                "action": r.action,
+                "entity_type": r.entity_type,
+                "entity_id": r.entity_id,
+                "changes": json.loads(r.changes) if r.changes else {},
+            }
+            for r in rows
+        ],
+        next_before_id=rows[-1].id if has_more else None,
+    )
@@ -6,17 +6,20 @@ from datetime import timedelta
 import random
 import string
 
-from database import get_db
+from database import SessionLocal, get_core_db, get_engine
+import tenancy
 from models import User
+import user_sessions
+from ratelimit import get_limiter
 # ✅ Import schemas (UserLogin now has remember_me)
 from schemas import UserLogin, Token, UserCreate, UserResponse, ForgotPasswordRequest, VerifyRecoveryCode, ResetPassword
 from auth import (
     create_access_token, 
     verify_password, 
     get_password_hash,
-    create_remember_token,
     decode_access_token,
-    ACCESS_TOKEN_EXPIRE_MINUTES
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    REMEMBER_ME_TOKEN_EXPIRE_DAYS
 )
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
@@ -26,7 +29,34 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 # --- Helper Functions ---
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+def acquire_attempt(checks):
+    """
+    Count this attempt against every (limiter, key) pair, or reject with 429
+    before doing any expensive work if one has used up its attempts. The
+    check and the count are one step, so parallel attempts cannot slip past
+    the limit. Costs a dict lookup, not a bcrypt hash.
+    """
+    taken = []
+    for name, key in checks:
+        wait = get_limiter(name).acquire([key])
+        if wait:
+            release_attempt(taken)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts. Please try again later.",
+                headers={"Retry-After": str(wait)},
+            )
+        taken.append((name, key))
+
+def release_attempt(checks):
+    """Give back an attempt that succeeded; failed attempts stay counted."""
+    for name, key in checks:
+        get_limiter(name).release([key])
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_core_db)):
     """Get current user from JWT token"""
     
     # 1. Decode the token
@@ -57,6 +87,24 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     
     return user
 
+def get_stream_user(token: str = Depends(oauth2_scheme)):
+    """
+    get_current_user for streaming responses. FastAPI only closes a yield
+    dependency's session after the response ends, so get_core_db would hold
+    a pooled connection for the life of the stream; this one is closed
+    before the handler runs.
+    """
+    get_engine()
+    with SessionLocal() as db:
+        return get_current_user(token, db)
+
+def access_token_for(user: User, expires_delta: timedelta = None) -> str:
+    """Access token for `user`; carries the department claim that routes their requests."""
+    data = {"sub": user.username}
+    if user.department:
+        data[tenancy.CLAIM] = user.department
+    return create_access_token(data=data, expires_delta=expires_delta)
+
 def authenticate_user(db: Session, username: str, password: str):
     user = db.query(User).filter(User.username == username).first()
     if not user:
@@ -70,7 +118,7 @@ def authenticate_user(db: Session, username: str, password: str):
 # --- Routes ---
 
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+def register(user: UserCreate, db: Session = Depends(get_core_db)):
     """Register a new user"""
     if db.query(User).filter(User.username == user.username).first():
         raise HTTPException(status_code=400, detail="Username already registered")
@@ -78,6 +126,13 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     if db.query(User).filter(User.email == user.email).first():
         raise HTTPException(status_code=400, detail="Email already registered")
     
+    department = None
+    if user.department:
+        try:
+            department = tenancy.normalize(user.department)
+        except KeyError:
+            raise HTTPException(status_code=400, detail="Unknown department")
+
     # Generate a random 4-digit recovery code
     recovery_code = ''.join(random.choices(string.digits, k=4))
     
@@ -87,7 +142,8 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         full_name=user.full_name,
         hashed_password=get_password_hash(user.password),
         recovery_code=recovery_code,
-        is_active=1
+        is_active=1,
+        department=department,
     )
     
     db.add(db_user)
@@ -99,14 +155,18 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         username=db_user.username,
         email=db_user.email,
         full_name=db_user.full_name,
+        department=db_user.department,
         is_active=db_user.is_active,
         created_at=db_user.created_at,
         recovery_code=db_user.recovery_code
     )
 
 @router.post("/login", response_model=Token)
-def login(user_data: UserLogin, response: Response, db: Session = Depends(get_db)):
+def login(user_data: UserLogin, request: Request, response: Response, db: Session = Depends(get_core_db)):
     """Login user and optionally set remember-me cookie"""
+    attempts = [("login-ip", _client_ip(request)), ("login-user", user_data.username.lower())]
+    acquire_attempt(attempts)
+
     user = authenticate_user(db, user_data.username, user_data.password)
     if not user:
         raise HTTPException(
@@ -116,16 +176,17 @@ def login(user_data: UserLogin, response: Response, db: Session = Depends(get_db
         )
     
     # Create Short-Lived Access Token (e.g., 30 mins)
+    release_attempt(attempts[:1])
+    get_limiter("login-user").reset(user_data.username.lower())
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, 
-        expires_delta=access_token_expires
-    )
+    access_token = access_token_for(user, access_token_expires)
     
     # ✅ HANDLE REMEMBER ME
+    # One session row per device; only the token's hash is stored.
     if user_data.remember_me:
-        remember_token = create_remember_token(user.id)
-        user.remember_token = remember_token 
+        remember_token = user_sessions.create_session(
+            db, user, user_agent=request.headers.get("user-agent")
+        )
         
         # Save secure cookie (HttpOnly prevents JS theft)
         response.set_cookie(
@@ -134,9 +195,8 @@ def login(user_data: UserLogin, response: Response, db: Session = Depends(get_db
             httponly=True,
             secure=False,  # Set to True if using HTTPS
             samesite="lax",
-            max_age=30 * 24 * 60 * 60  # 30 Days
+            max_age=REMEMBER_ME_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
         )
-        db.commit()
     
     return Token(
         access_token=access_token,
@@ -145,19 +205,19 @@ def login(user_data: UserLogin, response: Response, db: Session = Depends(get_db
     )
 
 @router.post("/auto-login", response_model=Token)
-def auto_login(request: Request, db: Session = Depends(get_db)):
+def auto_login(request: Request, db: Session = Depends(get_core_db)):
     """Restore session from HttpOnly cookie"""
     remember_token = request.cookies.get("remember_token")
     
     if not remember_token:
         raise HTTPException(status_code=401, detail="No remember token")
         
-    user = db.query(User).filter(User.remember_token == remember_token).first()
-    if not user or user.is_active == 0:
+    user = user_sessions.resolve_session(db, remember_token)
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
         
     # Generate new access token
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = access_token_for(user)
     
     return Token(
         access_token=access_token,
@@ -166,14 +226,17 @@ def auto_login(request: Request, db: Session = Depends(get_db)):
     )
 
 @router.post("/logout")
-def logout(response: Response, db: Session = Depends(get_db)):
-    """Clear cookies on logout"""
+def logout(request: Request, response: Response, db: Session = Depends(get_core_db)):
+    """Revoke this device's session and clear cookies on logout"""
+    remember_token = request.cookies.get("remember_token")
+    if remember_token:
+        user_sessions.revoke_session(db, remember_token)
     # Delete the cookie with the same attributes to ensure removal
     response.delete_cookie(key="remember_token", httponly=True, samesite="lax")
     return {"message": "Logged out successfully"}
 
 @router.post("/forgot-password")
-def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(get_db)):
+def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(get_core_db)):
     user = db.query(User).filter(User.email == request.email).first()
     if not user:
         # Return fake success to prevent email enumeration
@@ -181,22 +244,31 @@ def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(get_db
     return {"message": "Code sent", "recovery_code": user.recovery_code}
 
 @router.post("/verify-recovery-code")
-def verify_recovery_code(data: VerifyRecoveryCode, db: Session = Depends(get_db)):
+def verify_recovery_code(data: VerifyRecoveryCode, request: Request, db: Session = Depends(get_core_db)):
+    # The code is only 4 digits, so attempts are capped per email and per IP.
+    attempts = [("recovery-ip", _client_ip(request)), ("recovery-email", data.email.lower())]
+    acquire_attempt(attempts)
     user = db.query(User).filter(User.email == data.email, User.recovery_code == data.recovery_code).first()
     if not user:
         raise HTTPException(status_code=400, detail="Invalid code")
+    release_attempt(attempts)
     return {"message": "Verified"}
 
 @router.post("/reset-password")
-def reset_password(data: ResetPassword, db: Session = Depends(get_db)):
+def reset_password(data: ResetPassword, request: Request, db: Session = Depends(get_core_db)):
+    attempts = [("recovery-ip", _client_ip(request)), ("recovery-email", data.email.lower())]
+    acquire_attempt(attempts)
     user = db.query(User).filter(User.email == data.email, User.recovery_code == data.recovery_code).first()
     if not user:
         raise HTTPException(status_code=400, detail="Invalid request")
+    release_attempt(attempts)
     
     user.hashed_password = get_password_hash(data.new_password)
     # Rotate recovery code so it can't be used again
     user.recovery_code = ''.join(random.choices(string.digits, k=4))
     db.commit()
+    # A new password signs out every remembered device
+    user_sessions.revoke_user_sessions(db, user.id)
     return {"message": "Password reset successfully"}
 
 @router.get("/me", response_model=UserResponse)
@@ -0,0 +1,124 @@
+# backend/routes/borrowers.py
+import heapq
+from operator import itemgetter
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, literal, select
+from sqlalchemy.orm import Session
+
+import crud
+from database import get_db
+from models import Borrower, BorrowerOutstanding, IssueRecord, IssueRecordArchive, User
+from responses import FastJSONResponse
+from routes.auth import get_current_user
+from schemas import BorrowerDetail, BorrowerLedgerPage, BorrowerPage
+
+router = APIRouter(prefix="/borrowers", tags=["borrowers"])
+
+# Sorts after every other character, for "name_key starts with" as an index range.
+_PREFIX_END = "\U0010ffff"
+
+
+def _summary_columns():
+    return (
+        Borrower.id,
+        Borrower.name,
+        func.coalesce(BorrowerOutstanding.items, 0).label("items"),
+        func.coalesce(BorrowerOutstanding.quantity, 0).label("quantity"),
+        BorrowerOutstanding.oldest_due,
+    )
+
+
+@router.get("", response_model=BorrowerPage)
+def list_borrowers(
+    q: Optional[str] = Query(None, description="Name prefix, case-insensitive"),
+    outstanding: bool = Query(False, description="Only borrowers who still hold something"),
+    after: Optional[str] = Query(None, description="Keyset cursor: next_after from the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Borrowers by name with what they still hold, from the materialized
+    summary (see borrowers.py). Paging is keyset-based on the unique name
+    key, so every page, and a prefix search, is an index range scan.
+    """
+    query = select(*_summary_columns(), Borrower.name_key)
+    if outstanding:
+        query = query.join(BorrowerOutstanding, BorrowerOutstanding.borrower_id == Borrower.id)
+    else:
+        query = query.outerjoin(BorrowerOutstanding, BorrowerOutstanding.borrower_id == Borrower.id)
+    if q and q.strip():
+        prefix = func.lower(func.trim(literal(q)))
+        query = query.where(Borrower.name_key >= prefix, Borrower.name_key < prefix.concat(_PREFIX_END))
+    if after is not None:
+        query = query.where(Borrower.name_key > after)
+
+    rows = db.execute(query.order_by(Borrower.name_key).limit(limit + 1)).mappings().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return FastJSONResponse({
+        "items": [{key: row[key] for key in ("id", "name", "items", "quantity", "oldest_due")} for row in rows],
+        "next_after": rows[-1]["name_key"] if has_more else None,
+    })
+
+
+@router.get("/{borrower_id}", response_model=BorrowerDetail)
+def read_borrower(
+    borrower_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """One borrower's summary and every record they still hold, for a clearance check."""
+    row = db.execute(
+        select(*_summary_columns())
+        .outerjoin(BorrowerOutstanding, BorrowerOutstanding.borrower_id == Borrower.id)
+        .where(Borrower.id == borrower_id)
+    ).mappings().first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Borrower not found")
+    table = IssueRecord.__table__
+    open_records = db.execute(
+        select(*[table.c[name] for name in crud.ISSUE_COLUMNS])
+        .where(table.c.borrower_id == borrower_id)
+        .where(func.lower(table.c.status) == "issued")
+        .order_by(table.c.id)
+    )
+    return FastJSONResponse({
+        **row,
+        "outstanding": [dict(zip(crud.ISSUE_COLUMNS, record)) for record in open_records],
+    })
+
+
+@router.get("/{borrower_id}/issues", response_model=BorrowerLedgerPage)
+def borrower_ledger(
+    borrower_id: int,
+    before_id: Optional[int] = Query(None, description="Keyset cursor: return records older than this id"),
+    limit: int = Query(50, ge=1, le=500),
+    include_archived: bool = Query(True, description="Include records moved to the archive (see archive.py)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    A borrower's issue records, newest first. By default this is the whole
+    history: archived records keep their ids and borrower_id, so the live
+    and archive tables are each read through their borrower_id index and
+    merged by id. include_archived=false lists only the live table.
+    """
+    sources = (IssueRecord, IssueRecordArchive) if include_archived else (IssueRecord,)
+    pages = []
+    for model in sources:
+        table = model.__table__
+        query = select(*[table.c[name] for name in crud.ISSUE_COLUMNS]).where(table.c.borrower_id == borrower_id)
+        if before_id is not None:
+            query = query.where(table.c.id < before_id)
+        query = query.order_by(table.c.id.desc()).limit(limit + 1)
+        pages.append([dict(zip(crud.ISSUE_COLUMNS, r)) for r in db.execute(query)])
+    rows = list(heapq.merge(*pages, key=itemgetter("id"), reverse=True))[:limit + 1]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return FastJSONResponse({
+        "items": rows,
+        "next_before_id": rows[-1]["id"] if has_more else None,
+    })
@@ -0,0 +1,97 @@
+# backend/routes/dashboard.py
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import alerts
+import audit
+import crud
+import tenancy
+from database import begin_read_snapshot, get_db
+from models import AuditEntry, Equipment, IssueRecord, Maintenance, User
+from responses import FastJSONResponse
+from routes.auth import get_current_user
+from routes.reports import department_summary
+from schemas import DashboardBootstrap
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+RECENT_ACTIVITY = 15
+DEFAULT_PAGE_SIZE = 200
+
+
+def _first_page(db: Session, model, columns, page_size):
+    """First `page_size` rows in id order; page_size=0 means every row."""
+    table = model.__table__
+    stmt = select(*[table.c[name] for name in columns]).order_by(table.c.id)
+    if page_size:
+        stmt = stmt.limit(page_size + 1)
+    rows = [dict(zip(columns, row)) for row in db.execute(stmt)]
+    has_more = bool(page_size) and len(rows) > page_size
+    if has_more:
+        rows = rows[:page_size]
+    return {"items": rows, "has_more": has_more}
+
+
+def first_paint(db: Session, tenant: Optional[str], page_size: int):
+    """Stats, first list pages and recent activity for one database, read from one snapshot."""
+    # Make this process's buffered audit entries visible to the snapshot.
+    audit.flush()
+    begin_read_snapshot(db)
+
+    stats = department_summary(db)
+    stats["faulty"] = db.scalar(select(func.count(Equipment.id)).where(func.lower(Equipment.status) == "faulty"))
+    counts = {kind: 0 for kind in (alerts.LOW_STOCK, alerts.OVERDUE)}
+    for alert in alerts.active_alerts(tenant):
+        counts[alert["kind"]] += 1
+    stats.update(counts)
+
+    recent = db.execute(
+        select(AuditEntry.id, AuditEntry.created_at, AuditEntry.actor, AuditEntry.action,
+               AuditEntry.entity_type, AuditEntry.entity_id)
+        .order_by(AuditEntry.id.desc()).limit(RECENT_ACTIVITY)
+    ).mappings().all()
+
+    return {
+        "department": tenancy.display_name(tenant),
+        "stats": stats,
+        "equipment": _first_page(db, Equipment, crud.EQUIPMENT_COLUMNS, page_size),
+        "issues": _first_page(db, IssueRecord, crud.ISSUE_COLUMNS, page_size),
+        "maintenance": _first_page(db, Maintenance, crud.MAINTENANCE_COLUMNS, page_size),
+        "recent_activity": [dict(row) for row in recent],
+    }
+
+
+def warm_queries():
+    """Warm-up stage (see warmup.py): run the first-paint queries once against every database."""
+    for tenant in tenancy.all_tenants():
+        db = tenancy.session_factory(tenant)()
+        try:
+            first_paint(db, tenant, DEFAULT_PAGE_SIZE)
+        finally:
+            db.close()
+
+
+@router.get("/bootstrap", response_model=DashboardBootstrap)
+def dashboard_bootstrap(
+    page_size: int = Query(DEFAULT_PAGE_SIZE, ge=0, le=5000, description="Rows per list; 0 returns every row"),
+    tenant: Optional[str] = Depends(tenancy.request_tenant),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Everything the dashboard needs for its first paint, in one response:
+    stats, the first page of each list and recent activity. The user is
+    authenticated once and every query reads the same snapshot.
+    """
+    payload = {
+        "user": {
+            "username": current_user.username,
+            "full_name": current_user.full_name,
+            "department": current_user.department,
+        },
+    }
+    payload.update(first_paint(db, tenant, page_size))
+    return FastJSONResponse(payload)
@@ -0,0 +1,94 @@
+# backend/routes/labels.py
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import labels
+from database import get_db
+from models import Equipment, User
+from routes.auth import get_current_user
+from schemas import LabelSheetRequest
+
+router = APIRouter(prefix="/labels", tags=["labels"])
+
+
+# Longer id lists are matched in Python instead of one bound parameter each.
+IN_CLAUSE_LIMIT = 500
+
+
+def _label_sheet(db, ids, lab, category, status, symbology, layout):
+    if symbology not in labels.SYMBOLOGIES:
+        raise HTTPException(status_code=400, detail=f"symbology must be one of: {', '.join(labels.SYMBOLOGIES)}")
+    if layout not in labels.LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"layout must be one of: {', '.join(labels.LAYOUTS)}")
+    if symbology == "qr" and not labels.qr_available():
+        raise HTTPException(status_code=400, detail="QR labels need the segno package; use code128")
+
+    stmt = select(Equipment.id, Equipment.code, Equipment.name, Equipment.lab).where(
+        Equipment.code.is_not(None), Equipment.code != ""
+    )
+    if ids is not None and len(ids) <= IN_CLAUSE_LIMIT:
+        stmt = stmt.where(Equipment.id.in_(ids))
+    if lab:
+        stmt = stmt.where(Equipment.lab == lab)
+    if category:
+        stmt = stmt.where(Equipment.category == category)
+    if status:
+        stmt = stmt.where(Equipment.status == status)
+    # Read everything before streaming starts; the session is not used again.
+    rows = db.execute(stmt.order_by(Equipment.lab, Equipment.code))
+    if ids is not None and len(ids) > IN_CLAUSE_LIMIT:
+        wanted = set(ids)
+        rows = (row for row in rows if row[0] in wanted)
+    items = [tuple(row[1:]) for row in rows]
+    if not items:
+        raise HTTPException(status_code=404, detail="No equipment matches these filters")
+
+    if symbology == "code128":
+        bad = [code for code, _, _ in items if not labels.code128_supported(code)]
+        if bad:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{len(bad)} code(s) contain characters Code 128 cannot encode, e.g. {bad[0]!r}; use qr",
+            )
+
+    return StreamingResponse(
+        labels.iter_pdf(items, symbology, layout),
+        media_type="application/pdf",
+        headers={"Content-Disposition": 'attachment; filename="equipment-labels.pdf"'},
+    )
+
+
+@router.get("/equipment.pdf")
+def equipment_labels(
+    ids: Optional[List[int]] = Query(None, description="Only these equipment ids"),
+    lab: Optional[str] = None,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    symbology: str = Query("code128", description="code128 or qr"),
+    layout: str = Query(labels.DEFAULT_LAYOUT, description="Sheet layout: " + ", ".join(labels.LAYOUTS)),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    A PDF sheet with one label per matching equipment item, ordered by lab
+    then code. The PDF is streamed page by page; see labels.py.
+    """
+    return _label_sheet(db, ids or None, lab, category, status, symbology, layout)
+
+
+@router.post("/equipment.pdf")
+def equipment_labels_for(
+    request: LabelSheetRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    As GET, with the filters in the body, for selections too long for a
+    query string. Unlike GET, an empty `ids` list matches nothing (404).
+    """
+    return _label_sheet(db, request.ids, request.lab, request.category, request.status,
+                        request.symbology, request.layout)
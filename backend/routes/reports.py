@@ -0,0 +1,41 @@
+# backend/routes/reports.py
+from fastapi import APIRouter, Depends
+from sqlalchemy import func, select
+
+import tenancy
+from models import Equipment, IssueRecord, Maintenance, User
+from routes.auth import get_current_user
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+SUMMARY_FIELDS = ("equipment_count", "total_qty", "available_qty", "open_issues", "open_maintenance")
+
+
+def department_summary(db):
+    equipment_count, total_qty, available_qty = db.execute(select(
+        func.count(Equipment.id),
+        func.coalesce(func.sum(Equipment.total_qty), 0),
+        func.coalesce(func.sum(Equipment.available_qty), 0),
+    )).one()
+    # The UI writes "Issued" / "Completed", the API often lower case.
+    open_issues = db.scalar(select(func.count(IssueRecord.id)).where(func.lower(IssueRecord.status) == "issued"))
+    open_maintenance = db.scalar(
+        select(func.count(Maintenance.id)).where(func.lower(Maintenance.status) != "completed")
+    )
+    return dict(zip(SUMMARY_FIELDS, (equipment_count, total_qty, available_qty, open_issues, open_maintenance)))
+
+
+@router.get("/departments")
+def departments_report(current_user: User = Depends(get_current_user)):
+    """
+    Inventory summary for every department, queried in parallel across the
+    department databases (see tenancy.fan_out). Users with a department get
+    just their own; this narrows the view and is not access control.
+    """
+    tenants = [current_user.department] if current_user.department else None
+    rows = [
+        {"department": name, **summary}
+        for name, summary in tenancy.fan_out(department_summary, tenants)
+    ]
+    totals = {field: sum(row[field] for row in rows) for field in SUMMARY_FIELDS}
+    return {"departments": rows, "totals": totals}
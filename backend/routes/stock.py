@@ -0,0 +1,35 @@
+# backend/routes/stock.py
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+import reconcile
+import tenancy
+from models import User
+from routes.auth import get_current_user
+from schemas import ReconcileReport
+
+router = APIRouter(prefix="/stock", tags=["stock"])
+
+
+@router.post("/reconcile", response_model=ReconcileReport)
+def reconcile_stock(
+    dry_run: bool = Query(False, description="Only report what would change"),
+    limit: int = Query(100, ge=0, le=10000, description="Changed rows to list in the report"),
+    tenant: Optional[str] = Depends(tenancy.request_tenant),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Set every item's available_qty to its total minus the quantities still
+    issued out, in one UPDATE (see reconcile.py). The report lists the rows
+    that differ(ed), with available_qty as it was before.
+    """
+    result = reconcile.reconcile_tenant(tenant, dry_run, actor=current_user.username)
+    return {
+        "department": tenancy.display_name(tenant),
+        "dry_run": dry_run,
+        "changed": result["changed"],
+        "seconds": result["seconds"],
+        "items": result["items"][:limit],
+        "truncated": result["changed"] > limit,
+    }
@@ -0,0 +1,52 @@
+# backend/routes/system.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import text
+
+import warmup
+from database import get_engine
+from metrics import registry
+from responses import FastJSONResponse
+
+router = APIRouter(tags=["system"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint. Async so it reads the counters on the event loop thread."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the process is up and its event loop answers. Touches nothing else."""
+    return FastJSONResponse({"status": "ok"})
+
+
+@router.get("/readyz", include_in_schema=False)
+def readyz():
+    """
+    Readiness: the database answers, the schema is up to date and the warm-up
+    stages have finished. 503 with the per-stage progress until then; status
+    is "failed" when a required stage failed and waiting longer will not help.
+    Optional warm-up stages that failed are listed under "degraded" in a 200.
+    """
+    try:
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+        database = "ok"
+    except Exception as e:
+        database = f"unreachable: {e}"
+
+    if database == "ok" and warmup.is_ready():
+        status = "ready"
+    elif warmup.has_failed():
+        status = "failed"
+    else:
+        status = "starting"
+    # Copies: the warm-up task updates these entries on the event loop.
+    stages = {name: dict(entry) for name, entry in list(warmup.stages.items())}
+    return FastJSONResponse(
+        {"status": status, "database": database, "stages": stages, "degraded": warmup.degraded()},
+        status_code=200 if status == "ready" else 503,
+    )
@@ -4,11 +4,10 @@ import os
 if sys.stdout:
     sys.stdout.reconfigure(encoding='utf-8')
 if sys.stderr:
-    sys.stderr.reconfigure(encoding='utf-8') 
-import uvicorn
+    sys.stderr.reconfigure(encoding='utf-8')
+import argparse
 import multiprocessing
-import sys
-import os
+import uvicorn
 
 #  CRITICAL FIX: Handle PyInstaller's internal path structure
 if getattr(sys, 'frozen', False):
@@ -20,37 +19,97 @@ else:
     # If running as a normal script
     base_path = os.path.dirname(os.path.abspath(__file__))
 
-try:
-    from main import app
+# Set in the parent process once the schema and default admin exist, so the
+# workers spawned by uvicorn do not all race to initialize the same database.
+DB_READY_ENV = "INVENTORY_DB_READY"
+
+
+def parse_args(argv=None):
+    """Command line options. Every option falls back to an environment variable."""
+    parser = argparse.ArgumentParser(description="Department Lab Inventory API server")
+    parser.add_argument(
+        "--mode", choices=["desktop", "production"],
+        default=os.getenv("INVENTORY_SERVE_MODE", "desktop"),
+        help="desktop: single process on localhost (default). production: multi-worker server.",
+    )
+    parser.add_argument("--host", default=os.getenv("INVENTORY_HOST"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument(
+        "--workers", type=int,
+        default=int(os.getenv("WEB_CONCURRENCY", "0")),
+        help="Worker processes in production mode (default: one per CPU core).",
+    )
+    parser.add_argument(
+        "--keep-alive", type=int, default=int(os.getenv("INVENTORY_KEEP_ALIVE", "5")),
+        help="Seconds to hold idle keep-alive connections open.",
+    )
+    parser.add_argument(
+        "--backlog", type=int, default=int(os.getenv("INVENTORY_BACKLOG", "2048")),
+        help="Maximum number of pending connections on the listening socket.",
+    )
+    parser.add_argument(
+        "--forwarded-allow-ips", default=os.getenv("INVENTORY_FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        help="Comma-separated proxy addresses (or *) whose X-Forwarded-For is trusted as the client address. "
+             "Per-IP login throttling needs this behind a reverse proxy.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.mode == "production":
+        args.host = args.host or "0.0.0.0"
+        args.workers = args.workers or multiprocessing.cpu_count()
+    else:
+        args.host = args.host or "127.0.0.1"
+        args.workers = 1
+    return args
+
+
+def prepare_database():
+    """Create tables and the default admin exactly once, before any worker starts."""
     from init_db import init_db
-except ImportError as e:
-    import tkinter.messagebox as mb
-    mb.showerror("Startup Error", f"Could not load application modules: {str(e)}")
-    sys.exit(1)
+    init_db()
+    os.environ[DB_READY_ENV] = "1"
 
-if __name__ == "__main__":
-    multiprocessing.freeze_support() 
+
+def main(argv=None):
+    args = parse_args(argv)
 
     # ✅ STEP 1: AUTOMATIC DATABASE CREATION
-    # Use the current working directory for the database file
-    db_file = os.path.join(os.getcwd(), "inventory.db")
-    
-    if not os.path.exists(db_file):
-        print("Fresh installation detected. Initializing database...")
+    try:
+        prepare_database()
+    except Exception as e:
+        import tkinter.messagebox as mb
+        mb.showerror("Database Error", f"Failed to initialize database: {str(e)}")
+        sys.exit(1)
+
+    # ✅ STEP 2: START SERVER
+    server_options = dict(
+        host=args.host,
+        port=args.port,
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        proxy_headers=True,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+    )
+
+    if args.workers > 1:
+        # Login throttling state must be shared between workers.
+        os.environ.setdefault("INVENTORY_RATELIMIT_BACKEND", "sqlite")
+        # Each worker has its own code index and alert state; pick up the others' writes.
+        os.environ.setdefault("INVENTORY_CODE_INDEX_SYNC", "2")
+        os.environ.setdefault("INVENTORY_ALERTS_SYNC", "2")
+        # Workers import the app themselves, so uvicorn needs an import string.
+        print(f" Starting production server with {args.workers} workers on {args.host}:{args.port}")
+        uvicorn.run("main:app", workers=args.workers, **server_options)
+    else:
         try:
-            init_db()
-        except Exception as e:
+            from main import app
+        except ImportError as e:
             import tkinter.messagebox as mb
-            mb.showerror("Database Error", f"Failed to initialize database: {str(e)}")
+            mb.showerror("Startup Error", f"Could not load application modules: {str(e)}")
             sys.exit(1)
+        uvicorn.run(app, **server_options)
 
-    # ✅ STEP 2: START SERVER
-    uvicorn.run(app, host="127.0.0.1", port=8000)
-    
 
-# Force the console to use UTF-8 encoding
-if sys.stdout:
-    sys.stdout.reconfigure(encoding='utf-8')
-if sys.stderr:
-    sys.stderr.reconfigure(encoding='utf-8')    
-    
\ No newline at end of file
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -14,6 +14,28 @@ datas = [
     ('crud.py', '.'),
     ('database.py', '.'),
     ('init_db.py', '.'),
+    ('metrics.py', '.'),
+    ('sql_profiling.py', '.'),
+    ('responses.py', '.'),
+    ('compression.py', '.'),
+    ('static_files.py', '.'),
+    ('tasks.py', '.'),
+    ('user_sessions.py', '.'),
+    ('admission.py', '.'),
+    ('ratelimit.py', '.'),
+    ('group_commit.py', '.'),
+    ('audit.py', '.'),
+    ('bulk_import.py', '.'),
+    ('labels.py', '.'),
+    ('backup.py', '.'),
+    ('migrations.py', '.'),
+    ('tenancy.py', '.'),
+    ('code_index.py', '.'),
+    ('archive.py', '.'),
+    ('alerts.py', '.'),
+    ('warmup.py', '.'),
+    ('reconcile.py', '.'),
+    ('borrowers.py', '.'),
     ('routes', 'routes'), # Include the routes folder
 ]
 
@@ -36,6 +58,8 @@ hiddenimports = [
     'init_db',
     'sqlalchemy.sql.default_comparator',
     'passlib.handlers.bcrypt',
+    'openpyxl',
+    'segno',
 ]
 
 # Collect uvicorn dependencies
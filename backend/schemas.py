@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime, date
 import re
 
@@ -11,6 +11,7 @@ class UserBase(BaseModel):
     username: str
     email: EmailStr
     full_name: Optional[str] = None
+    department: Optional[str] = None
 
 class UserCreate(UserBase):
     password: str
@@ -100,6 +101,7 @@ class EquipmentBase(BaseModel):
     total_qty: int 
     available_qty: int 
     status: str
+    reorder_threshold: Optional[int] = None
 
 class EquipmentCreate(EquipmentBase):
     pass
@@ -112,6 +114,7 @@ class EquipmentUpdate(BaseModel):
     total_qty: Optional[int] = None
     available_qty: Optional[int] = None
     status: Optional[str] = None
+    reorder_threshold: Optional[int] = None
 
 class Equipment(EquipmentBase):
     id: int
@@ -119,6 +122,13 @@ class Equipment(EquipmentBase):
     class Config:
         from_attributes = True
 
+class CodeLookup(BaseModel):
+    codes: List[str]
+
+class CodeLookupResult(BaseModel):
+    items: List[Equipment]
+    missing: List[str]
+
 
 # ==========================================
 #  ISSUE RECORD SCHEMAS
@@ -138,6 +148,7 @@ class IssueRecordCreate(IssueRecordBase):
 class IssueRecord(IssueRecordBase):
     id: int
     equipment_id: int
+    borrower_id: Optional[int] = None   # set by the server from issued_to (borrowers.py)
 
     class Config:
         from_attributes = True
@@ -164,4 +175,147 @@ class Maintenance(MaintenanceBase):
     equipment_id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# ==========================================
+#  AUDIT SCHEMAS
+# ==========================================
+
+class AuditEntry(BaseModel):
+    id: int
+    created_at: datetime
+    actor: Optional[str] = None
+    action: str
+    entity_type: str
+    entity_id: Optional[int] = None
+    changes: dict = {}
+
+class AuditPage(BaseModel):
+    items: List[AuditEntry]
+    next_before_id: Optional[int] = None   # pass as before_id to get the next (older) page
+
+
+# ==========================================
+#  ALERT SCHEMAS
+# ==========================================
+
+class Alert(BaseModel):
+    id: str
+    kind: str                              # low_stock / overdue
+    equipment_id: Optional[int] = None
+    issue_id: Optional[int] = None
+    message: str
+    available_qty: Optional[int] = None
+    reorder_threshold: Optional[int] = None
+    due_date: Optional[str] = None
+    since: datetime
+
+class AlertList(BaseModel):
+    alerts: List[Alert]
+
+
+# ==========================================
+#  BORROWER SCHEMAS
+# ==========================================
+
+class BorrowerSummary(BaseModel):
+    id: int
+    name: str
+    items: int                         # open issue records
+    quantity: int                      # units still out
+    oldest_due: Optional[str] = None   # earliest return_date among them
+
+class BorrowerPage(BaseModel):
+    items: List[BorrowerSummary]
+    next_after: Optional[str] = None   # pass as after to get the next page
+
+class BorrowerDetail(BorrowerSummary):
+    outstanding: List[IssueRecord]
+
+class BorrowerLedgerPage(BaseModel):
+    items: List[IssueRecord]
+    next_before_id: Optional[int] = None
+
+
+# ==========================================
+#  STOCK RECONCILIATION SCHEMAS
+# ==========================================
+
+class StockDifference(BaseModel):
+    id: int
+    code: Optional[str] = None
+    name: Optional[str] = None
+    total_qty: int
+    available_qty: Optional[int] = None     # before reconciling
+    expected_qty: int
+    outstanding_qty: int
+
+class ReconcileReport(BaseModel):
+    department: str
+    dry_run: bool
+    changed: int
+    seconds: float
+    items: List[StockDifference]
+    truncated: bool                          # more rows changed than `limit` lists
+
+
+# ==========================================
+#  DASHBOARD SCHEMAS
+# ==========================================
+
+class DashboardStats(BaseModel):
+    equipment_count: int
+    total_qty: int
+    available_qty: int
+    open_issues: int
+    open_maintenance: int
+    faulty: int
+    low_stock: int
+    overdue: int
+
+class DashboardUser(BaseModel):
+    username: str
+    full_name: Optional[str] = None
+    department: Optional[str] = None
+
+class EquipmentPage(BaseModel):
+    items: List[Equipment]
+    has_more: bool
+
+class IssueRecordPage(BaseModel):
+    items: List[IssueRecord]
+    has_more: bool
+
+class MaintenancePage(BaseModel):
+    items: List[Maintenance]
+    has_more: bool
+
+class ActivityEntry(BaseModel):
+    id: int
+    created_at: datetime
+    actor: Optional[str] = None
+    action: str
+    entity_type: str
+    entity_id: Optional[int] = None
+
+class DashboardBootstrap(BaseModel):
+    user: DashboardUser
+    department: str
+    stats: DashboardStats
+    equipment: EquipmentPage
+    issues: IssueRecordPage
+    maintenance: MaintenancePage
+    recent_activity: List[ActivityEntry]
+
+
+# ==========================================
+#  LABEL SHEET SCHEMAS
+# ==========================================
+
+class LabelSheetRequest(BaseModel):
+    ids: Optional[List[int]] = None    # None: every item; []: none
+    lab: Optional[str] = None
+    category: Optional[str] = None
+    status: Optional[str] = None
+    symbology: str = "code128"         # code128 or qr
+    layout: str = "a4-24"              # see labels.LAYOUTS
@@ -0,0 +1,191 @@
+# backend/sql_profiling.py
+"""
+SQL statement profiling through SQLAlchemy cursor events.
+
+* Every statement is timed and aggregated by fingerprint (the statement text
+  with literals and IN-lists collapsed), so the hot queries behind crud.py
+  and main.py show up in /metrics.
+* QueryProfilingMiddleware tracks the queries issued by each request. It adds
+  X-DB-Query-Count / X-DB-Query-Time-Ms headers and warns when a request
+  issues suspiciously many statements, which is how N+1 loops show up.
+* Statements slower than INVENTORY_SLOW_QUERY_MS are logged with their
+  fingerprint and the route that issued them.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+from contextvars import ContextVar
+from time import perf_counter
+
+from sqlalchemy import event
+
+logger = logging.getLogger("inventory.sql")
+slow_logger = logging.getLogger("inventory.sql.slow")
+
+SLOW_QUERY_MS = float(os.getenv("INVENTORY_SLOW_QUERY_MS", "200"))
+QUERY_COUNT_WARNING = int(os.getenv("INVENTORY_QUERY_COUNT_WARNING", "50"))
+DEBUG_HEADERS = os.getenv("INVENTORY_SQL_DEBUG_HEADERS", "1") == "1"
+
+_current_request = ContextVar("sql_request_stats", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \((?:\?|:\w+)(?:, ?(?:\?|:\w+))*\)", re.IGNORECASE)
+
+_FINGERPRINT_CACHE_SIZE = 2048
+
+
+class RequestQueryStats:
+    __slots__ = ("route", "count", "elapsed")
+
+    def __init__(self, route):
+        self.route = route
+        self.count = 0
+        self.elapsed = 0.0
+
+
+class StatementStats:
+    __slots__ = ("fingerprint", "count", "elapsed", "max_elapsed", "rows")
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.elapsed = 0.0
+        self.max_elapsed = 0.0
+        self.rows = 0
+
+
+_lock = threading.Lock()
+_statements = {}         # fingerprint id -> StatementStats
+_fingerprints = {}       # raw statement -> (fingerprint id, fingerprint)
+
+
+def fingerprint(statement):
+    """Return (short id, normalized text) for a SQL statement."""
+    cached = _fingerprints.get(statement)
+    if cached is not None:
+        return cached
+    text = _WHITESPACE.sub(" ", statement).strip()
+    text = _STRING_LITERAL.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _IN_LIST.sub("IN (?)", text)
+    result = (hashlib.sha1(text.encode("utf-8")).hexdigest()[:12], text)
+    if len(_fingerprints) >= _FINGERPRINT_CACHE_SIZE:
+        _fingerprints.clear()
+    _fingerprints[statement] = result
+    return result
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(perf_counter())
+    if context is not None:
+        context.query_timed = True
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - conn.info["query_started"].pop()
+    # rowcount is only meaningful for DML on sqlite; SELECTs report -1.
+    rows = cursor.rowcount if cursor.rowcount and cursor.rowcount > 0 else 0
+    fid, text = fingerprint(statement)
+
+    with _lock:
+        stats = _statements.get(fid)
+        if stats is None:
+            stats = _statements[fid] = StatementStats(text)
+        stats.count += 1
+        stats.elapsed += elapsed
+        stats.rows += rows
+        if elapsed > stats.max_elapsed:
+            stats.max_elapsed = elapsed
+
+    request = _current_request.get()
+    if request is not None:
+        request.count += 1
+        request.elapsed += elapsed
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        slow_logger.warning(
+            "slow query %.1f ms route=%s rows=%d fingerprint=%s sql=%s",
+            elapsed * 1000, request.route if request else "-", rows, fid, text,
+        )
+
+
+def _handle_error(exception_context):
+    # A statement that raised never reaches after_cursor_execute; drop its start time.
+    context = exception_context.execution_context
+    if context is not None and getattr(context, "query_timed", False):
+        exception_context.connection.info["query_started"].pop()
+
+
+def install(engine):
+    """Attach the timing hooks to an engine (idempotent)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+def statement_snapshot():
+    """Copy of the per-fingerprint statistics, heaviest first."""
+    with _lock:
+        rows = [
+            (fid, s.fingerprint, s.count, s.elapsed, s.max_elapsed, s.rows)
+            for fid, s in _statements.items()
+        ]
+    rows.sort(key=lambda r: r[3], reverse=True)
+    return rows
+
+
+def render_metrics():
+    """Prometheus lines for metrics.registry.collectors."""
+    lines = [
+        "# HELP db_statement_executions_total Executions per statement fingerprint.",
+        "# TYPE db_statement_executions_total counter",
+    ]
+    snapshot = statement_snapshot()
+    for fid, _, count, _, _, _ in snapshot:
+        lines.append(f'db_statement_executions_total{{fingerprint="{fid}"}} {count}')
+    lines.append("# HELP db_statement_seconds_total Time spent per statement fingerprint.")
+    lines.append("# TYPE db_statement_seconds_total counter")
+    for fid, _, _, elapsed, _, _ in snapshot:
+        lines.append(f'db_statement_seconds_total{{fingerprint="{fid}"}} {elapsed}')
+    lines.append("# HELP db_statement_rows_total Rows affected per statement fingerprint (DML only).")
+    lines.append("# TYPE db_statement_rows_total counter")
+    for fid, _, _, _, _, rows in snapshot:
+        lines.append(f'db_statement_rows_total{{fingerprint="{fid}"}} {rows}')
+    return lines
+
+
+class QueryProfilingMiddleware:
+    """Pure ASGI middleware that scopes query statistics to each request."""
+
+    def __init__(self, app, debug_headers=DEBUG_HEADERS):
+        self.app = app
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(f'{scope["method"]} {scope["path"]}')
+        token = _current_request.set(stats)
+
+        async def send_wrapper(message):
+            if self.debug_headers and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-query-count", str(stats.count).encode()))
+                headers.append((b"x-db-query-time-ms", f"{stats.elapsed * 1000:.2f}".encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            if stats.count >= QUERY_COUNT_WARNING:
+                logger.warning("%s issued %d queries (%.1f ms); possible N+1 pattern",
+                               stats.route, stats.count, stats.elapsed * 1000)
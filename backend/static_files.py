@@ -0,0 +1,76 @@
+# backend/static_files.py
+"""
+Static frontend serving with precompressed variants and cache headers.
+
+precompress_assets.py writes .br/.gz siblings next to each build file. When
+the client accepts one of them, it is served as-is with a Content-Encoding
+header, so no CPU is spent compressing at request time. Vite's hashed asset
+names (assets/index-3f9a1c2b.js) never change content, so they get a
+year-long immutable Cache-Control. Only files in the build's assets/
+directory qualify: files copied from public/ keep their names across
+deploys (apple-touch-icon.png, service-worker.js) and must be revalidated.
+Everything else, including index.html, is revalidated on every load.
+"""
+import os
+import re
+from mimetypes import guess_type
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from compression import parse_accept_encoding
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Vite's output directory for bundled files (build.assetsDir)
+ASSETS_DIR = "assets"
+
+# Vite appends an 8+ character content hash: name-<hash>.<ext>. The hash is
+# base64url and can be all letters or contain "-", so the name alone does not
+# tell it from a hyphenated word (apple-touch-icon.png); it only counts
+# inside ASSETS_DIR.
+HASHED_NAME = re.compile(r"-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+
+# Preferred first
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def is_hashed_asset(path):
+    directory, name = os.path.split(str(path))
+    return os.path.basename(directory) == ASSETS_DIR and HASHED_NAME.search(name) is not None
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        media_type = guess_type(str(full_path))[0] or "text/plain"
+
+        serve_path, serve_stat, encoding = full_path, stat_result, None
+        accepted = parse_accept_encoding(request_headers.get("accept-encoding", ""))
+        for name, suffix in PRECOMPRESSED:
+            if name not in accepted:
+                continue
+            candidate = f"{full_path}{suffix}"
+            try:
+                serve_stat = os.stat(candidate)
+            except OSError:
+                continue
+            serve_path, encoding = candidate, name
+            break
+        else:
+            serve_stat = stat_result
+
+        response = FileResponse(
+            serve_path, status_code=status_code, stat_result=serve_stat,
+            method=scope["method"], media_type=media_type,
+        )
+        if encoding:
+            response.headers["content-encoding"] = encoding
+        response.headers["vary"] = "Accept-Encoding"
+        response.headers["cache-control"] = IMMUTABLE_CACHE if is_hashed_asset(full_path) else REVALIDATE_CACHE
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
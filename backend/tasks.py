@@ -0,0 +1,45 @@
+# backend/tasks.py
+"""
+Small helper for the app's periodic background jobs (session sweeping and
+the like). Each job runs its blocking function in a worker thread so the
+event loop keeps serving requests, and is started and stopped from the
+application lifespan in main.py.
+"""
+import asyncio
+import logging
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    def __init__(self, name, interval_seconds, func, initial_delay=None):
+        self.name = name
+        self.interval = interval_seconds
+        self.func = func
+        self.initial_delay = interval_seconds if initial_delay is None else initial_delay
+        self._task = None
+
+    async def _run(self):
+        await asyncio.sleep(self.initial_delay)
+        while True:
+            try:
+                await run_in_threadpool(self.func)
+            except Exception:
+                logger.exception("Background task %s failed", self.name)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name=self.name)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,260 @@
+# backend/tenancy.py
+"""
+Per-department databases.
+
+Set INVENTORY_TENANTS to a comma-separated list of departments, e.g.
+"physics,chemistry,ee". Each department then keeps its equipment, issue,
+maintenance and audit tables in its own SQLite file under
+<data dir>/departments/. Each file has its own write lock, so departments
+commit in parallel and a bulk upload in one of them does not stall the
+rest. Users and login sessions stay in the core database (inventory.db),
+which also still holds the inventory of the "default" department.
+
+database.get_db() routes each request to the department named by its
+X-Department header, else to the user's own department (the "dept" claim
+in their access token), else to the default department.
+
+Departments shard the data for write throughput; they are NOT access
+control. Any caller may name any department, and a user's department,
+chosen at registration, is only where their requests go by default. Deploy
+separate servers when departments must not see each other's data.
+
+fan_out() runs a query against every department's database in parallel,
+for cross-department reports.
+
+Existing inventory can be moved out of the core database by lab:
+
+    python tenancy.py move-lab physics --lab "Physics Lab" --lab "Optics Lab"
+"""
+import argparse
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, Request
+from sqlalchemy.orm import sessionmaker
+
+HEADER = "x-department"
+CLAIM = "dept"
+DEFAULT_NAME = "default"  # the core database, as named in reports and headers
+
+# Tables that only exist in the core database.
+CORE_TABLES = frozenset({"users", "user_sessions"})
+
+_NAME_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+
+def _parse_tenants(value):
+    names = []
+    for name in (value or "").split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if not _NAME_RE.match(name) or name == DEFAULT_NAME:
+            print(f"Ignoring invalid department name {name!r} in INVENTORY_TENANTS")
+            continue
+        if name not in names:
+            names.append(name)
+    return tuple(names)
+
+
+TENANTS = _parse_tenants(os.getenv("INVENTORY_TENANTS"))
+
+_engines = {}
+_factories = {}
+_lock = threading.Lock()
+
+
+def normalize(name):
+    """Configured department for `name`, None for the default department; raises for unknown names."""
+    name = (name or "").strip().lower()
+    if not name or name == DEFAULT_NAME:
+        return None
+    if name not in TENANTS:
+        raise KeyError(name)
+    return name
+
+
+def display_name(tenant):
+    return tenant or DEFAULT_NAME
+
+
+def all_tenants():
+    """None (the core database) followed by every configured department."""
+    return [None, *TENANTS]
+
+
+def get_db_path(tenant):
+    from database import get_user_data_dir
+
+    folder = os.path.join(get_user_data_dir(), "departments")
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{tenant}.db")
+
+
+def tenant_tables():
+    from database import Base
+
+    return [t for t in Base.metadata.sorted_tables if t.name not in CORE_TABLES]
+
+
+def get_engine(tenant=None):
+    """Engine for a department's database, created (with its tables) on first use."""
+    import database
+
+    if tenant is None:
+        return database.get_engine()
+    engine = _engines.get(tenant)
+    if engine is not None:
+        return engine
+    with _lock:
+        if tenant not in _engines:
+            import migrations
+            import models  # noqa: F401  (registers the tables)
+
+            engine = database.create_sqlite_engine(get_db_path(tenant))
+            database.Base.metadata.create_all(bind=engine, tables=tenant_tables())
+            migrations.upgrade(engine)
+            _engines[tenant] = engine
+    return _engines[tenant]
+
+
+def session_factory(tenant=None):
+    """sessionmaker for a department. Its sessions carry info["tenant"] for the audit trail."""
+    if tenant is None:
+        from database import SessionLocal
+
+        return SessionLocal
+    factory = _factories.get(tenant)
+    if factory is None:
+        engine = get_engine(tenant)
+        with _lock:
+            factory = _factories.setdefault(tenant, sessionmaker(
+                bind=engine, autocommit=False, autoflush=False, info={"tenant": tenant},
+            ))
+    return factory
+
+
+def resolve_tenant(request):
+    """Department for this request, from the X-Department header or else the token's claim."""
+    from auth import decode_token_claims
+
+    requested = request.headers.get(HEADER)
+    if not requested:
+        authorization = request.headers.get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            claims = decode_token_claims(authorization[7:])
+            requested = claims.get(CLAIM) if claims else None
+    try:
+        return normalize(requested)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown department '{requested}'")
+
+
+def request_tenant(request: Request):
+    """Dependency: the request's department, or None when departments are not configured."""
+    return resolve_tenant(request) if TENANTS else None
+
+
+def fan_out(func, tenants=None):
+    """
+    Call func(session) against each department's database in parallel and
+    return [(department name, result), ...] in configuration order.
+    """
+    tenants = all_tenants() if tenants is None else tenants
+
+    def run(tenant):
+        db = session_factory(tenant)()
+        try:
+            return func(db)
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=min(8, len(tenants))) as pool:
+        results = list(pool.map(run, tenants))
+    return [(display_name(t), r) for t, r in zip(tenants, results)]
+
+
+# ==========================================
+#  MOVING EXISTING DATA
+# ==========================================
+
+MOVE_BATCH_SIZE = 500
+
+
+def move_lab(tenant, labs):
+    """
+    Move equipment in `labs`, with its issue and maintenance records (live
+    and archived), from the core database to `tenant`. Ids are preserved.
+    Each batch is written to the department before it is deleted from the
+    core database. Borrower ids are per database, so moved records are
+    linked to the department's borrowers afterwards.
+    """
+    import borrowers
+    import models
+    from sqlalchemy import select
+
+    core = get_engine(None)
+    target = get_engine(tenant)
+    equipment = models.Equipment.__table__
+    children = [model.__table__ for model in (
+        models.IssueRecord, models.Maintenance, models.IssueRecordArchive, models.MaintenanceArchive,
+    )]
+
+    with core.connect() as conn:
+        ids = [row[0] for row in conn.execute(
+            select(equipment.c.id).where(equipment.c.lab.in_(labs)).order_by(equipment.c.id)
+        )]
+    moved = 0
+    for start in range(0, len(ids), MOVE_BATCH_SIZE):
+        batch = ids[start:start + MOVE_BATCH_SIZE]
+        with core.connect() as conn:
+            rows = {
+                table: [dict(r._mapping) for r in conn.execute(select(table).where(
+                    (table.c.id if table is equipment else table.c.equipment_id).in_(batch)
+                ))]
+                for table in [equipment, *children]
+            }
+        with target.begin() as conn:
+            for table in [equipment, *children]:
+                if rows[table]:
+                    if "borrower_id" in table.c:
+                        for row in rows[table]:
+                            row["borrower_id"] = None
+                    conn.execute(table.insert(), rows[table])
+        with core.begin() as conn:
+            for table in children:
+                conn.execute(table.delete().where(table.c.equipment_id.in_(batch)))
+            conn.execute(equipment.delete().where(equipment.c.id.in_(batch)))
+        moved += len(batch)
+    borrowers.backfill(target)
+    with core.begin() as conn:
+        borrowers.rebuild(conn)
+    return moved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage per-department databases.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    move = sub.add_parser("move-lab", help="move a lab's equipment from the core database to a department")
+    move.add_argument("department")
+    move.add_argument("--lab", action="append", required=True, help="lab name (repeatable)")
+    args = parser.parse_args(argv)
+
+    if args.command == "move-lab":
+        try:
+            tenant = normalize(args.department)
+        except KeyError:
+            tenant = None
+        if tenant is None:
+            print(f"'{args.department}' is not listed in INVENTORY_TENANTS")
+            return 1
+        moved = move_lab(tenant, args.lab)
+        print(f"Moved {moved} equipment items to {tenant}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
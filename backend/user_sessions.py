@@ -0,0 +1,165 @@
+# backend/user_sessions.py
+"""
+Remember-me session store.
+
+Each "remember me" login gets its own row in user_sessions, so one user can
+stay signed in on several devices. The raw token only ever lives in the
+browser cookie; the table stores its SHA-256, which is indexed, so an
+auto-login is a single index lookup instead of a scan of users.
+
+A small LRU keeps hot sessions in memory. Entries expire after
+SESSION_CACHE_TTL seconds, which bounds how long a session revoked by
+another worker process can still be honoured here. Revocations made in this
+process are evicted immediately.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from auth import REMEMBER_ME_TOKEN_EXPIRE_DAYS, create_remember_token
+from models import User, UserSession
+
+SESSION_CACHE_SIZE = int(os.getenv("INVENTORY_SESSION_CACHE_SIZE", "1024"))
+SESSION_CACHE_TTL = float(os.getenv("INVENTORY_SESSION_CACHE_TTL", "60"))
+SWEEP_INTERVAL_SECONDS = float(os.getenv("INVENTORY_SESSION_SWEEP_INTERVAL", "3600"))
+SWEEP_BATCH_SIZE = 1000
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class SessionCache:
+    """Thread-safe LRU of token hash -> (user_id, expires_at, cached_at)."""
+
+    def __init__(self, maxsize=SESSION_CACHE_SIZE, ttl=SESSION_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token_hash):
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[2] > self.ttl:
+                del self._entries[token_hash]
+                return None
+            self._entries.move_to_end(token_hash)
+            return entry
+
+    def put(self, token_hash, user_id, expires_at):
+        with self._lock:
+            self._entries[token_hash] = (user_id, expires_at, time.monotonic())
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, token_hash):
+        with self._lock:
+            self._entries.pop(token_hash, None)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for key in [k for k, v in self._entries.items() if v[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cache = SessionCache()
+
+
+def create_session(db: Session, user: User, user_agent: str = None) -> str:
+    """Create a session for `user` and return the raw token for the cookie."""
+    token = create_remember_token(user.id)
+    expires_at = datetime.utcnow() + timedelta(days=REMEMBER_ME_TOKEN_EXPIRE_DAYS)
+    db.add(UserSession(
+        user_id=user.id,
+        token_hash=hash_token(token),
+        expires_at=expires_at,
+        user_agent=(user_agent or "")[:255] or None,
+    ))
+    db.commit()
+    return token
+
+
+def resolve_session(db: Session, token: str):
+    """Return the active user behind a remember-me token, or None."""
+    token_hash = hash_token(token)
+    now = datetime.utcnow()
+
+    cached = cache.get(token_hash)
+    if cached is not None:
+        user_id, expires_at, _ = cached
+    else:
+        row = db.query(UserSession.user_id, UserSession.expires_at).filter(
+            UserSession.token_hash == token_hash
+        ).first()
+        if row is None:
+            return None
+        user_id, expires_at = row
+        cache.put(token_hash, user_id, expires_at)
+
+    if expires_at < now:
+        cache.discard(token_hash)
+        return None
+
+    user = db.get(User, user_id)
+    if user is None or user.is_active == 0:
+        return None
+    return user
+
+
+def revoke_session(db: Session, token: str) -> bool:
+    token_hash = hash_token(token)
+    cache.discard(token_hash)
+    deleted = db.query(UserSession).filter(UserSession.token_hash == token_hash).delete(
+        synchronize_session=False
+    )
+    db.commit()
+    return deleted > 0
+
+
+def revoke_user_sessions(db: Session, user_id: int) -> int:
+    """Sign a user out everywhere (e.g. after a password reset)."""
+    cache.discard_user(user_id)
+    deleted = db.query(UserSession).filter(UserSession.user_id == user_id).delete(
+        synchronize_session=False
+    )
+    db.commit()
+    return deleted
+
+
+def sweep_expired(db: Session) -> int:
+    """Delete expired sessions in small batches so writers are never blocked for long."""
+    now = datetime.utcnow()
+    total = 0
+    while True:
+        ids = [row[0] for row in db.query(UserSession.id).filter(
+            UserSession.expires_at < now
+        ).limit(SWEEP_BATCH_SIZE)]
+        if not ids:
+            return total
+        db.query(UserSession).filter(UserSession.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        total += len(ids)
+
+
+def run_sweeper():
+    """Entry point for the background PeriodicTask."""
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        sweep_expired(db)
+    finally:
+        db.close()
@@ -0,0 +1,119 @@
+# backend/warmup.py
+"""
+Staged start-up, reported by GET /readyz.
+
+The lifespan in main.py creates the schema before the server starts
+listening, since every request needs it and it is quick. The rest only makes
+the first requests fast, so it runs in order on a worker thread while the
+server binds and starts accepting connections:
+
+  code_index   load each database's equipment snapshot (scans and lists)
+  alerts       build each database's low-stock / overdue alert state
+  queries      run the dashboard's first-paint queries against each database,
+               so SQLAlchemy's compiled statements, sqlite's statement cache
+               and the OS page cache are hot before the first user
+  passwords    load the bcrypt backend used at login
+
+Each of these also happens lazily on first use, so a request that arrives
+early is still served, only slower. For the same reason a failure in one of
+them is logged and the stage marked "degraded" rather than "failed": the
+server is still ready, only colder. Only the "database" stage, run by the
+lifespan itself, is required. The desktop launcher polls /readyz and shows
+its window once every stage has finished.
+"""
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+PENDING, RUNNING, DONE, DEGRADED, FAILED = "pending", "running", "done", "degraded", "failed"
+
+# stage name -> {"state": ..., "seconds": ..., "error": ...}, in start-up order.
+stages = {}
+_task = None
+
+
+def reset():
+    stages.clear()
+
+
+@contextmanager
+def stage(name, required=True):
+    """
+    Record the state and duration of one stage. Exceptions propagate; a
+    stage that is not required is then marked DEGRADED instead of FAILED.
+    """
+    entry = stages[name] = {"state": RUNNING}
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        entry.update(state=FAILED if required else DEGRADED, error=str(e) or type(e).__name__)
+        raise
+    else:
+        entry["state"] = DONE
+    finally:
+        entry["seconds"] = round(time.perf_counter() - started, 3)
+
+
+async def _run(steps):
+    started = time.perf_counter()
+    for name, func in steps:
+        try:
+            with stage(name, required=False):
+                await run_in_threadpool(func)
+        except Exception:
+            logger.exception("Warm-up stage %s failed", name)
+    logger.info("Warm-up finished in %.2fs", time.perf_counter() - started)
+
+
+def start(steps):
+    """Run [(name, func), ...] in the background, one after another."""
+    global _task
+    for name, _ in steps:
+        stages[name] = {"state": PENDING}
+    _task = asyncio.get_running_loop().create_task(_run(steps), name="warm-up")
+
+
+async def stop():
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
+
+
+def is_ready():
+    return bool(stages) and all(entry["state"] in (DONE, DEGRADED) for entry in stages.values())
+
+
+def degraded():
+    return [name for name, entry in list(stages.items()) if entry["state"] == DEGRADED]
+
+
+def has_failed():
+    return any(entry["state"] == FAILED for entry in stages.values())
+
+
+def render_metrics():
+    """Prometheus lines for metrics.registry.collectors."""
+    lines = [
+        "# HELP warmup_ready Whether every start-up stage has finished.",
+        "# TYPE warmup_ready gauge",
+        f"warmup_ready {int(is_ready())}",
+        "# HELP warmup_stage_seconds Time spent in each start-up stage.",
+        "# TYPE warmup_stage_seconds gauge",
+    ]
+    lines += [
+        f'warmup_stage_seconds{{stage="{name}"}} {entry["seconds"]}'
+        for name, entry in list(stages.items()) if "seconds" in entry
+    ]
+    return lines
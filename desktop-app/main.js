@@ -1,7 +1,12 @@
-const { app, BrowserWindow } = require('electron');
+const { app, BrowserWindow, dialog } = require('electron');
 const path = require('path');
+const http = require('http');
 const { execFile } = require('child_process');
 
+const BACKEND_URL = 'http://127.0.0.1:8000';
+const READY_POLL_MS = 200;
+const READY_TIMEOUT_MS = 120000;
+
 let mainWindow;
 let splash; 
 let backendProcess;
@@ -38,26 +43,57 @@ function createWindow() {
     }
   });
 
-  // Recursive retry logic to wait for the backend server
-  const loadURLWithRetry = () => {
-    mainWindow.loadURL('http://127.0.0.1:8000').catch(() => {
-      console.log("Backend not ready yet, retrying in 1 second...");
-      setTimeout(loadURLWithRetry, 1000); 
+  // Wait until the backend reports ready on /readyz (database up, caches warm)
+  waitForBackend()
+    .then(() => mainWindow.loadURL(BACKEND_URL))
+    .catch((err) => {
+      dialog.showErrorBox('Startup Error', `The inventory server did not start.\n\n${err.message}`);
+      app.quit();
     });
-  };
-
-  loadURLWithRetry();
 
-  // 3. Transition from Splash to Main Window
+  // 3. Transition from Splash to Main Window as soon as the first page has rendered
   mainWindow.once('ready-to-show', () => {
-    // Ensuring the window only shows once content is fully ready
-    setTimeout(() => {
-      if (splash && !splash.isDestroyed()) {
-        splash.destroy(); 
+    if (splash && !splash.isDestroyed()) {
+      splash.destroy();
+    }
+    mainWindow.show();
+    mainWindow.maximize();
+  });
+}
+
+// Polls GET /readyz until it answers 200. Rejects if the backend reports a
+// failed required start-up stage or is not ready within READY_TIMEOUT_MS.
+function waitForBackend() {
+  const deadline = Date.now() + READY_TIMEOUT_MS;
+  return new Promise((resolve, reject) => {
+    const retry = () => {
+      if (Date.now() > deadline) {
+        reject(new Error('The backend did not become ready in time.'));
+      } else {
+        setTimeout(poll, READY_POLL_MS);
       }
-      mainWindow.show(); 
-      mainWindow.maximize(); 
-    }, 1500); 
+    };
+    const poll = () => {
+      const req = http.get(`${BACKEND_URL}/readyz`, (res) => {
+        let body = '';
+        res.setEncoding('utf8');
+        res.on('data', (chunk) => { body += chunk; });
+        res.on('end', () => {
+          let report = {};
+          try { report = JSON.parse(body); } catch (e) { /* not JSON: keep waiting */ }
+          if (res.statusCode === 200) {
+            // Optional warm-up stages that failed only make the first requests slower.
+            if (report.degraded && report.degraded.length) console.warn('Warm-up degraded:', report.degraded.join(', '));
+            return resolve();
+          }
+          if (report.status === 'failed') return reject(new Error(JSON.stringify(report.stages, null, 2)));
+          retry();
+        });
+      });
+      req.setTimeout(2000, () => req.destroy());
+      req.on('error', retry); // not listening yet
+    };
+    poll();
   });
 }
 
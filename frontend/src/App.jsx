@@ -19,7 +19,7 @@ import ForgotPassword from "./components/Auth/ForgotPassword";
 
 // Utils
 import { 
-  getEquipments, getIssues, getMaintenance, 
+  getDashboardBootstrap, getEquipments, getIssues, getMaintenance, 
   deleteEquipment, deleteIssue, deleteMaintenance 
 } from "./utils/api"; // ✅ Ensure delete functions are imported
 import authManager from "./utils/auth";
@@ -66,6 +66,7 @@ function AppContent({ isDarkMode }) {
   const [equipment, setEquipment] = useState([]);
   const [issues, setIssues] = useState([]);
   const [maintenance, setMaintenance] = useState([]);
+  const [stats, setStats] = useState(null);
   
   // Modal State (Edit)
   const [isModalOpen, setIsModalOpen] = useState(false);
@@ -84,12 +85,18 @@ function AppContent({ isDarkMode }) {
 
   const loadData = useCallback(async () => {
     try {
-      const [eqRes, issRes, maintRes] = await Promise.all([
-        getEquipments(), getIssues(), getMaintenance(),
+      // One request paints the dashboard; full lists are only fetched
+      // when the inventory is larger than the first page.
+      const { data } = await getDashboardBootstrap();
+      setStats(data.stats);
+      setEquipment(data.equipment.items);
+      setIssues(data.issues.items);
+      setMaintenance(data.maintenance.items);
+      await Promise.all([
+        data.equipment.has_more && getEquipments().then((res) => setEquipment(res.data || [])),
+        data.issues.has_more && getIssues().then((res) => setIssues(res.data || [])),
+        data.maintenance.has_more && getMaintenance().then((res) => setMaintenance(res.data || [])),
       ]);
-      setEquipment(eqRes.data || []);
-      setIssues(issRes.data || []);
-      setMaintenance(maintRes.data || []);
     } catch (err) {
       console.error("Error loading data", err);
       if (err.response && err.response.status === 401) authManager.logout(); 
@@ -167,6 +174,7 @@ function AppContent({ isDarkMode }) {
               equipment={equipment} 
               issues={issues} 
               maintenance={maintenance} 
+              stats={stats}
               onEditEquipment={(item) => handleEdit(item, "equipment")}
               onDeleteEquipment={(id) => openDeleteConfirm(id, "equipment")}
               onEditIssue={(item) => handleEdit(item, "issue")}
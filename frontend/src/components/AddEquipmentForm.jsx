@@ -68,10 +68,10 @@ function AddEquipmentForm({ onSuccess }) {
     }
   };
 
-  // --- HANDLER: Bulk CSV Upload ---
+  // --- HANDLER: Bulk CSV / Excel Upload ---
   const handleBulkUpload = async (e) => {
     e.preventDefault();
-    if (!file) return alert("Please select a CSV file first.");
+    if (!file) return alert("Please select a CSV or Excel file first.");
 
     setLoading(true);
     setError("");
@@ -93,6 +93,8 @@ function AddEquipmentForm({ onSuccess }) {
     } catch (err) {
       if (err.response?.status === 422) {
         setValidationErrors(err.response.data.detail.messages);
+      } else if (err.response?.status === 400) {
+        setError(err.response.data.detail);
       } else {
         setError("Upload failed. Please check your network or file format.");
       }
@@ -172,14 +174,14 @@ function AddEquipmentForm({ onSuccess }) {
 
       {/* 2. BULK IMPORT SECTION */}
       <div style={{ ...panelStyle, border: '2px dashed var(--border)', padding: '32px' }}>
-        <h3 style={bulkTitleStyle}>📥 Bulk Import via CSV</h3>
+        <h3 style={bulkTitleStyle}>📥 Bulk Import via CSV or Excel</h3>
         <p style={bulkSubtitleStyle}>
-          Headers must be: <b>name, code, category, lab, total_qty, status</b>
+          Headers must be: <b>name, code, category, lab, total_qty, status</b> (existing codes are topped up)
         </p>
 
         {validationErrors.length > 0 && (
           <div style={validationBoxStyle}>
-            <p style={{ fontWeight: 'bold', margin: '0 0 8px 0' }}>Fix errors in CSV:</p>
+            <p style={{ fontWeight: 'bold', margin: '0 0 8px 0' }}>Fix errors in file:</p>
             <ul style={{ margin: 0, paddingLeft: '20px' }}>
               {validationErrors.map((err, i) => <li key={i}>{err}</li>)}
             </ul>
@@ -189,7 +191,7 @@ function AddEquipmentForm({ onSuccess }) {
         <div style={bulkActionRowStyle}>
           <input 
             type="file" 
-            accept=".csv" 
+            accept=".csv,.xlsx" 
             onChange={(e) => setFile(e.target.files[0])} 
             style={{ color: 'var(--text-main)', fontSize: '14px' }} 
           />
@@ -1,7 +1,7 @@
 // frontend/src/components/Dashboard.jsx
 import React, { useState } from "react";
 import EquipmentTable from "./EquipmentTable"; 
-import { getEquipments, getIssueRecords, getMaintenanceRecords } from "../utils/api";
+import { downloadEquipmentLabels } from "../utils/api";
 // ... imports for components ...
 // --- Stat Card Component ---
 const StatCard = ({ title, value, icon }) => (
@@ -83,6 +83,7 @@ const Dashboard = ({
   equipment = [],
   issues = [],
   maintenance = [],
+  stats = null,
   onEditEquipment,
   onDeleteEquipment,
   onEditIssue,
@@ -93,11 +94,12 @@ const Dashboard = ({
   const [activeTab, setActiveTab] = useState("equipment");
   const [searchTerm, setSearchTerm] = useState("");
 
-  // Stats Logic
-  const totalEquipment = equipment.length;
-  const faultyCount = equipment.filter((e) => e.status === "Faulty").length;
-  const activeIssues = issues.filter((i) => !i.return_date).length;
-  const activeMaintenance = maintenance.filter((m) => m.status !== "Completed").length;
+  // Stats Logic: from the server when loaded via /dashboard/bootstrap,
+  // since the lists may only hold the first page at that point.
+  const totalEquipment = stats ? stats.equipment_count : equipment.length;
+  const faultyCount = stats ? stats.faulty : equipment.filter((e) => e.status === "Faulty").length;
+  const activeIssues = stats ? stats.open_issues : issues.filter((i) => !i.return_date).length;
+  const activeMaintenance = stats ? stats.open_maintenance : maintenance.filter((m) => m.status !== "Completed").length;
 
   // Search Match Helper
   const matches = (value) => {
@@ -226,6 +228,22 @@ const exportToCSV = () => {
           >
             📥 Export CSV
           </button>
+
+          {activeTab === "equipment" && (
+            <button 
+              onClick={() => downloadEquipmentLabels(searchTerm ? { ids: filteredEquipment.map(item => item.id) } : {})} 
+              disabled={filteredEquipment.length === 0}
+              style={{
+                display: 'flex', alignItems: 'center', gap: '6px',
+                padding: '10px 16px', background: '#1e293b', color: 'white',
+                border: 'none', borderRadius: '8px', fontSize: '14px', fontWeight: '600',
+                cursor: filteredEquipment.length === 0 ? 'not-allowed' : 'pointer',
+                opacity: filteredEquipment.length === 0 ? 0.5 : 1
+              }}
+            >
+              🏷️ Print Labels
+            </button>
+          )}
         </div>
       </div>
 
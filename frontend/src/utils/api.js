@@ -24,6 +24,11 @@ api.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    // Which department's inventory to work on; without it, the user's own (routing only, see backend/tenancy.py)
+    const department = localStorage.getItem('department');
+    if (department) {
+      config.headers['X-Department'] = department;
+    }
     return config;
   },
   (error) => Promise.reject(error)
@@ -159,7 +164,9 @@ export const initializeAuth = async () => {
 // =============== DATA API FUNCTIONS ===============
 
 // --- EQUIPMENT ---
-export const getEquipments = () => api.get('/equipments');
+// fields: optional list of columns, e.g. ['id', 'name', 'code'], for narrow table views
+export const getEquipments = (fields) =>
+  api.get('/equipments', { params: fields ? { fields: fields.join(',') } : {} });
 export const getEquipment = (id) => api.get(`/equipments/${id}`);
 export const createEquipment = (data) => api.post('/equipments', data);
 export const addEquipment = createEquipment; 
@@ -194,8 +201,41 @@ export const exportEquipmentCSV = async () => {
   }
 };
 
+/**
+ * PRINTABLE LABEL SHEET (PDF)
+ * params: { ids, lab, category, symbology: 'code128' | 'qr', layout: 'a4-24' | 'letter-30' }
+ * The filters are POSTed, so a long `ids` selection does not overflow the URL.
+ */
+export const downloadEquipmentLabels = async (params = {}) => {
+  try {
+    const response = await api.post('/labels/equipment.pdf', params, {
+      responseType: 'blob',
+    });
+
+    const url = window.URL.createObjectURL(new Blob([response.data], { type: 'application/pdf' }));
+    const link = document.createElement('a');
+    link.href = url;
+    link.setAttribute('download', 'equipment-labels.pdf');
+    document.body.appendChild(link);
+    link.click();
+
+    link.parentNode.removeChild(link);
+    window.URL.revokeObjectURL(url);
+  } catch (error) {
+    console.error("Label download failed:", error);
+    alert("Failed to generate labels.");
+  }
+};
+
 // --- ISSUES ---
-export const getIssues = () => api.get('/issues');
+const archiveParams = (includeArchived, fields) => ({
+  ...(includeArchived ? { include_archived: true } : {}),
+  ...(fields ? { fields: fields.join(',') } : {}),
+});
+
+// Pass true to include records moved to the archive (see backend/archive.py)
+export const getIssues = (includeArchived = false, fields) =>
+  api.get('/issues', { params: archiveParams(includeArchived, fields) });
 export const createIssueRecord = (data) => api.post('/issues', data); 
 export const createIssue = createIssueRecord; 
 export const addIssue = createIssueRecord; 
@@ -205,10 +245,73 @@ export const deleteIssue = (id) => api.delete(`/issues/${id}`);
 export const deleteIssueRecord = deleteIssue; 
 
 // --- MAINTENANCE ---
-export const getMaintenance = () => api.get('/maintenance');
+export const getMaintenance = (includeArchived = false, fields) =>
+  api.get('/maintenance', { params: archiveParams(includeArchived, fields) });
 export const createMaintenance = (data) => api.post('/maintenance', data);
 export const addMaintenance = createMaintenance; 
 export const updateMaintenance = (id, data) => api.put(`/maintenance/${id}`, data);
 export const deleteMaintenance = (id) => api.delete(`/maintenance/${id}`);
 
+// --- DASHBOARD ---
+// Stats, the first page of each list and recent activity in one request.
+export const getDashboardBootstrap = (pageSize) =>
+  api.get('/dashboard/bootstrap', { params: pageSize !== undefined ? { page_size: pageSize } : {} });
+
+// --- BORROWERS ---
+// params: { q, outstanding, after, limit }; pass next_after from a page as `after` for the next one
+export const getBorrowers = (params = {}) => api.get('/borrowers', { params });
+// Summary plus every record the borrower still holds (clearance check)
+export const getBorrower = (id) => api.get(`/borrowers/${id}`);
+// Full history, archived records included; pass includeArchived = false for live records only
+export const getBorrowerIssues = (id, beforeId, includeArchived = true) =>
+  api.get(`/borrowers/${id}/issues`, {
+    params: { ...(beforeId ? { before_id: beforeId } : {}), ...(includeArchived ? {} : { include_archived: false }) },
+  });
+
+// --- STOCK ---
+// Recompute available quantities from outstanding issues; dryRun only reports the differences.
+export const reconcileStock = (dryRun = false) =>
+  api.post('/stock/reconcile', null, { params: { dry_run: dryRun } });
+
+// --- ALERTS ---
+export const getAlerts = () => api.get('/alerts');
+
+/**
+ * LIVE ALERT FEED (server-sent events)
+ * EventSource cannot send the Authorization header, so the stream is read
+ * with fetch. onEvent(type, data) gets 'snapshot', 'raised' and 'cleared'.
+ * Returns a function that closes the stream.
+ */
+export const subscribeAlerts = (onEvent) => {
+  const controller = new AbortController();
+  const headers = {};
+  const token = localStorage.getItem('token');
+  if (token) headers.Authorization = `Bearer ${token}`;
+  const department = localStorage.getItem('department');
+  if (department) headers['X-Department'] = department;
+
+  (async () => {
+    const response = await fetch(`${API_BASE_URL}/alerts/stream`, { headers, signal: controller.signal });
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += value;
+      let end;
+      while ((end = buffer.indexOf('\n\n')) !== -1) {
+        const block = buffer.slice(0, end);
+        buffer = buffer.slice(end + 2);
+        const type = block.match(/^event: (.*)$/m);
+        const data = block.match(/^data: (.*)$/m);
+        if (type && data) onEvent(type[1], JSON.parse(data[1]));
+      }
+    }
+  })().catch((error) => {
+    if (error.name !== 'AbortError') console.error('Alert stream closed:', error);
+  });
+
+  return () => controller.abort();
+};
+
 export default api;
\ No newline at end of file